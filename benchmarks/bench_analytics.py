@@ -0,0 +1,104 @@
+"""
+Benchmark für die Auswertungen (AnalyticsService).
+
+Legt eine temporäre SQLite-Datenbank mit Artikeln aus den Kategorien der App
+und Bewegungen über zwei Jahre an und misst die Auswertung nach Monat und
+Kategorie/Abteilung: einmal ohne Zwischenspeicher (kalt) und einmal mit
+(warm, nur der laufende Monat wird neu berechnet).
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_analytics.py --count 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Item, Movement
+from services.analytics_service import AnalyticsService
+from app import KATEGORIEN, AUSGABE_TYPEN
+
+DEPARTMENTS = ['IT', 'Buchhaltung', 'Vertrieb', 'Einkauf', 'Personal', 'Logistik', 'Marketing', 'Geschäftsführung']
+GROUPS = [('category',), ('category', 'department'), ('subcategory', 'ausgabe_typ')]
+
+
+def create_app(db_path):
+    """Minimale App mit eigener Datenbank (die echte Datenbank bleibt unberührt)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def fill(count, today, seed=42, batch=50000):
+    """Legt je Unterkategorie 5 Artikel und count Bewegungen über 730 Tage an"""
+    rnd = random.Random(seed)
+    items = [
+        {'name': f'{category} {subcategory} {n}', 'category': category, 'subcategory': subcategory, 'qty': 100}
+        for category, subcategories in KATEGORIEN.items() for subcategory in subcategories for n in range(5)
+    ]
+    db.session.execute(db.insert(Item), items)
+    item_ids = [row[0] for row in db.session.query(Item.id)]
+    start = datetime.combine(today, datetime.min.time()) - timedelta(days=730)
+    typen = list(AUSGABE_TYPEN)
+    for offset in range(0, count, batch):
+        db.session.execute(db.insert(Movement), [
+            {
+                'item_id': rnd.choice(item_ids),
+                'change': rnd.choice((-1, -1, -1, -2, 1)),
+                'ausgabe_typ': rnd.choice(typen),
+                'recipient_department': rnd.choice(DEPARTMENTS),
+                'created_at': start + timedelta(seconds=rnd.randrange(730 * 86400))
+            }
+            for _ in range(min(batch, count - offset))
+        ])
+    db.session.commit()
+
+
+def timed(function, rounds):
+    """Mittlere Laufzeit in Millisekunden"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return round((time.perf_counter() - started) / rounds * 1000, 2)
+
+
+def run(count, rounds=3):
+    today = datetime.utcnow().date()
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        app = create_app(os.path.join(folder, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            fill(count, today)
+            filters = {'date_from': datetime.combine(today - timedelta(days=365), datetime.min.time())}
+            for group in GROUPS:
+                def cold():
+                    AnalyticsService.clear_cache()
+                    return AnalyticsService.movements(group, 'month', filters)
+                rows = cold()
+                results[','.join(group)] = {
+                    'rows': len(rows),
+                    'cold_ms': timed(cold, rounds),
+                    'warm_ms': timed(lambda: AnalyticsService.movements(group, 'month', filters), rounds)
+                }
+            db.session.remove()
+            db.engine.dispose()
+
+    return {'benchmark': 'analytics', 'count': count, 'period': 'month', 'months': 13, 'groups': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000000, help='Anzahl Bewegungen')
+    parser.add_argument('--rounds', type=int, default=3, help='Wiederholungen pro Auswertung')
+    args = parser.parse_args()
+    print(json.dumps(run(args.count, args.rounds), indent=2))
@@ -0,0 +1,105 @@
+"""
+Benchmark für den Export (ExportService).
+
+Legt temporäre SQLite-Datenbanken mit unterschiedlich vielen Bewegungen an
+und exportiert jeweils alle Bewegungen als CSV, CSV mit gzip und XLSX.
+Gemessen werden Laufzeit, Größe und der höchste Speicherverbrauch
+(tracemalloc) - er soll unabhängig von der Anzahl der Zeilen sein.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_export.py --counts 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Item, Movement
+from services.export_service import ExportService
+from app import KATEGORIEN, AUSGABE_TYPEN
+
+DEPARTMENTS = ['IT', 'Buchhaltung', 'Vertrieb', 'Einkauf', 'Personal', 'Logistik', 'Marketing', 'Geschäftsführung']
+FORMATS = ('csv', 'csv+gzip', 'xlsx')
+
+
+def create_app(db_path):
+    """Minimale App mit eigener Datenbank (die echte Datenbank bleibt unberührt)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def fill(count, seed=42, batch=50000):
+    """Legt je Unterkategorie 5 Artikel und count Bewegungen über 730 Tage an"""
+    rnd = random.Random(seed)
+    items = [
+        {'name': f'{category} {subcategory} {n}', 'category': category, 'subcategory': subcategory, 'qty': 100}
+        for category, subcategories in KATEGORIEN.items() for subcategory in subcategories for n in range(5)
+    ]
+    for number, item in enumerate(items):
+        item['sku'] = f'SKU-{number:05d}'
+    db.session.execute(db.insert(Item), items)
+    item_ids = [row[0] for row in db.session.query(Item.id)]
+    start = datetime(2024, 1, 1)
+    typen = list(AUSGABE_TYPEN)
+    for offset in range(0, count, batch):
+        db.session.execute(db.insert(Movement), [
+            {
+                'item_id': rnd.choice(item_ids),
+                'change': rnd.choice((-1, -1, -1, -2, 1)),
+                'ausgabe_typ': rnd.choice(typen),
+                'recipient_firstname': 'Max',
+                'recipient_lastname': f'Mustermann {rnd.randrange(500)}',
+                'recipient_department': rnd.choice(DEPARTMENTS),
+                'created_at': start + timedelta(seconds=rnd.randrange(730 * 86400))
+            }
+            for _ in range(min(batch, count - offset))
+        ])
+    db.session.commit()
+
+
+def measure(fmt):
+    """Exportiert alle Bewegungen, gibt Laufzeit, Größe und Speicherspitze zurück"""
+    kind = 'xlsx' if fmt == 'xlsx' else 'csv'
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = ExportService.export('movements', kind, {})
+    if fmt == 'csv+gzip':
+        chunks = ExportService.gzip(chunks)
+    size = sum(len(chunk) for chunk in chunks)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(seconds, 2), 'mb': round(size / 1e6, 1), 'peak_mb': round(peak / 1e6, 2)}
+
+
+def run(counts):
+    results = {}
+    for count in counts:
+        with tempfile.TemporaryDirectory() as folder:
+            app = create_app(os.path.join(folder, 'bench.db'))
+            with app.app_context():
+                db.create_all()
+                fill(count)
+                results[count] = {fmt: measure(fmt) for fmt in FORMATS}
+                db.session.remove()
+                db.engine.dispose()
+
+    return {'benchmark': 'export', 'batch_size': ExportService.BATCH_SIZE, 'counts': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[100000, 1000000], help='Anzahl Bewegungen')
+    args = parser.parse_args()
+    print(json.dumps(run(args.counts), indent=2))
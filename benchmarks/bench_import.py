@@ -0,0 +1,80 @@
+"""
+Benchmark für den CSV-Import (ImportService).
+
+Schreibt Artikel aus den Kategorien der App in eine temporäre CSV-Datei und
+importiert sie in eine leere SQLite-Datenbank (insert: nur neue Artikel),
+danach eine Lieferung nur mit SKU und Menge auf dieselben Artikel (delivery:
+reine Zugänge) und zuletzt die erste Datei noch einmal (update: alle Felder).
+Gemessen werden Zeilen pro Sekunde.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_import.py --count 100000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from services.import_service import ImportService
+from app import KATEGORIEN
+
+
+def create_app(db_path):
+    """Minimale App mit eigener Datenbank (die echte Datenbank bleibt unberührt)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def write_csv(path, count, seed=42, delivery=False):
+    """count Artikel (SKU, Name, Barcode, Kategorie, ... Menge) bzw. nur SKU und Menge"""
+    rnd = random.Random(seed)
+    subcategories = [(category, subcategory) for category, values in KATEGORIEN.items() for subcategory in values]
+    with open(path, 'w', encoding='utf-8-sig', newline='') as stream:
+        writer = csv.writer(stream, delimiter=';')
+        if delivery:
+            writer.writerow(['SKU', 'Menge'])
+            writer.writerows([f'SKU-{number:07d}', rnd.randrange(1, 50)] for number in range(count))
+            return
+        writer.writerow(['SKU', 'Name', 'Barcode', 'Kategorie', 'Unterkategorie', 'Mindestbestand', 'Menge'])
+        for number in range(count):
+            category, subcategory = rnd.choice(subcategories)
+            writer.writerow([f'SKU-{number:07d}', f'{subcategory} {number}', f'40{number:011d}',
+                             category, subcategory, rnd.randrange(5), rnd.randrange(1, 50)])
+
+
+def run(count, chunk_size):
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        items = os.path.join(folder, 'artikel.csv')
+        delivery = os.path.join(folder, 'lieferung.csv')
+        write_csv(items, count)
+        write_csv(delivery, count, delivery=True)
+        app = create_app(os.path.join(folder, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            for run_name, path in (('insert', items), ('delivery', delivery), ('update', items)):
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    stats = ImportService.import_csv(stream, chunk_size=chunk_size)
+                results[run_name] = {key: stats[key] for key in
+                                     ('rows', 'created', 'updated', 'movements', 'failed', 'seconds', 'per_second')}
+            db.session.remove()
+            db.engine.dispose()
+
+    return {'benchmark': 'import', 'count': count, 'chunk_size': chunk_size, 'runs': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000, help='Anzahl Zeilen')
+    parser.add_argument('--chunk-size', type=int, default=ImportService.CHUNK_SIZE, help='Zeilen pro Block')
+    args = parser.parse_args()
+    print(json.dumps(run(args.count, args.chunk_size), indent=2))
@@ -0,0 +1,102 @@
+"""
+Benchmark für das Lagerbuch (LedgerService).
+
+Legt Artikel mit einer Historie über ein Jahr in einer temporären SQLite-
+Datenbank an und fragt den Bestand aller Artikel zu zufälligen Tagen ab:
+einmal ohne Schnappschüsse (Summe über die ganze Historie bis zum Tag) und
+einmal mit monatlichen Schnappschüssen (letzter Schnappschuss + Bewegungen
+seitdem). Gemessen werden die Zeit pro Abfrage, die Zeit für die
+Schnappschüsse und die Prüfung items.qty gegen das Lagerbuch.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_ledger.py --movements 500000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Item, Movement
+from services.ledger_service import LedgerService
+
+START = datetime(2025, 1, 1)
+
+
+def create_app(db_path):
+    """Minimale App mit eigener Datenbank (die echte Datenbank bleibt unberührt)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def fill(items, movements, seed=42, batch=50000):
+    """Artikel und Bewegungen über 365 Tage; items.qty passt zur Historie"""
+    rnd = random.Random(seed)
+    db.session.execute(db.insert(Item), [
+        {'name': f'Artikel {n}', 'sku': f'LED-{n:05d}', 'category': 'Kabel', 'qty': 0} for n in range(items)
+    ])
+    totals = [0] * (items + 1)
+    for offset in range(0, movements, batch):
+        rows = []
+        for _ in range(min(batch, movements - offset)):
+            item_id = rnd.randrange(1, items + 1)
+            change = rnd.choice((-1, 1, 2))
+            totals[item_id] += change
+            rows.append({'item_id': item_id, 'change': change,
+                         'created_at': START + timedelta(seconds=rnd.randrange(365 * 86400))})
+        db.session.execute(db.insert(Movement), rows)
+    db.session.execute(db.update(Item), [{'id': item_id, 'qty': qty} for item_id, qty in enumerate(totals) if item_id])
+    db.session.commit()
+
+
+def measure(days):
+    """Zeit pro Abfrage "Bestand aller Artikel am Tag x" (Millisekunden)"""
+    started = time.perf_counter()
+    for day in days:
+        LedgerService.stock_at(START + timedelta(days=day))
+    return round((time.perf_counter() - started) / len(days) * 1000, 2)
+
+
+def run(items, movements, queries):
+    rnd = random.Random(7)
+    days = [rnd.randrange(1, 366) for _ in range(queries)]
+    with tempfile.TemporaryDirectory() as folder:
+        app = create_app(os.path.join(folder, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            fill(items, movements)
+            full_history_ms = measure(days)
+
+            started = time.perf_counter()
+            snapshots = sum(LedgerService.take_snapshot(START + timedelta(days=30 * month)) for month in range(1, 13))
+            snapshot_seconds = round(time.perf_counter() - started, 2)
+            with_snapshots_ms = measure(days)
+
+            started = time.perf_counter()
+            drift = LedgerService.verify()
+            verify_ms = round((time.perf_counter() - started) * 1000, 1)
+            db.session.remove()
+            db.engine.dispose()
+
+    return {'benchmark': 'ledger', 'items': items, 'movements': movements, 'queries': queries,
+            'stock_at_full_history_ms': full_history_ms, 'stock_at_with_snapshots_ms': with_snapshots_ms,
+            'snapshots': snapshots, 'snapshot_seconds': snapshot_seconds, 'verify_ms': verify_ms,
+            'drift': len(drift)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500, help='Anzahl Artikel')
+    parser.add_argument('--movements', type=int, default=500000, help='Anzahl Bewegungen (ein Jahr)')
+    parser.add_argument('--queries', type=int, default=20, help='Abfragen zu zufälligen Tagen')
+    args = parser.parse_args()
+    print(json.dumps(run(args.items, args.movements, args.queries), indent=2))
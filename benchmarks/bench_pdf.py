@@ -0,0 +1,84 @@
+"""
+Benchmark für die PDF-Erstellung (Empfangsbestätigungen).
+
+Erzeugt synthetische Bewegungen (je 4 Positionen teilen sich eine Unterschrift,
+wie bei einem Checkout) und misst Empfangsbestätigungen pro Sekunde.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_pdf.py --count 1000
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+from models import Item, Movement
+from services.pdf_service import PDFService
+
+
+def make_signature(seed, size=(600, 150)):
+    """Erzeugt eine zufällige Unterschrift als PNG-Data-URL (wie vom Canvas)"""
+    rnd = random.Random(seed)
+    image = Image.new('RGB', size, (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    points = [(rnd.randint(20, size[0] - 20), rnd.randint(20, size[1] - 20)) for _ in range(25)]
+    draw.line(points, fill=(0, 0, 0), width=3)
+    buffer = BytesIO()
+    image.save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def make_movements(count, lines_per_checkout=4):
+    """Erzeugt Bewegungen mit Artikel (nicht in der Datenbank gespeichert)"""
+    signatures = {}
+    movements = []
+    for i in range(count):
+        group = i // lines_per_checkout
+        if group not in signatures:
+            signatures[group] = make_signature(group)
+        movement = Movement(
+            id=i + 1,
+            change=-1,
+            recipient_firstname='Max',
+            recipient_lastname=f'Mustermann {group}',
+            recipient_department='IT-Support',
+            recipient_email='max@example.org',
+            issuer_firstname='Erika',
+            issuer_lastname='Muster',
+            inventory_number=f'INV-{i:05d}',
+            serial_number=f'SN-{i:08d}',
+            has_keyboard=i % 3 == 0,
+            signature=signatures[group]
+        )
+        movement.item = Item(name=f'Monitor Dell P24{i % 10}', sku=f'MON-{i:05d}')
+        movements.append(movement)
+    return movements
+
+
+def run(count):
+    movements = make_movements(count)
+    started = time.perf_counter()
+    for movement in movements:
+        PDFService.render_receipt(movement, movement.item, BytesIO(), invariant=True)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'benchmark': 'pdf_render_receipt',
+        'count': count,
+        'seconds': round(elapsed, 3),
+        'receipts_per_second': round(count / elapsed, 1)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000, help='Anzahl Bewegungen')
+    args = parser.parse_args()
+    print(json.dumps(run(args.count)))
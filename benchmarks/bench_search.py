@@ -0,0 +1,103 @@
+"""
+Benchmark für die Artikelsuche: ILIKE '%q%' (bisher) gegen Volltextsuche (FTS5).
+
+Legt eine temporäre SQLite-Datenbank mit synthetischen Artikeln an (Namen aus
+den Kategorien der App) und misst die Zeit pro Suche für die Artikelliste
+(alle Treffer) und die Schnellsuche (Top 10 nach Relevanz).
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_search.py --count 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Item
+from services.item_service import ItemService
+from app import KATEGORIEN
+
+QUERIES = ['mon', 'dell p24', 'kab-01', 'logitech', 'sn-0042', 'netzwerkkabel 5m']
+
+
+def create_app(db_path):
+    """Minimale App mit eigener Datenbank (die echte Datenbank bleibt unberührt)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def fill(count, seed=42):
+    """Legt Artikel mit Namen, SKU, Barcode und Seriennummer an"""
+    rnd = random.Random(seed)
+    categories = list(KATEGORIEN.items())
+    rows = []
+    for i in range(count):
+        category, subcategories = rnd.choice(categories)
+        subcategory = rnd.choice(subcategories)
+        rows.append({
+            'name': f'{category} {subcategory} P{rnd.randint(10, 99)}{rnd.randint(0, 9)}',
+            'sku': f'{category[:3].upper()}-{i:06d}',
+            'barcode': f'400{i:010d}',
+            'serial_number': f'SN-{rnd.randint(0, 99999):05d}',
+            'category': category,
+            'subcategory': subcategory,
+            'qty': rnd.randint(0, 50)
+        })
+    db.session.execute(db.insert(Item), rows)
+    db.session.commit()
+
+
+def ilike_query(search_query):
+    """Die bisherige Suche (vollständiger Tabellen-Scan)"""
+    return Item.query.filter(
+        (Item.name.ilike(f'%{search_query}%')) |
+        (Item.sku.ilike(f'%{search_query}%')) |
+        (Item.barcode == search_query)
+    ).order_by(Item.category.asc(), Item.subcategory.asc(), Item.name.asc())
+
+
+def timed(function, rounds):
+    """Mittlere Laufzeit in Millisekunden"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+        db.session.expunge_all()
+    return round((time.perf_counter() - started) / rounds * 1000, 2)
+
+
+def run(count, rounds=5):
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        app = create_app(os.path.join(folder, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            fill(count)
+            for search_query in QUERIES:
+                results[search_query] = {
+                    'hits': ItemService.get_all_query(search_query=search_query).count(),
+                    'ilike_list_ms': timed(lambda: ilike_query(search_query).all(), rounds),
+                    'fts_list_ms': timed(lambda: ItemService.get_all_query(search_query=search_query).all(), rounds),
+                    'ilike_top10_ms': timed(lambda: ilike_query(search_query).limit(10).all(), rounds),
+                    'fts_top10_ms': timed(lambda: ItemService.search(search_query), rounds)
+                }
+            db.session.remove()
+            db.engine.dispose()
+
+    return {'benchmark': 'item_search', 'count': count, 'queries': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000, help='Anzahl Artikel')
+    parser.add_argument('--rounds', type=int, default=5, help='Wiederholungen pro Suche')
+    args = parser.parse_args()
+    print(json.dumps(run(args.count, args.rounds), indent=2))
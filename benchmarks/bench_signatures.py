@@ -0,0 +1,110 @@
+"""
+Benchmark für die Ablage der Unterschriften.
+
+Legt eine temporäre SQLite-Datenbank mit Bewegungen an, deren Unterschrift
+wie früher als Data-URL in movements.signature steht (je 4 Positionen pro
+Checkout), misst Zeilengröße und Ladezeit der Bewegungsliste, führt die
+Migration in die Tabelle signatures aus und misst erneut.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_signatures.py --count 5000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import func
+from extensions import db
+from models import Item, Movement, Signature
+from services.signature_service import SignatureService
+from bench_pdf import make_signature
+
+
+def create_app(db_path):
+    """Minimale App mit eigener Datenbank (die echte Datenbank bleibt unberührt)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def fill(count, lines_per_checkout=4):
+    """Legt Bewegungen mit Unterschrift im alten Format an"""
+    item = Item(name='Monitor Dell P2425', sku='MON-00001', qty=0)
+    db.session.add(item)
+    db.session.flush()
+    rows = []
+    for i in range(count):
+        rows.append({
+            'item_id': item.id, 'change': -1, 'reason': 'Ausgabe',
+            'recipient_firstname': 'Max', 'recipient_lastname': f'Mustermann {i // lines_per_checkout}',
+            'recipient_department': 'IT-Support', 'signature_legacy': make_signature(i // lines_per_checkout)
+        })
+    db.session.execute(db.insert(Movement), rows)
+    db.session.commit()
+
+
+def measure(db_path, rounds=20, load_legacy=False):
+    """Misst Speicherbedarf und Ladezeit der Bewegungsliste (neueste 100, mit Artikel)"""
+    query = Movement.query.options(db.joinedload(Movement.item)).order_by(Movement.created_at.desc()).limit(100)
+    if load_legacy:
+        # Vor der Änderung wurde die Spalte immer mitgeladen
+        query = query.options(db.undefer(Movement.signature_legacy))
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for movement in query.all():
+            movement.item.name
+        db.session.expunge_all()
+    list_ms = (time.perf_counter() - started) / rounds * 1000
+
+    movements = db.session.query(func.count(Movement.id)).scalar()
+    signature_bytes = (
+        (db.session.query(func.sum(func.length(Movement.signature_legacy))).scalar() or 0)
+        + (db.session.query(func.sum(Signature.size)).scalar() or 0)
+    )
+    return {
+        'list_100_ms': round(list_ms, 2),
+        'signature_bytes_per_movement': round(signature_bytes / movements),
+        'db_bytes': os.path.getsize(db_path)
+    }
+
+
+def run(count):
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, 'bench.db')
+        app = create_app(db_path)
+        with app.app_context():
+            db.create_all()
+            fill(count)
+            before = measure(db_path, load_legacy=True)
+
+            started = time.perf_counter()
+            stats = SignatureService.migrate(vacuum=True)
+            migrate_seconds = time.perf_counter() - started
+
+            after = measure(db_path)
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        'benchmark': 'signature_storage',
+        'count': count,
+        'before': before,
+        'after': after,
+        'signatures': stats['signatures'],
+        'migrate_seconds': round(migrate_seconds, 2)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=5000, help='Anzahl Bewegungen')
+    args = parser.parse_args()
+    print(json.dumps(run(args.count)))
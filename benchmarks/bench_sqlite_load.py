@@ -0,0 +1,161 @@
+"""
+Lasttest für die SQLite-Profile (db_profiles.py).
+
+N Prozesse simulieren Scanner-Plätze auf einer gemeinsamen temporären
+Datenbank mit vorhandener Historie: jeder bucht Ausgaben/Rückgaben über
+MovementService.commit_cart (mit PDF-Auftrag), liest zwischendurch Historie
+und Dashboard und exportiert ab und zu die Bewegungen der letzten 90 Tage
+(lange Lesezugriffe wie Berichte neben dem laufenden Betrieb). Gemessen
+werden Buchungen pro Sekunde, Latenzen und Fehler "database is locked" -
+einmal mit dem bisherigen Verhalten (legacy) und einmal mit dem
+Produktionsprofil.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_sqlite_load.py --workers 8 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+import db_profiles
+from extensions import db
+from models import Item, Movement
+from services.export_service import ExportService
+from services.job_service import JobService
+from services.movement_service import MovementService
+from services.stats_service import StatsService
+
+ITEMS = 200
+
+
+def create_app(db_path, profile):
+    """Minimale App mit eigener Datenbank und dem gewählten Profil"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['DB_PROFILE'] = profile
+    db_profiles.init_app(app, db)
+    return app
+
+
+def fill(db_path, profile, movements, seed=42, batch=50000):
+    """Artikel mit großem Bestand und eine Historie über ein Jahr"""
+    rnd = random.Random(seed)
+    app = create_app(db_path, profile)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Item), [
+            {'name': f'Artikel {n}', 'sku': f'LOAD-{n:04d}', 'category': 'Kabel', 'qty': 1000000}
+            for n in range(ITEMS)
+        ])
+        start = datetime.utcnow() - timedelta(days=365)
+        for offset in range(0, movements, batch):
+            db.session.execute(db.insert(Movement), [
+                {'item_id': rnd.randrange(1, ITEMS + 1), 'change': -1, 'ausgabe_typ': 'sonstige',
+                 'created_at': start + timedelta(seconds=rnd.randrange(365 * 86400))}
+                for _ in range(min(batch, movements - offset))
+            ])
+        db.session.commit()
+        db.engine.dispose()
+
+
+def worker(db_path, profile, seconds, seed, results):
+    """Ein Scanner-Platz: 80 % Buchungen, 18 % Historie/Dashboard, 2 % Export"""
+    rnd = random.Random(seed)
+    app = create_app(db_path, profile)
+    stats = {'checkouts': 0, 'reads': 0, 'exports': 0, 'locked': 0, 'latencies': []}
+    export_from = (datetime.utcnow() - timedelta(days=90)).strftime('%Y-%m-%d')
+    with app.app_context():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            action = rnd.random()
+            try:
+                if action < 0.8:
+                    cart = [{'item_id': rnd.randrange(1, ITEMS + 1), 'quantity': rnd.randint(1, 3)}
+                            for _ in range(rnd.randint(1, 3))]
+                    success, _, results_ = MovementService.commit_cart(
+                        cart, direction=rnd.choice((-1, 1)), reason='Last', ausgabe_typ='sonstige',
+                        recipient_lastname=f'Platz {seed}')
+                    booked = [r for r in results_ if r['success']]
+                    if booked:
+                        checkout_id = booked[0]['movement'].checkout_id
+                        JobService.enqueue('checkout_receipt', {'checkout_id': checkout_id}, checkout_id=checkout_id)
+                    stats['checkouts'] += 1
+                    stats['latencies'].append(time.perf_counter() - started)
+                elif action < 0.98:
+                    MovementService.list_movements(limit=50)
+                    StatsService.get_dashboard()
+                    stats['reads'] += 1
+                else:
+                    for _ in ExportService.export('movements', 'csv', {'date_from': export_from}):
+                        pass
+                    stats['exports'] += 1
+            except OperationalError as error:
+                db.session.rollback()
+                if 'locked' in str(error) or 'busy' in str(error):
+                    stats['locked'] += 1
+                else:
+                    raise
+            finally:
+                db.session.remove()
+        db.engine.dispose()
+    results.put(stats)
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * share))] * 1000, 1)
+
+
+def run(workers, seconds, profiles, movements):
+    context = multiprocessing.get_context('spawn')
+    report = {}
+    for profile in profiles:
+        with tempfile.TemporaryDirectory() as folder:
+            db_path = os.path.join(folder, 'load.db')
+            fill(db_path, profile, movements)
+            results = context.Queue()
+            processes = [context.Process(target=worker, args=(db_path, profile, seconds, seed, results))
+                         for seed in range(workers)]
+            for process in processes:
+                process.start()
+            collected = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+        latencies = [value for stats in collected for value in stats['latencies']]
+        checkouts = sum(stats['checkouts'] for stats in collected)
+        report[profile] = {
+            'checkouts_per_second': round(checkouts / seconds, 1),
+            'reads_per_second': round(sum(stats['reads'] for stats in collected) / seconds, 1),
+            'exports': sum(stats['exports'] for stats in collected),
+            'locked_errors': sum(stats['locked'] for stats in collected),
+            'p50_ms': percentile(latencies, 0.5),
+            'p95_ms': percentile(latencies, 0.95),
+            'max_ms': percentile(latencies, 1.0)
+        }
+
+    return {'benchmark': 'sqlite_load', 'workers': workers, 'seconds': seconds, 'movements': movements,
+            'cpus': os.cpu_count(), 'profiles': report}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8, help='Anzahl gleichzeitiger Scanner-Plätze (Prozesse)')
+    parser.add_argument('--seconds', type=float, default=10, help='Dauer pro Profil')
+    parser.add_argument('--movements', type=int, default=200000, help='Vorhandene Bewegungen (Historie)')
+    parser.add_argument('--profiles', nargs='+', default=['legacy', 'production'], choices=list(db_profiles.PROFILES))
+    args = parser.parse_args()
+    print(json.dumps(run(args.workers, args.seconds, args.profiles, args.movements), indent=2))
@@ -0,0 +1,123 @@
+"""
+Synthetischer Lagerbestand für Benchmarks.
+
+Füllt Benutzer, Artikel (Namen und Kategorien aus KATEGORIEN) und eine
+Historie aus Checkouts mit Bewegungen. Gleiche Mengen und gleicher Seed
+ergeben dieselben Zeilen (feste Zeitpunkte, kein utcnow), damit Messungen
+verschiedener Commits vergleichbar bleiben. items.qty passt zum Lagerbuch
+(Anfangsbestand als Schnappschuss plus Summe der Bewegungen).
+
+Verwendung (mit App-Kontext und leeren Tabellen):
+    from warehouse_data import generate
+    generate(items=10000, movements=200000, users=20)
+"""
+import random
+from datetime import datetime, timedelta
+from extensions import db
+from models import Checkout, Item, Movement, StockSnapshot, User
+from services.ledger_service import LedgerService
+from app import KATEGORIEN
+
+# Historie über ein Jahr ab START
+START = datetime(2025, 1, 1)
+DAYS = 365
+
+# Anfangsbestand jedes Artikels (reicht für die Ausgaben der Historie)
+OPENING_QTY = 1000
+
+# Passwort aller erzeugten Benutzer
+PASSWORD = 'bench123'
+
+DEPARTMENTS = ['IT', 'Vertrieb', 'Einkauf', 'Buchhaltung', 'Personal', 'Lager']
+LASTNAMES = ['Muster', 'Schmidt', 'Meyer', 'Schulz', 'Becker', 'Wagner', 'Koch', 'Richter']
+AUSGABE_TYPEN = ['buero', 'homeoffice', 'ersatz', 'sonstige']
+
+
+def barcode(number):
+    """Barcode des Artikels mit der laufenden Nummer (0 ... items-1)"""
+    return f'400{number:010d}'
+
+
+def sku(category, number):
+    """SKU des Artikels mit der laufenden Nummer"""
+    return f'{category[:3].upper()}-{number:06d}'
+
+
+def generate(items=10000, movements=200000, users=20, seed=42, batch=50000):
+    """
+    Legt den Datenbestand an (benötigt App-Kontext und leere Tabellen).
+
+    Args:
+        items: Anzahl Artikel
+        movements: Anzahl Bewegungen (in Checkouts zu 1-5 Positionen)
+        users: Anzahl Benutzer (Ausgebende der Bewegungen)
+        seed: Startwert des Zufallsgenerators
+        batch: Zeilen pro INSERT
+
+    Returns:
+        dict: angelegte Zeilen pro Tabelle
+    """
+    rnd = random.Random(seed)
+
+    # Ein Passwort-Hash für alle Benutzer (das Hashen dauert absichtlich lange)
+    template = User(username='vorlage')
+    template.set_password(PASSWORD)
+    people = [(f'Vorname {n}', rnd.choice(LASTNAMES)) for n in range(users)]
+    db.session.execute(db.insert(User), [
+        {'username': f'lager{n:03d}', 'password_hash': template.password_hash, 'firstname': firstname,
+         'lastname': lastname}
+        for n, (firstname, lastname) in enumerate(people)
+    ])
+
+    subcategories = [(category, subcategory) for category, values in KATEGORIEN.items() for subcategory in values]
+    rows = []
+    for n in range(items):
+        category, subcategory = rnd.choice(subcategories)
+        rows.append({
+            'name': f'{subcategory} {rnd.choice(["Dell", "Logitech", "HP", "Lenovo", "Cisco"])} P{rnd.randint(10, 99)}',
+            'sku': sku(category, n), 'barcode': barcode(n), 'serial_number': f'SN-{rnd.randint(0, 99999):05d}',
+            'category': category, 'subcategory': subcategory, 'qty': OPENING_QTY,
+            'min_qty': rnd.randint(0, 10), 'created_at': START
+        })
+    for offset in range(0, items, batch):
+        db.session.execute(db.insert(Item), rows[offset:offset + batch])
+    db.session.execute(db.insert(StockSnapshot), [
+        {'item_id': item_id, 'as_of': LedgerService.BEGIN, 'qty': OPENING_QTY} for item_id in range(1, items + 1)
+    ])
+
+    # Checkouts mit je 1-5 Positionen, gleichmäßig über das Jahr (80 % Ausgaben)
+    sizes = []
+    remaining = movements
+    while remaining > 0:
+        sizes.append(min(rnd.randint(1, 5), remaining))
+        remaining -= sizes[-1]
+    moments = sorted(rnd.randrange(DAYS * 86400) for _ in sizes)
+    totals = [0] * (items + 1)
+    checkouts = []
+    lines = []
+    for size, moment in zip(sizes, moments):
+        created_at = START + timedelta(seconds=moment)
+        ausgabe_typ = rnd.choice(AUSGABE_TYPEN)
+        checkouts.append({'ausgabe_typ': ausgabe_typ, 'created_at': created_at})
+        direction = -1 if rnd.random() < 0.8 else 1
+        firstname, lastname = rnd.choice(people)
+        recipient = rnd.choice(LASTNAMES)
+        department = rnd.choice(DEPARTMENTS)
+        for _ in range(size):
+            item_id = rnd.randrange(1, items + 1)
+            change = direction * rnd.randint(1, 3)
+            totals[item_id] += change
+            lines.append({
+                'item_id': item_id, 'checkout_id': len(checkouts), 'change': change, 'ausgabe_typ': ausgabe_typ,
+                'created_at': created_at, 'recipient_firstname': 'Max', 'recipient_lastname': recipient,
+                'recipient_department': department, 'issuer_firstname': firstname, 'issuer_lastname': lastname
+            })
+    for offset in range(0, len(checkouts), batch):
+        db.session.execute(db.insert(Checkout), checkouts[offset:offset + batch])
+    for offset in range(0, len(lines), batch):
+        db.session.execute(db.insert(Movement), lines[offset:offset + batch])
+    db.session.execute(db.update(Item), [
+        {'id': item_id, 'qty': OPENING_QTY + total} for item_id, total in enumerate(totals) if item_id and total
+    ])
+    db.session.commit()
+    return {'users': users, 'items': items, 'checkouts': len(checkouts), 'movements': len(lines)}
@@ -0,0 +1,141 @@
+"""
+Datenbank-Profile (SQLite-Einstellungen und Verbindungs-Pool).
+
+Ein Profil legt die PRAGMAs fest, die für jede neue SQLite-Verbindung
+gesetzt werden, und die Optionen des SQLAlchemy-Pools. Ausgewählt wird es
+über DB_PROFILE (Umgebungsvariable bzw. app.config). Die Datenbank selbst
+kommt aus DATABASE_URL (SQLite-Datei oder PostgreSQL für mehrere Standorte).
+"""
+from sqlalchemy import event
+
+PROFILES = {
+    # Bisheriges Verhalten: Rollback-Journal, Standardwerte (zum Vergleich)
+    'legacy': {
+        'pragmas': {},
+        'pool': {}
+    },
+    # WAL: Leser blockieren Schreiber nicht mehr; synchronous=NORMAL schreibt
+    # nur beim Checkpoint per fsync (bei Stromausfall gehen höchstens die
+    # letzten Transaktionen verloren, die Datei bleibt konsistent)
+    'development': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000
+        },
+        'pool': {}
+    },
+    # Mehrere Scanner-Plätze gleichzeitig: längeres Warten auf die
+    # Schreibsperre, größerer Seiten-Cache, Lesen per mmap, mehr Verbindungen
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 15000,
+            'cache_size': -65536,          # 64 MB pro Verbindung
+            'mmap_size': 268435456,        # 256 MB
+            'temp_store': 'MEMORY',
+            'wal_autocheckpoint': 1000
+        },
+        'pool': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30
+        }
+    }
+}
+
+DEFAULT_PROFILE = 'production'
+
+
+def get_profile(name):
+    """
+    Gibt ein Profil zurück.
+
+    Raises:
+        ValueError: bei unbekanntem Profil
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unbekanntes Datenbank-Profil {name!r} (erlaubt: {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def database_uri(url, default):
+    """
+    Verbindungs-URL aus der Umgebung (DATABASE_URL) oder die Standard-Datei.
+    postgres:// und postgresql:// ohne Treiber bekommen psycopg (Version 3).
+
+    Args:
+        url: Wert von DATABASE_URL (leer = Standard)
+        default: z.B. sqlite:///.../lager.db
+
+    Returns:
+        str: URL für SQLALCHEMY_DATABASE_URI
+    """
+    if not url:
+        return default
+    for prefix in ('postgres://', 'postgresql://'):
+        if url.startswith(prefix):
+            return 'postgresql+psycopg://' + url[len(prefix):]
+    return url
+
+
+def engine_options(name, uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS für ein Profil (SQLite im Speicher nutzt
+    einen eigenen Pool und bekommt keine Pool-Optionen; PostgreSQL prüft
+    Verbindungen vor der Benutzung, z.B. nach einem Neustart des Servers).
+    """
+    profile = get_profile(name)
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}
+    options = dict(profile['pool'])
+    if uri.startswith('postgresql'):
+        options['pool_pre_ping'] = True
+    return options
+
+
+def apply_pragmas(engine, name):
+    """
+    Setzt die PRAGMAs des Profils für jede neue Verbindung (connect-Event).
+    Andere Datenbanken als SQLite bleiben unverändert.
+
+    Args:
+        engine: SQLAlchemy-Engine
+        name: Profilname
+    """
+    pragmas = get_profile(name)['pragmas']
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f'PRAGMA {pragma}={value}')
+        finally:
+            cursor.close()
+
+
+def init_app(app, db):
+    """
+    Aktiviert das Profil aus app.config['DB_PROFILE'] und initialisiert
+    die Datenbank (statt db.init_app).
+
+    Args:
+        app: Flask-App (SQLALCHEMY_DATABASE_URI muss gesetzt sein)
+        db: Flask-SQLAlchemy-Instanz
+    """
+    name = app.config.setdefault('DB_PROFILE', DEFAULT_PROFILE)
+    options = engine_options(name, app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    db.init_app(app)
+    with app.app_context():
+        apply_pragmas(db.engine, name)
+
+
+def get_pragmas(connection):
+    """Liest die aktiven Einstellungen einer Verbindung (z.B. für Tests und Diagnose)"""
+    names = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store')
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
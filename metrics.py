@@ -0,0 +1,192 @@
+"""
+Laufzeit-Kennzahlen (Prometheus-Textformat unter /metrics).
+
+Pro Endpunkt werden Dauer, Anzahl und Dauer der SQL-Abfragen als
+Histogramme gezählt (SQLAlchemy-Events before/after_cursor_execute), die
+Services melden PDF- und SMTP-Zeiten über timed()/observe(). Die Werte
+gelten pro Prozess; der Worker (flask jobs work) zählt seine PDFs und
+E-Mails selbst, im Server-Prozess erscheinen sie, wenn die Worker-Threads
+dort laufen. Ohne zusätzliche Abhängigkeit (kein prometheus_client).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+# Grenzen der Histogramm-Klassen
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# Name -> (Typ, Beschreibung, Grenzen)
+METRICS = {
+    'lager_requests_total': ('counter', 'Anfragen pro Endpunkt und Status', None),
+    'lager_request_duration_seconds': ('histogram', 'Dauer der Anfragen pro Endpunkt', LATENCY_BUCKETS),
+    'lager_request_queries': ('histogram', 'SQL-Abfragen pro Anfrage', QUERY_BUCKETS),
+    'lager_request_query_seconds': ('histogram', 'Zeit in SQL-Abfragen pro Anfrage', LATENCY_BUCKETS),
+    'lager_pdf_render_seconds': ('histogram', 'Dauer der PDF-Erstellung', LATENCY_BUCKETS),
+    'lager_smtp_send_seconds': ('histogram', 'Dauer des SMTP-Versands pro Nachricht', LATENCY_BUCKETS)
+}
+
+_lock = threading.Lock()
+_values = {}        # (name, labels) -> Zahl bzw. [Klassen..., Summe, Anzahl]
+_collectors = []    # Funktionen für Momentwerte (Zwischenspeicher, Pool, ...)
+
+
+def reset():
+    """Setzt alle gezählten Werte zurück (z.B. für Tests)"""
+    with _lock:
+        _values.clear()
+
+
+def inc(name, value=1, **labels):
+    """Erhöht einen Zähler."""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _values[key] = _values.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Trägt einen Messwert in ein Histogramm ein."""
+    buckets = METRICS[name][2]
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        counts = _values.get(key)
+        if counts is None:
+            counts = _values[key] = [0] * (len(buckets) + 2)
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                counts[index] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+
+@contextmanager
+def timed(name, **labels):
+    """Misst die Dauer eines Blocks (auch als Dekorator verwendbar)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def register_collector(func):
+    """
+    Registriert eine Funktion für Momentwerte (Gauges).
+
+    Args:
+        func: gibt eine Liste mit (name, beschreibung, [(labels: dict, wert)]) zurück
+    """
+    _collectors.append(func)
+    return func
+
+
+# -------- Ausgabe --------
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """
+    Alle Kennzahlen im Prometheus-Textformat (Version 0.0.4).
+
+    Returns:
+        str
+    """
+    with _lock:
+        values = sorted((key, list(value) if isinstance(value, list) else value) for key, value in _values.items())
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        for (metric, labels), value in values:
+            if metric != name:
+                continue
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            for bound, count in zip(buckets, value):
+                lines.append(f'{name}_bucket{_labels(labels + (("le", _number(bound)),))} {count}')
+            lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {value[-1]}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value[-2])}')
+            lines.append(f'{name}_count{_labels(labels)} {value[-1]}')
+
+    for collector in _collectors:
+        for name, description, samples in collector():
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} gauge']
+            lines += [f'{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}' for labels, value in samples]
+    return '\n'.join(lines) + '\n'
+
+
+# -------- Flask und SQLAlchemy --------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Nur Abfragen innerhalb einer Anfrage zählen (nicht Worker-Threads)
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_queries += 1
+        g.metrics_query_seconds += time.perf_counter() - context.metrics_started
+
+
+def _finish_request(response):
+    """
+    Zählt die Anfrage. Bei gestreamten Antworten (Export) fehlen die
+    Abfragen, die erst beim Senden des Inhalts laufen.
+    """
+    if 'metrics_started' not in g:
+        return response
+    endpoint = request.endpoint or 'unbekannt'
+    duration = time.perf_counter() - g.metrics_started
+    inc('lager_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    observe('lager_request_duration_seconds', duration, endpoint=endpoint)
+    observe('lager_request_queries', g.metrics_queries, endpoint=endpoint)
+    observe('lager_request_query_seconds', g.metrics_query_seconds, endpoint=endpoint)
+
+    # Debug-Header: N+1-Abfragen fallen sofort auf (Browser-Werkzeuge, Tests)
+    if g.get('metrics_header'):
+        response.headers['X-Query-Count'] = str(g.metrics_queries)
+        response.headers['X-Query-Time-Ms'] = f'{g.metrics_query_seconds * 1000:.1f}'
+    return response
+
+
+def init_app(app, db):
+    """
+    Aktiviert die Messung für alle Anfragen und die Route /metrics.
+    Der Header X-Query-Count kommt im Debug- und Testbetrieb oder mit
+    METRICS_QUERY_HEADER.
+
+    Args:
+        app: Flask-App (Datenbank muss schon initialisiert sein)
+        db: Flask-SQLAlchemy-Instanz
+    """
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request():
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_seconds = 0.0
+        g.metrics_header = app.debug or app.testing or app.config.get('METRICS_QUERY_HEADER', False)
+
+    app.after_request(_finish_request)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,16 @@
+"""
+Datenbank-Migrationen.
+
+Jedes Modul beschreibt eine Version des Schemas:
+    VERSION      fortlaufende Nummer
+    DESCRIPTION  kurze Beschreibung
+    upgrade(connection)  Änderungen (idempotent, läuft in einer Transaktion)
+
+Migrationen sind eingefroren: sie bringen ihr DDL und SQL selbst mit
+(eigene Table-Definitionen mit den Spalten, die sie brauchen) und
+importieren keine Models oder Services, die sich später noch ändern.
+Eine Änderung an einem Model braucht deshalb eine neue Migration;
+test_migrationen_wie_models prüft, dass beides zusammenpasst.
+
+Ausführen mit 'flask --app app db upgrade'.
+"""
@@ -0,0 +1,103 @@
+"""
+Fehlende Tabellen anlegen (neue Datenbank oder Stand vor den Migrationen).
+
+Das Schema ist hier eingefroren (eigene MetaData, nicht die Models): eine
+Datenbank auf Version 1 hat immer genau diese Tabellen, spätere Änderungen
+gehören in eine neue Migration.
+"""
+import sqlalchemy as sa
+
+VERSION = 1
+DESCRIPTION = 'Tabellen anlegen'
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'items', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(120), nullable=False),
+    sa.Column('sku', sa.String(64), unique=True),
+    sa.Column('barcode', sa.String(64), unique=True),
+    sa.Column('inventory_number', sa.String(50)),
+    sa.Column('serial_number', sa.String(50)),
+    sa.Column('qty', sa.Integer, nullable=False),
+    sa.Column('min_qty', sa.Integer, nullable=False),
+    sa.Column('category', sa.String(50)),
+    sa.Column('subcategory', sa.String(100)),
+    sa.Column('created_at', sa.DateTime)
+)
+
+sa.Table(
+    'users', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('username', sa.String(64), unique=True, nullable=False),
+    sa.Column('password_hash', sa.String(200), nullable=False),
+    sa.Column('firstname', sa.String(100)),
+    sa.Column('lastname', sa.String(100))
+)
+
+sa.Table(
+    'checkouts', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('ausgabe_typ', sa.String(50)),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('pdf_file', sa.String(200))
+)
+
+sa.Table(
+    'signatures', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('sha256', sa.String(64), unique=True, nullable=False),
+    sa.Column('mime_type', sa.String(50), nullable=False),
+    sa.Column('size', sa.Integer, nullable=False),
+    sa.Column('data', sa.LargeBinary, nullable=False),
+    sa.Column('created_at', sa.DateTime)
+)
+
+sa.Table(
+    'movements', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('item_id', sa.Integer, sa.ForeignKey('items.id'), nullable=False),
+    sa.Column('checkout_id', sa.Integer, sa.ForeignKey('checkouts.id'), index=True),
+    sa.Column('change', sa.Integer, nullable=False),
+    sa.Column('reason', sa.String(100)),
+    sa.Column('ausgabe_typ', sa.String(50)),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('recipient_firstname', sa.String(100)),
+    sa.Column('recipient_lastname', sa.String(100)),
+    sa.Column('recipient_department', sa.String(100)),
+    sa.Column('recipient_email', sa.String(120)),
+    sa.Column('issuer_firstname', sa.String(100)),
+    sa.Column('issuer_lastname', sa.String(100)),
+    sa.Column('inventory_number', sa.String(50)),
+    sa.Column('serial_number', sa.String(50)),
+    sa.Column('has_keyboard', sa.Boolean),
+    sa.Column('has_damage', sa.Boolean),
+    sa.Column('damage_description', sa.Text),
+    sa.Column('signature_id', sa.Integer, sa.ForeignKey('signatures.id'), index=True),
+    sa.Column('signature', sa.Text),
+    sa.Column('pdf_file', sa.String(200))
+)
+
+sa.Table(
+    'jobs', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('kind', sa.String(50), nullable=False),
+    sa.Column('payload', sa.Text),
+    sa.Column('status', sa.String(20), nullable=False, index=True),
+    sa.Column('attempts', sa.Integer, nullable=False),
+    sa.Column('max_attempts', sa.Integer, nullable=False),
+    sa.Column('run_at', sa.DateTime, index=True),
+    sa.Column('last_error', sa.Text),
+    sa.Column('result', sa.Text),
+    sa.Column('locked_by', sa.String(100)),
+    sa.Column('locked_at', sa.DateTime),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('finished_at', sa.DateTime),
+    sa.Column('movement_id', sa.Integer, sa.ForeignKey('movements.id'), index=True),
+    sa.Column('checkout_id', sa.Integer, sa.ForeignKey('checkouts.id'), index=True)
+)
+
+
+def upgrade(connection):
+    metadata.create_all(bind=connection)
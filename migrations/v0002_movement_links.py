@@ -0,0 +1,25 @@
+"""Verknüpfungen der Bewegungen zu Checkout und Unterschrift in alten Datenbanken nachziehen"""
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex
+from services.migration_service import MigrationService
+
+VERSION = 2
+DESCRIPTION = 'movements.checkout_id und movements.signature_id'
+
+movements = sa.Table(
+    'movements', sa.MetaData(),
+    sa.Column('checkout_id', sa.Integer),
+    sa.Column('signature_id', sa.Integer)
+)
+
+INDEXES = [
+    sa.Index('ix_movements_checkout_id', movements.c.checkout_id),
+    sa.Index('ix_movements_signature_id', movements.c.signature_id)
+]
+
+
+def upgrade(connection):
+    MigrationService.add_column(connection, 'movements', 'checkout_id', 'INTEGER REFERENCES checkouts (id)')
+    MigrationService.add_column(connection, 'movements', 'signature_id', 'INTEGER REFERENCES signatures (id)')
+    for index in INDEXES:
+        connection.execute(CreateIndex(index, if_not_exists=True))
@@ -0,0 +1,44 @@
+"""Indizes für Artikelliste, Dashboard und Bewegungs-Historie"""
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex
+
+VERSION = 3
+DESCRIPTION = 'Indizes für Artikel und Historie'
+
+metadata = sa.MetaData()
+
+items = sa.Table(
+    'items', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(120)),
+    sa.Column('category', sa.String(50)),
+    sa.Column('subcategory', sa.String(100)),
+    sa.Column('created_at', sa.DateTime)
+)
+
+movements = sa.Table(
+    'movements', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('item_id', sa.Integer),
+    sa.Column('ausgabe_typ', sa.String(50)),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('recipient_lastname', sa.String(100)),
+    sa.Column('recipient_department', sa.String(100))
+)
+
+INDEXES = [
+    sa.Index('ix_items_category_sub_name', items.c.category, items.c.subcategory, items.c.name),
+    sa.Index('ix_items_created_id', items.c.created_at, items.c.id),
+    sa.Index('ix_movements_created_id', movements.c.created_at, movements.c.id),
+    sa.Index('ix_movements_item_created', movements.c.item_id, movements.c.created_at, movements.c.id),
+    sa.Index('ix_movements_typ_created', movements.c.ausgabe_typ, movements.c.created_at, movements.c.id),
+    sa.Index('ix_movements_recipient_created', sa.func.lower(movements.c.recipient_lastname),
+             movements.c.created_at, movements.c.id),
+    sa.Index('ix_movements_department_created', sa.func.lower(movements.c.recipient_department),
+             movements.c.created_at, movements.c.id)
+]
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        connection.execute(CreateIndex(index, if_not_exists=True))
@@ -0,0 +1,32 @@
+"""Volltextsuche für Artikel (SQLite FTS5) anlegen und füllen"""
+
+VERSION = 4
+DESCRIPTION = 'Volltextsuche items_fts'
+
+# Stand der Suchspalten mit Version 4 (Änderungen brauchen eine neue Migration)
+_columns = 'name, sku, barcode, inventory_number, serial_number, category, subcategory'
+_new = ', '.join(f'new.{column}' for column in _columns.split(', '))
+_old = ', '.join(f'old.{column}' for column in _columns.split(', '))
+
+STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5({_columns},
+        content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, {_columns}) VALUES (new.id, {_new});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF {_columns} ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+        INSERT INTO items_fts(rowid, {_columns}) VALUES (new.id, {_new});
+    END""",
+    "INSERT INTO items_fts(items_fts) VALUES ('rebuild')"
+]
+
+
+def upgrade(connection):
+    if connection.dialect.name != 'sqlite':
+        return  # andere Datenbanken suchen weiter mit ILIKE
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
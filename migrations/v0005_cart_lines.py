@@ -0,0 +1,27 @@
+"""Tabelle für den serverseitigen Warenkorb"""
+import sqlalchemy as sa
+
+VERSION = 5
+DESCRIPTION = 'Tabelle cart_lines (Warenkorb in der Datenbank)'
+
+metadata = sa.MetaData()
+
+# Nur für die Fremdschlüssel (bestehen seit Version 1)
+sa.Table('users', metadata, sa.Column('id', sa.Integer, primary_key=True))
+sa.Table('items', metadata, sa.Column('id', sa.Integer, primary_key=True))
+
+cart_lines = sa.Table(
+    'cart_lines', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('cart_key', sa.String(64), nullable=False),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('users.id')),
+    sa.Column('item_id', sa.Integer, sa.ForeignKey('items.id'), nullable=False),
+    sa.Column('quantity', sa.Integer, nullable=False),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('expires_at', sa.DateTime, nullable=False, index=True),
+    sa.UniqueConstraint('cart_key', 'item_id', name='uq_cart_lines_cart_item')
+)
+
+
+def upgrade(connection):
+    cart_lines.create(bind=connection, checkfirst=True)
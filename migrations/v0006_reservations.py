@@ -0,0 +1,23 @@
+"""Reservierte Mengen in cart_lines und Index für die Summe pro Artikel"""
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex
+from services.migration_service import MigrationService
+
+VERSION = 6
+DESCRIPTION = 'cart_lines.reserved und Index ix_cart_lines_item_expires'
+
+cart_lines = sa.Table(
+    'cart_lines', sa.MetaData(),
+    sa.Column('cart_key', sa.String(64)),
+    sa.Column('item_id', sa.Integer),
+    sa.Column('expires_at', sa.DateTime),
+    sa.Column('reserved', sa.Integer)
+)
+
+INDEX = sa.Index('ix_cart_lines_item_expires', cart_lines.c.item_id, cart_lines.c.expires_at,
+                 cart_lines.c.cart_key, cart_lines.c.reserved)
+
+
+def upgrade(connection):
+    MigrationService.add_column(connection, 'cart_lines', 'reserved', 'INTEGER NOT NULL DEFAULT 0')
+    connection.execute(CreateIndex(INDEX, if_not_exists=True))
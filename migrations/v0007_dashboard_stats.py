@@ -0,0 +1,99 @@
+"""Materialisierte Kennzahlen für das Dashboard anlegen und befüllen"""
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex
+
+VERSION = 7
+DESCRIPTION = 'Kennzahlen category_stats/daily_stats und Index ix_items_shortfall'
+
+metadata = sa.MetaData()
+
+items = sa.Table(
+    'items', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('qty', sa.Integer),
+    sa.Column('min_qty', sa.Integer),
+    sa.Column('category', sa.String(50))
+)
+
+movements = sa.Table(
+    'movements', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('created_at', sa.DateTime)
+)
+
+category_stats = sa.Table(
+    'category_stats', metadata,
+    sa.Column('category', sa.String(50), primary_key=True),
+    sa.Column('items', sa.Integer, nullable=False),
+    sa.Column('low_stock', sa.Integer, nullable=False),
+    sa.Column('qty', sa.Integer, nullable=False)
+)
+
+daily_stats = sa.Table(
+    'daily_stats', metadata,
+    sa.Column('day', sa.Date, primary_key=True),
+    sa.Column('movements', sa.Integer, nullable=False)
+)
+
+INDEX = sa.Index('ix_items_shortfall', items.c.qty - items.c.min_qty, items.c.id)
+
+# Trigger (SQLite) mit dem Stand von Version 7
+_category_add = """
+        INSERT INTO category_stats (category, items, low_stock, qty)
+        VALUES (coalesce(new.category, ''), 1, coalesce(new.qty < new.min_qty, 0), coalesce(new.qty, 0))
+        ON CONFLICT (category) DO UPDATE SET
+            items = items + excluded.items,
+            low_stock = low_stock + excluded.low_stock,
+            qty = qty + excluded.qty;"""
+_category_remove = """
+        UPDATE category_stats SET
+            items = items - 1,
+            low_stock = low_stock - coalesce(old.qty < old.min_qty, 0),
+            qty = qty - coalesce(old.qty, 0)
+        WHERE category = coalesce(old.category, '');"""
+
+TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS category_stats_insert AFTER INSERT ON items BEGIN{_category_add}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS category_stats_delete AFTER DELETE ON items BEGIN{_category_remove}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS category_stats_update AFTER UPDATE OF qty, min_qty, category ON items BEGIN{_category_remove}{_category_add}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS daily_stats_insert AFTER INSERT ON movements BEGIN
+        INSERT INTO daily_stats (day, movements)
+        VALUES (coalesce(date(new.created_at), date('now')), 1)
+        ON CONFLICT (day) DO UPDATE SET movements = movements + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS daily_stats_delete AFTER DELETE ON movements BEGIN
+        UPDATE daily_stats SET movements = movements - 1 WHERE day = date(old.created_at);
+    END"""
+]
+
+
+def upgrade(connection):
+    connection.execute(CreateIndex(INDEX, if_not_exists=True))
+    category_stats.create(bind=connection, checkfirst=True)
+    daily_stats.create(bind=connection, checkfirst=True)
+    if connection.dialect.name != 'sqlite':
+        return  # andere Datenbanken rechnen die Kennzahlen live
+    for statement in TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+    # Kennzahlen aus dem vorhandenen Bestand berechnen
+    category = sa.func.coalesce(items.c.category, '')
+    connection.execute(sa.delete(category_stats))
+    connection.execute(sa.insert(category_stats).from_select(
+        ['category', 'items', 'low_stock', 'qty'],
+        sa.select(
+            category,
+            sa.func.count(items.c.id),
+            sa.func.coalesce(sa.func.sum(sa.case((items.c.qty < items.c.min_qty, 1), else_=0)), 0),
+            sa.func.coalesce(sa.func.sum(items.c.qty), 0)
+        ).group_by(category)
+    ))
+    day = sa.func.date(movements.c.created_at)
+    connection.execute(sa.delete(daily_stats))
+    connection.execute(sa.insert(daily_stats).from_select(
+        ['day', 'movements'],
+        sa.select(day, sa.func.count(movements.c.id)).where(movements.c.created_at.isnot(None)).group_by(day)
+    ))
@@ -0,0 +1,22 @@
+"""Index für die Auswertungen der Bewegungen"""
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex
+
+VERSION = 8
+DESCRIPTION = 'Index ix_movements_analytics'
+
+movements = sa.Table(
+    'movements', sa.MetaData(),
+    sa.Column('item_id', sa.Integer),
+    sa.Column('change', sa.Integer),
+    sa.Column('ausgabe_typ', sa.String(50)),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('recipient_department', sa.String(100))
+)
+
+INDEX = sa.Index('ix_movements_analytics', movements.c.created_at, movements.c.item_id, movements.c.change,
+                 movements.c.ausgabe_typ, movements.c.recipient_department)
+
+
+def upgrade(connection):
+    connection.execute(CreateIndex(INDEX, if_not_exists=True))
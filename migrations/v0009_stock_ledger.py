@@ -0,0 +1,73 @@
+"""Lagerbuch: Schnappschüsse, unveränderliche Bewegungen und Anfangsbestände"""
+from datetime import datetime
+import sqlalchemy as sa
+
+VERSION = 9
+DESCRIPTION = 'Tabelle stock_snapshots und Anfangsbestände'
+
+# Beginn des Lagerbuchs (Zeitpunkt der Anfangsbestände)
+BEGIN = datetime(1970, 1, 1)
+
+metadata = sa.MetaData()
+
+items = sa.Table(
+    'items', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('qty', sa.Integer)
+)
+
+movements = sa.Table(
+    'movements', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('item_id', sa.Integer),
+    sa.Column('change', sa.Integer)
+)
+
+stock_snapshots = sa.Table(
+    'stock_snapshots', metadata,
+    sa.Column('item_id', sa.Integer, sa.ForeignKey('items.id'), primary_key=True),
+    sa.Column('as_of', sa.DateTime, primary_key=True),
+    sa.Column('qty', sa.Integer, nullable=False)
+)
+
+# Bewegungen sind unveränderlich (pro Datenbank; PostgreSQL: SQLSTATE 23001)
+TRIGGERS = {
+    'sqlite': [
+        """CREATE TRIGGER IF NOT EXISTS movements_ledger_update BEFORE UPDATE OF item_id, change, created_at ON movements BEGIN
+            SELECT RAISE(ABORT, 'Bewegungen sind unveränderlich (Lagerbuch)');
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS movements_ledger_delete BEFORE DELETE ON movements BEGIN
+            SELECT RAISE(ABORT, 'Bewegungen sind unveränderlich (Lagerbuch)');
+        END"""
+    ],
+    'postgresql': [
+        """CREATE OR REPLACE FUNCTION movements_ledger_reject() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'Bewegungen sind unveränderlich (Lagerbuch)' USING ERRCODE = 'restrict_violation';
+        END
+        $$ LANGUAGE plpgsql""",
+        'DROP TRIGGER IF EXISTS movements_ledger_update ON movements',
+        """CREATE TRIGGER movements_ledger_update BEFORE UPDATE OF item_id, change, created_at ON movements
+            FOR EACH ROW EXECUTE FUNCTION movements_ledger_reject()""",
+        'DROP TRIGGER IF EXISTS movements_ledger_delete ON movements',
+        """CREATE TRIGGER movements_ledger_delete BEFORE DELETE ON movements
+            FOR EACH ROW EXECUTE FUNCTION movements_ledger_reject()"""
+    ]
+}
+
+
+def upgrade(connection):
+    stock_snapshots.create(bind=connection, checkfirst=True)
+    for statement in TRIGGERS.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
+
+    # Bisheriger Bestand wird Anfangsbestand: Differenz zwischen items.qty
+    # und der Summe der Bewegungen (für Artikel ohne Schnappschuss)
+    booked = (sa.select(sa.func.coalesce(sa.func.sum(movements.c.change), 0))
+              .where(movements.c.item_id == items.c.id).correlate(items).scalar_subquery())
+    has_snapshot = sa.exists().where(stock_snapshots.c.item_id == items.c.id).correlate(items)
+    connection.execute(sa.insert(stock_snapshots).from_select(
+        ['item_id', 'as_of', 'qty'],
+        sa.select(items.c.id, sa.literal(BEGIN, sa.DateTime), items.c.qty - booked)
+        .where(items.c.qty != booked, ~has_snapshot)
+    ))
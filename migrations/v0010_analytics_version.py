@@ -0,0 +1,63 @@
+"""Änderungszähler für den Zwischenspeicher der Auswertungen"""
+import sqlalchemy as sa
+
+VERSION = 10
+DESCRIPTION = 'Tabelle analytics_version und Trigger'
+
+analytics_version = sa.Table(
+    'analytics_version', sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('version', sa.Integer, nullable=False)
+)
+
+# Trigger mit dem Stand von Version 10 (pro Datenbank)
+TRIGGERS = {
+    'sqlite': [
+        """CREATE TRIGGER IF NOT EXISTS analytics_version_item_update AFTER UPDATE OF name, category, subcategory ON items
+            WHEN old.name IS NOT new.name OR old.category IS NOT new.category OR old.subcategory IS NOT new.subcategory BEGIN
+            UPDATE analytics_version SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS analytics_version_movement_insert AFTER INSERT ON movements
+            WHEN new.created_at < date('now') BEGIN
+            UPDATE analytics_version SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS analytics_version_movement_update AFTER UPDATE OF ausgabe_typ, recipient_department ON movements
+            WHEN old.ausgabe_typ IS NOT new.ausgabe_typ OR old.recipient_department IS NOT new.recipient_department BEGIN
+            UPDATE analytics_version SET version = version + 1;
+        END"""
+    ],
+    'postgresql': [
+        # Einmal pro Transaktion (lokale Einstellung), auch bei Massenimporten
+        """CREATE OR REPLACE FUNCTION analytics_version_bump() RETURNS trigger AS $$
+        BEGIN
+            IF current_setting('lager.analytics_bumped', true) IS DISTINCT FROM 'on' THEN
+                UPDATE analytics_version SET version = version + 1;
+                PERFORM set_config('lager.analytics_bumped', 'on', true);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        'DROP TRIGGER IF EXISTS analytics_version_item_update ON items',
+        """CREATE TRIGGER analytics_version_item_update AFTER UPDATE OF name, category, subcategory ON items
+            FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.category IS DISTINCT FROM NEW.category
+                               OR OLD.subcategory IS DISTINCT FROM NEW.subcategory)
+            EXECUTE FUNCTION analytics_version_bump()""",
+        'DROP TRIGGER IF EXISTS analytics_version_movement_insert ON movements',
+        """CREATE TRIGGER analytics_version_movement_insert AFTER INSERT ON movements
+            FOR EACH ROW WHEN (NEW.created_at < date_trunc('day', now() AT TIME ZONE 'UTC'))
+            EXECUTE FUNCTION analytics_version_bump()""",
+        'DROP TRIGGER IF EXISTS analytics_version_movement_update ON movements',
+        """CREATE TRIGGER analytics_version_movement_update AFTER UPDATE OF ausgabe_typ, recipient_department ON movements
+            FOR EACH ROW WHEN (OLD.ausgabe_typ IS DISTINCT FROM NEW.ausgabe_typ
+                               OR OLD.recipient_department IS DISTINCT FROM NEW.recipient_department)
+            EXECUTE FUNCTION analytics_version_bump()"""
+    ]
+}
+
+
+def upgrade(connection):
+    analytics_version.create(bind=connection, checkfirst=True)
+    if connection.execute(sa.select(sa.func.count()).select_from(analytics_version)).scalar() == 0:
+        connection.execute(sa.insert(analytics_version).values(id=1, version=0))
+    for statement in TRIGGERS.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
@@ -1,5 +1,11 @@
 from models.item import Item
 from models.user import User
 from models.movement import Movement
+from models.checkout import Checkout
+from models.job import Job
+from models.signature import Signature
+from models.cart import CartLine
+from models.stats import AnalyticsVersion, CategoryStats, DailyStats
+from models.ledger import StockSnapshot
 
-__all__ = ['Item', 'User', 'Movement']
+__all__ = ['Item', 'User', 'Movement', 'Checkout', 'Job', 'Signature', 'CartLine', 'CategoryStats', 'DailyStats', 'AnalyticsVersion', 'StockSnapshot']
@@ -0,0 +1,42 @@
+from datetime import datetime
+from extensions import db
+
+
+class CartLine(db.Model):
+    """
+    Klasse für Warenkorb-Positionen (serverseitiger Warenkorb).
+    Eine Zeile pro Warenkorb und Artikel; reserved (bei Ausgabe = quantity,
+    bei Rückgabe 0) ist bis expires_at reserviert, danach gilt die Position
+    als verfallen.
+    """
+    __tablename__ = 'cart_lines'
+    __table_args__ = (
+        db.UniqueConstraint('cart_key', 'item_id', name='uq_cart_lines_cart_item'),
+    )
+
+    # Primärschlüssel
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Warenkorb (Schlüssel aus der Session) und Benutzer
+    cart_key = db.Column(db.String(64), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+    # Position
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    reserved = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Zeitstempel
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    # Beziehung zum Artikel
+    item = db.relationship('Item')
+
+    def __repr__(self):
+        """String-Repräsentation der Position"""
+        return f'<CartLine {self.cart_key}: {self.quantity}x Artikel {self.item_id}>'
+
+
+# Summe der aktiven Reservierungen pro Artikel direkt aus dem Index
+db.Index('ix_cart_lines_item_expires', CartLine.item_id, CartLine.expires_at, CartLine.cart_key, CartLine.reserved)
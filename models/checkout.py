@@ -0,0 +1,28 @@
+from datetime import datetime
+from extensions import db
+
+
+class Checkout(db.Model):
+    """
+    Klasse für Buchungsvorgänge.
+    Fasst alle Bewegungen zusammen, die in einem Vorgang (Ausgabe/Rückgabe)
+    gebucht wurden, und verweist auf die gemeinsame Empfangsbestätigung.
+    """
+    __tablename__ = 'checkouts'
+    
+    # Primärschlüssel
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Vorgangsdaten
+    ausgabe_typ = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Empfangsbestätigung für alle Positionen
+    pdf_file = db.Column(db.String(200))
+    
+    # Beziehung zu den Bewegungen
+    movements = db.relationship('Movement', backref='checkout', lazy=True, order_by='Movement.id')
+    
+    def __repr__(self):
+        """String-Repräsentation des Vorgangs"""
+        return f'<Checkout {self.id}: {len(self.movements)} Positionen>'
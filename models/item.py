@@ -1,5 +1,6 @@
 
 from datetime import datetime
+from sqlalchemy import DDL, event
 from extensions import db
 
 class Item(db.Model):
@@ -53,4 +54,41 @@ class Item(db.Model):
         if self.qty + change < 0:
             return False
         self.qty += change
-        return True
\ No newline at end of file
+        return True
+
+
+# Indizes für Artikelliste (Filter + Sortierung) und "zuletzt angelegt"
+db.Index('ix_items_category_sub_name', Item.category, Item.subcategory, Item.name)
+db.Index('ix_items_created_id', Item.created_at, Item.id)
+
+# Niedrige Bestände: größte Unterdeckung zuerst, direkt aus dem Index (Top-N mit LIMIT)
+db.Index('ix_items_shortfall', Item.qty - Item.min_qty, Item.id)
+
+
+# Volltextsuche (SQLite FTS5): items_fts spiegelt die Suchspalten von items,
+# Trigger halten den Index bei jedem INSERT/UPDATE/DELETE aktuell
+ITEM_SEARCH_COLUMNS = ('name', 'sku', 'barcode', 'inventory_number', 'serial_number', 'category', 'subcategory')
+
+_columns = ', '.join(ITEM_SEARCH_COLUMNS)
+_new = ', '.join(f'new.{column}' for column in ITEM_SEARCH_COLUMNS)
+_old = ', '.join(f'old.{column}' for column in ITEM_SEARCH_COLUMNS)
+
+ITEM_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5({_columns},
+        content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, {_columns}) VALUES (new.id, {_new});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+    END""",
+    # Nur bei Änderung der Suchspalten (nicht bei jeder Bestandsbuchung)
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF {_columns} ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+        INSERT INTO items_fts(rowid, {_columns}) VALUES (new.id, {_new});
+    END"""
+]
+
+for _statement in ITEM_SEARCH_DDL:
+    event.listen(Item.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Item.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS items_fts').execute_if(dialect='sqlite'))
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime
+from extensions import db
+
+
+class Job(db.Model):
+    """
+    Klasse für Hintergrund-Aufträge.
+    Warteschlange für PDF-Erstellung und E-Mail-Versand, abgearbeitet vom Worker.
+    """
+    __tablename__ = 'jobs'
+
+    # Status-Werte
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    # Primärschlüssel
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Auftrag
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, default='{}')
+
+    # Status & Wiederholungen
+    status = db.Column(db.String(20), nullable=False, default=PENDING, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_error = db.Column(db.Text)
+    result = db.Column(db.Text)
+
+    # Sperre durch den Worker
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+
+    # Zeitstempel
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    # Verknüpfung zur Bewegung (optional)
+    movement_id = db.Column(db.Integer, db.ForeignKey('movements.id'), nullable=True, index=True)
+    movement = db.relationship('Movement', backref=db.backref('jobs', lazy=True, order_by='Job.id'))
+
+    # Verknüpfung zum Buchungsvorgang (optional)
+    checkout_id = db.Column(db.Integer, db.ForeignKey('checkouts.id'), nullable=True, index=True)
+    checkout = db.relationship('Checkout', backref=db.backref('jobs', lazy=True, order_by='Job.id'))
+
+    def __repr__(self):
+        """String-Repräsentation des Auftrags"""
+        return f'<Job {self.id}: {self.kind} ({self.status})>'
+
+    def get_payload(self):
+        """Gibt die Auftragsdaten als dict zurück"""
+        return json.loads(self.payload or '{}')
+
+    def is_finished(self):
+        """Prüft ob der Auftrag abgeschlossen ist (erfolgreich oder endgültig fehlgeschlagen)"""
+        return self.status in (self.DONE, self.FAILED)
+
+    def to_dict(self):
+        """Gibt den Auftrag als JSON-fähiges dict zurück"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'result': self.result,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,64 @@
+from sqlalchemy import DDL, event
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+
+
+class StockSnapshot(db.Model):
+    """
+    Klasse für Bestands-Schnappschüsse (Lagerbuch).
+    Ein Schnappschuss hält den Bestand eines Artikels vor dem Zeitpunkt
+    as_of fest (alle Bewegungen mit created_at < as_of). Der Bestand zu
+    einem beliebigen Zeitpunkt ist der letzte Schnappschuss davor plus die
+    Bewegungen seitdem.
+    """
+    __tablename__ = 'stock_snapshots'
+
+    # Primärschlüssel (item_id, as_of) ist zugleich der Index für
+    # "letzter Schnappschuss vor einem Zeitpunkt"
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), primary_key=True)
+    as_of = db.Column(db.DateTime, primary_key=True)
+
+    # Bestand laut Lagerbuch
+    qty = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        """String-Repräsentation des Schnappschusses"""
+        return f'<StockSnapshot {self.item_id} {self.as_of}: {self.qty}>'
+
+
+# Trigger: Bewegungen werden nur angehängt. Artikel, Menge und Zeitpunkt
+# einer gebuchten Bewegung lassen sich nicht mehr ändern, Fehler werden mit
+# einer Gegenbuchung korrigiert (PDF und Unterschrift bleiben änderbar).
+# Unter PostgreSQL wirft eine Trigger-Funktion den Fehler (SQLSTATE 23001,
+# wie unter SQLite eine IntegrityError)
+MOVEMENT_LEDGER_DDL = {
+    'sqlite': [
+        """CREATE TRIGGER IF NOT EXISTS movements_ledger_update BEFORE UPDATE OF item_id, change, created_at ON movements BEGIN
+            SELECT RAISE(ABORT, 'Bewegungen sind unveränderlich (Lagerbuch)');
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS movements_ledger_delete BEFORE DELETE ON movements BEGIN
+            SELECT RAISE(ABORT, 'Bewegungen sind unveränderlich (Lagerbuch)');
+        END"""
+    ],
+    'postgresql': [
+        """CREATE OR REPLACE FUNCTION movements_ledger_reject() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'Bewegungen sind unveränderlich (Lagerbuch)' USING ERRCODE = 'restrict_violation';
+        END
+        $$ LANGUAGE plpgsql""",
+        'DROP TRIGGER IF EXISTS movements_ledger_update ON movements',
+        """CREATE TRIGGER movements_ledger_update BEFORE UPDATE OF item_id, change, created_at ON movements
+            FOR EACH ROW EXECUTE FUNCTION movements_ledger_reject()""",
+        'DROP TRIGGER IF EXISTS movements_ledger_delete ON movements',
+        """CREATE TRIGGER movements_ledger_delete BEFORE DELETE ON movements
+            FOR EACH ROW EXECUTE FUNCTION movements_ledger_reject()"""
+    ]
+}
+
+# Trigger erst anlegen, wenn auch die Quelltabelle existiert
+StockSnapshot.__table__.add_is_dependent_on(Movement.__table__)
+StockSnapshot.__table__.add_is_dependent_on(Item.__table__)
+for _dialect, _statements in MOVEMENT_LEDGER_DDL.items():
+    for _statement in _statements:
+        event.listen(StockSnapshot.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
@@ -1,6 +1,7 @@
 
 from datetime import datetime
 from extensions import db
+from models.signature import Signature
 
 
 class Movement(db.Model):
@@ -16,6 +17,9 @@ class Movement(db.Model):
     # Verknüpfung zum Artikel
     item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
     
+    # Verknüpfung zum Buchungsvorgang (mehrere Positionen, ein PDF)
+    checkout_id = db.Column(db.Integer, db.ForeignKey('checkouts.id'), nullable=True, index=True)
+    
     # Bewegungsdaten
     change = db.Column(db.Integer, nullable=False)
     reason = db.Column(db.String(100))
@@ -42,16 +46,38 @@ class Movement(db.Model):
     damage_description = db.Column(db.Text)
     
     # Signatur & PDF
-    signature = db.Column(db.Text)
+    # Unterschrift liegt in der Tabelle signatures (binär, nur bei Bedarf geladen);
+    # die alte Spalte mit der Data-URL wird nur noch für die Migration gelesen
+    signature_id = db.Column(db.Integer, db.ForeignKey('signatures.id'), nullable=True, index=True)
+    signature_legacy = db.deferred(db.Column('signature', db.Text))
     pdf_file = db.Column(db.String(200))
     
     # Beziehung zum Artikel
     item = db.relationship('Item', backref=db.backref('movements', lazy=True))
     
+    # Beziehung zur Unterschrift
+    signature_blob = db.relationship('Signature')
+    
     def __repr__(self):
         """String-Repräsentation der Bewegung"""
         return f'<Movement {self.id}: {self.change}>'
     
+    @property
+    def signature(self):
+        """Gibt die Unterschrift als Data-URL zurück (neu oder noch nicht migriert)"""
+        if self.signature_blob is not None:
+            return self.signature_blob.to_data_url()
+        return self.signature_legacy
+    
+    @signature.setter
+    def signature(self, value):
+        """Setzt die Unterschrift aus einer Data-URL (ohne Deduplizierung)"""
+        if value:
+            mime_type, data = Signature.parse_data_url(value)
+            self.signature_blob = Signature.from_bytes(data, mime_type)
+        else:
+            self.signature_blob = None
+    
     def is_incoming(self):
         """Prüft ob es ein Eingang ist"""
         return self.change > 0
@@ -70,4 +96,36 @@ class Movement(db.Model):
         """Gibt den vollen IT-Mitarbeiter-Namen zurück"""
         if self.issuer_firstname and self.issuer_lastname:
             return f'{self.issuer_firstname} {self.issuer_lastname}'
-        return '—'
\ No newline at end of file
+        return '—'
+    
+    def get_job_status(self):
+        """
+        Gibt den Status der Hintergrund-Aufträge (PDF/E-Mail) zurück.
+        
+        Returns:
+            str: 'failed', 'pending', 'done' oder None wenn keine Aufträge
+        """
+        jobs = list(self.jobs)
+        if self.checkout:
+            jobs += self.checkout.jobs
+        if not jobs:
+            return None
+        statuses = {job.status for job in jobs}
+        if 'failed' in statuses:
+            return 'failed'
+        if statuses - {'done'}:
+            return 'pending'
+        return 'done'
+
+
+# Indizes für die Historie: jeder Filter plus Sortierung (created_at, id),
+# damit jede Seite direkt aus dem Index gelesen wird
+db.Index('ix_movements_created_id', Movement.created_at, Movement.id)
+db.Index('ix_movements_item_created', Movement.item_id, Movement.created_at, Movement.id)
+db.Index('ix_movements_typ_created', Movement.ausgabe_typ, Movement.created_at, Movement.id)
+db.Index('ix_movements_recipient_created', db.func.lower(Movement.recipient_lastname), Movement.created_at, Movement.id)
+db.Index('ix_movements_department_created', db.func.lower(Movement.recipient_department), Movement.created_at, Movement.id)
+
+# Auswertungen: alle Spalten, nach denen gruppiert wird, direkt im Index (ohne Tabellenzugriff)
+db.Index('ix_movements_analytics', Movement.created_at, Movement.item_id, Movement.change,
+         Movement.ausgabe_typ, Movement.recipient_department)
@@ -0,0 +1,50 @@
+import base64
+import hashlib
+from datetime import datetime
+from extensions import db
+
+
+class Signature(db.Model):
+    """
+    Klasse für Unterschriften.
+    Speichert das Bild binär (statt als Data-URL in jeder Bewegung); alle
+    Positionen eines Checkouts teilen sich eine Zeile.
+    """
+    __tablename__ = 'signatures'
+
+    # Primärschlüssel
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Inhalt (SHA-256 für Deduplizierung, Bilddaten nur bei Bedarf laden)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    mime_type = db.Column(db.String(50), nullable=False, default='image/png')
+    size = db.Column(db.Integer, nullable=False, default=0)
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))
+
+    # Zeitstempel
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        """String-Repräsentation der Unterschrift"""
+        return f'<Signature {self.id}: {self.size} Bytes>'
+
+    @classmethod
+    def from_bytes(cls, data, mime_type='image/png'):
+        """Erstellt eine (noch nicht gespeicherte) Unterschrift aus Bilddaten"""
+        return cls(sha256=hashlib.sha256(data).hexdigest(), mime_type=mime_type, size=len(data), data=data)
+
+    @staticmethod
+    def parse_data_url(data_url):
+        """
+        Zerlegt eine Data-URL (data:image/png;base64,...).
+
+        Returns:
+            tuple: (mime_type, bytes)
+        """
+        header, encoded = data_url.split(',', 1)
+        mime_type = header[len('data:'):].split(';')[0] or 'image/png'
+        return mime_type, base64.b64decode(encoded)
+
+    def to_data_url(self):
+        """Gibt die Unterschrift als Data-URL zurück (für PDF und Anzeige)"""
+        return f'data:{self.mime_type};base64,{base64.b64encode(self.data).decode()}'
@@ -0,0 +1,163 @@
+from sqlalchemy import DDL, event
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+
+
+class CategoryStats(db.Model):
+    """
+    Klasse für die Kennzahlen pro Kategorie (materialisiert).
+    Wird von Triggern auf items in derselben Transaktion mitgeführt,
+    das Dashboard liest nur diese wenigen Zeilen.
+    """
+    __tablename__ = 'category_stats'
+
+    # Kategorie ('' für Artikel ohne Kategorie)
+    category = db.Column(db.String(50), primary_key=True)
+
+    # Kennzahlen
+    items = db.Column(db.Integer, nullable=False, default=0)
+    low_stock = db.Column(db.Integer, nullable=False, default=0)
+    qty = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String-Repräsentation der Kennzahlen"""
+        return f'<CategoryStats {self.category}: {self.items} Artikel>'
+
+
+class DailyStats(db.Model):
+    """
+    Klasse für die Bewegungen pro Tag (materialisiert, Tag in UTC).
+    Wird von Triggern auf movements mitgeführt.
+    """
+    __tablename__ = 'daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    movements = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String-Repräsentation der Kennzahlen"""
+        return f'<DailyStats {self.day}: {self.movements} Bewegungen>'
+
+
+class AnalyticsVersion(db.Model):
+    """
+    Klasse für den Änderungszähler der Auswertungen (genau eine Zeile).
+    Trigger erhöhen ihn, wenn sich abgeschlossene Zeiträume ändern: Artikel
+    umbenannt oder umsortiert, Bewegung nachträglich (vor heute, UTC)
+    gebucht oder Typ/Abteilung einer Bewegung geändert. Jeder Prozess
+    vergleicht ihn vor einer Auswertung mit seinem Zwischenspeicher.
+    """
+    __tablename__ = 'analytics_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String-Repräsentation des Zählers"""
+        return f'<AnalyticsVersion {self.version}>'
+
+
+# Trigger (SQLite): jede Änderung an items/movements - auch per Core-UPDATE
+# oder Massenimport - passt die Kennzahlen in derselben Transaktion an
+_category_add = """
+        INSERT INTO category_stats (category, items, low_stock, qty)
+        VALUES (coalesce(new.category, ''), 1, coalesce(new.qty < new.min_qty, 0), coalesce(new.qty, 0))
+        ON CONFLICT (category) DO UPDATE SET
+            items = items + excluded.items,
+            low_stock = low_stock + excluded.low_stock,
+            qty = qty + excluded.qty;"""
+_category_remove = """
+        UPDATE category_stats SET
+            items = items - 1,
+            low_stock = low_stock - coalesce(old.qty < old.min_qty, 0),
+            qty = qty - coalesce(old.qty, 0)
+        WHERE category = coalesce(old.category, '');"""
+
+CATEGORY_STATS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS category_stats_insert AFTER INSERT ON items BEGIN{_category_add}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS category_stats_delete AFTER DELETE ON items BEGIN{_category_remove}
+    END""",
+    # Nur bei Änderung der Spalten, die in die Kennzahlen eingehen
+    f"""CREATE TRIGGER IF NOT EXISTS category_stats_update AFTER UPDATE OF qty, min_qty, category ON items BEGIN{_category_remove}{_category_add}
+    END"""
+]
+
+DAILY_STATS_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS daily_stats_insert AFTER INSERT ON movements BEGIN
+        INSERT INTO daily_stats (day, movements)
+        VALUES (coalesce(date(new.created_at), date('now')), 1)
+        ON CONFLICT (day) DO UPDATE SET movements = movements + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS daily_stats_delete AFTER DELETE ON movements BEGIN
+        UPDATE daily_stats SET movements = movements - 1 WHERE day = date(old.created_at);
+    END"""
+]
+
+# Trigger erst anlegen, wenn auch die Quelltabelle existiert
+CategoryStats.__table__.add_is_dependent_on(Item.__table__)
+DailyStats.__table__.add_is_dependent_on(Movement.__table__)
+for _statement in CATEGORY_STATS_DDL:
+    event.listen(CategoryStats.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in DAILY_STATS_DDL:
+    event.listen(DailyStats.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+# Trigger für analytics_version (SQLite und PostgreSQL); Buchungen von heute
+# ändern nur den laufenden Zeitraum und erhöhen den Zähler nicht
+_item_dimensions_changed = {
+    'sqlite': 'old.name IS NOT new.name OR old.category IS NOT new.category OR old.subcategory IS NOT new.subcategory',
+    'postgresql': 'OLD.name IS DISTINCT FROM NEW.name OR OLD.category IS DISTINCT FROM NEW.category '
+                  'OR OLD.subcategory IS DISTINCT FROM NEW.subcategory'
+}
+_movement_dimensions_changed = {
+    'sqlite': 'old.ausgabe_typ IS NOT new.ausgabe_typ OR old.recipient_department IS NOT new.recipient_department',
+    'postgresql': 'OLD.ausgabe_typ IS DISTINCT FROM NEW.ausgabe_typ '
+                  'OR OLD.recipient_department IS DISTINCT FROM NEW.recipient_department'
+}
+
+ANALYTICS_VERSION_DDL = {
+    'sqlite': [
+        f"""CREATE TRIGGER IF NOT EXISTS analytics_version_item_update AFTER UPDATE OF name, category, subcategory ON items
+            WHEN {_item_dimensions_changed['sqlite']} BEGIN
+            UPDATE analytics_version SET version = version + 1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS analytics_version_movement_insert AFTER INSERT ON movements
+            WHEN new.created_at < date('now') BEGIN
+            UPDATE analytics_version SET version = version + 1;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS analytics_version_movement_update AFTER UPDATE OF ausgabe_typ, recipient_department ON movements
+            WHEN {_movement_dimensions_changed['sqlite']} BEGIN
+            UPDATE analytics_version SET version = version + 1;
+        END"""
+    ],
+    'postgresql': [
+        # Einmal pro Transaktion (lokale Einstellung), auch bei Massenimporten
+        """CREATE OR REPLACE FUNCTION analytics_version_bump() RETURNS trigger AS $$
+        BEGIN
+            IF current_setting('lager.analytics_bumped', true) IS DISTINCT FROM 'on' THEN
+                UPDATE analytics_version SET version = version + 1;
+                PERFORM set_config('lager.analytics_bumped', 'on', true);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        'DROP TRIGGER IF EXISTS analytics_version_item_update ON items',
+        f"""CREATE TRIGGER analytics_version_item_update AFTER UPDATE OF name, category, subcategory ON items
+            FOR EACH ROW WHEN ({_item_dimensions_changed['postgresql']}) EXECUTE FUNCTION analytics_version_bump()""",
+        'DROP TRIGGER IF EXISTS analytics_version_movement_insert ON movements',
+        """CREATE TRIGGER analytics_version_movement_insert AFTER INSERT ON movements
+            FOR EACH ROW WHEN (NEW.created_at < date_trunc('day', now() AT TIME ZONE 'UTC'))
+            EXECUTE FUNCTION analytics_version_bump()""",
+        'DROP TRIGGER IF EXISTS analytics_version_movement_update ON movements',
+        f"""CREATE TRIGGER analytics_version_movement_update AFTER UPDATE OF ausgabe_typ, recipient_department ON movements
+            FOR EACH ROW WHEN ({_movement_dimensions_changed['postgresql']}) EXECUTE FUNCTION analytics_version_bump()"""
+    ]
+}
+
+AnalyticsVersion.__table__.add_is_dependent_on(Item.__table__)
+AnalyticsVersion.__table__.add_is_dependent_on(Movement.__table__)
+event.listen(AnalyticsVersion.__table__, 'after_create', DDL('INSERT INTO analytics_version (id, version) VALUES (1, 0)'))
+for _dialect, _statements in ANALYTICS_VERSION_DDL.items():
+    for _statement in _statements:
+        event.listen(AnalyticsVersion.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
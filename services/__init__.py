@@ -3,5 +3,17 @@ from services.cart_service import CartService
 from services.item_service import ItemService
 from services.pdf_service import PDFService
 from services.email_service import EmailService
+from services.movement_service import MovementService
+from services.job_service import JobService
+from services.receipt_service import ReceiptService
+from services.storage_service import StorageService
+from services.signature_service import SignatureService
+from services.migration_service import MigrationService
+from services.reservation_service import ReservationService
+from services.stats_service import StatsService
+from services.analytics_service import AnalyticsService
+from services.export_service import ExportService
+from services.import_service import ImportService
+from services.ledger_service import LedgerService
 
-__all__ = ['CartService', 'ItemService', 'PDFService', 'EmailService']
\ No newline at end of file
+__all__ = ['CartService', 'ItemService', 'PDFService', 'EmailService', 'MovementService', 'JobService', 'ReceiptService', 'StorageService', 'SignatureService', 'MigrationService', 'ReservationService', 'StatsService', 'AnalyticsService', 'ExportService', 'ImportService', 'LedgerService']
\ No newline at end of file
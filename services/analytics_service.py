@@ -0,0 +1,307 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from sqlalchemy import BigInteger, case, cast, func
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from models.stats import AnalyticsVersion
+from services.movement_service import MovementService
+from services.ledger_service import LedgerService
+
+
+class AnalyticsService:
+    """
+    Service für Auswertungen (GROUP BY in SQL).
+    Bewegungen werden nach Zeitraum (Tag/Woche/Monat, UTC) und beliebigen
+    Dimensionen gruppiert. Abgeschlossene Zeiträume werden pro Zeitraum
+    zwischengespeichert, nur der laufende wird bei jeder Anfrage neu
+    berechnet. Die Bewegungen darin sind unveränderlich (Lagerbuch), ändern
+    können sich aber die Artikel (Name, Kategorie), Typ und Abteilung einer
+    Bewegung oder nachträgliche Buchungen: dann erhöhen Trigger den Zähler
+    analytics_version, und jeder Prozess verwirft vor der nächsten
+    Auswertung seinen Zwischenspeicher (auch nach Massen-UPDATE oder SQL).
+    """
+
+    # Dimensionen, nach denen gruppiert werden kann (aus Artikel bzw. Bewegung)
+    ITEM_DIMENSIONS = {
+        'category': Item.category,
+        'subcategory': Item.subcategory,
+        'item': Item.name
+    }
+    MOVEMENT_DIMENSIONS = {
+        'ausgabe_typ': Movement.ausgabe_typ,
+        'department': Movement.recipient_department
+    }
+    DIMENSIONS = {**ITEM_DIMENSIONS, **MOVEMENT_DIMENSIONS}
+
+    # Zeiträume und wie viele davon ohne date_from ausgewertet werden
+    PERIODS = {'day': 31, 'week': 13, 'month': 12}
+    MAX_BUCKETS = 1100
+
+    # Kennzahlen pro Gruppe
+    METRICS = ('movements', 'issued', 'returned')
+
+    CACHE_SIZE = 20000
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_stats = {'hits': 0, 'misses': 0}
+    _cache_version = None
+
+    # -------- Zeiträume --------
+
+    @staticmethod
+    def bucket_start(day, period):
+        """Erster Tag des Zeitraums, in dem day liegt (Woche beginnt Montag)"""
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        if period == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def next_bucket(start, period):
+        """Erster Tag des folgenden Zeitraums"""
+        if period == 'week':
+            return start + timedelta(days=7)
+        if period == 'month':
+            return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return start + timedelta(days=1)
+
+    @classmethod
+    def buckets(cls, period, date_from, date_to):
+        """Alle Zeiträume von date_from bis date_to (jeweils ganz)"""
+        result = []
+        start = cls.bucket_start(date_from, period)
+        while start <= date_to and len(result) < cls.MAX_BUCKETS:
+            result.append(start)
+            start = cls.next_bucket(start, period)
+        return result
+
+    @staticmethod
+    def _sum(column):
+        """SUM als ganze Zahl (PostgreSQL liefert SUM über BIGINT als NUMERIC, in JSON ein Text)"""
+        return cast(func.coalesce(func.sum(column), 0), BigInteger)
+
+    @staticmethod
+    def bucket_expression(period):
+        """SQL-Ausdruck für den Beginn des Zeitraums als Text 'YYYY-MM-DD'"""
+        if db.engine.dialect.name == 'postgresql':
+            truncated = func.date_trunc(period, Movement.created_at)
+            return func.to_char(truncated, 'YYYY-MM-DD')
+        if period == 'week':
+            return func.date(Movement.created_at, 'weekday 0', '-6 days')
+        if period == 'month':
+            return func.strftime('%Y-%m-01', Movement.created_at)
+        return func.date(Movement.created_at)
+
+    # -------- Parameter --------
+
+    @classmethod
+    def parse_args(cls, args):
+        """
+        Liest Gruppierung, Zeitraum und Filter aus den Request-Parametern.
+
+        Args:
+            args: request.args (group, period, date_from, date_to, category,
+                  subcategory und die Filter der Historie)
+
+        Returns:
+            tuple: (group: tuple, period: str, filters: dict, error: str oder None)
+        """
+        group = tuple(name.strip() for name in args.get('group', 'category').split(',') if name.strip())
+        unknown = [name for name in group if name not in cls.DIMENSIONS]
+        if unknown:
+            return group, None, {}, f"Unbekannte Gruppierung: {', '.join(unknown)}"
+
+        period = args.get('period', 'month')
+        if period not in cls.PERIODS:
+            return group, period, {}, f"Zeitraum muss {', '.join(cls.PERIODS)} sein"
+
+        filters = MovementService.parse_filters(args)
+        for key in ('category', 'subcategory'):
+            value = args.get(key, '').strip()
+            if value:
+                filters[key] = value
+        return group, period, filters, None
+
+    # -------- Auswertung --------
+
+    @classmethod
+    def _query(cls, group, period, filters, start, end):
+        """
+        GROUP BY über alle Zeiträume von start bis (ohne) end.
+        Zuerst wird nur movements gruppiert (über den Index
+        ix_movements_analytics, ohne Tabellenzugriff), erst die Gruppen
+        werden mit items verbunden - nicht jede einzelne Bewegung.
+        """
+        needs_item = any(name in cls.ITEM_DIMENSIONS for name in group) or 'category' in filters or 'subcategory' in filters
+        bucket = cls.bucket_expression(period).label('bucket')
+        keys = [bucket] + ([Movement.item_id.label('item_id')] if needs_item else [])
+        keys += [cls.MOVEMENT_DIMENSIONS[name].label(name) for name in group if name in cls.MOVEMENT_DIMENSIONS]
+
+        inner = (
+            db.session.query(
+                *keys,
+                func.count(Movement.id).label('movements'),
+                func.coalesce(func.sum(case((Movement.change < 0, -Movement.change), else_=0)), 0).label('issued'),
+                func.coalesce(func.sum(case((Movement.change > 0, Movement.change), else_=0)), 0).label('returned')
+            )
+            .filter(
+                Movement.created_at >= datetime.combine(start, datetime.min.time()),
+                Movement.created_at < datetime.combine(end, datetime.min.time())
+            )
+        )
+        other = {key: value for key, value in filters.items() if key not in ('date_from', 'date_to', 'category', 'subcategory')}
+        inner = MovementService.filter_query(inner, other).group_by(*keys)
+        if not needs_item:
+            return inner  # Spalten schon in der Reihenfolge bucket, group, Kennzahlen
+
+        inner = inner.subquery()
+        columns = [cls.ITEM_DIMENSIONS[name] if name in cls.ITEM_DIMENSIONS else inner.c[name] for name in group]
+        query = (
+            db.session.query(
+                inner.c.bucket, *columns,
+                cls._sum(inner.c.movements), cls._sum(inner.c.issued), cls._sum(inner.c.returned)
+            )
+            .join(Item, Item.id == inner.c.item_id)
+        )
+        if 'category' in filters:
+            query = query.filter(Item.category == filters['category'])
+        if 'subcategory' in filters:
+            query = query.filter(Item.subcategory == filters['subcategory'])
+        return query.group_by(inner.c.bucket, *columns)
+
+    @classmethod
+    def movements(cls, group=('category',), period='month', filters=None, today=None):
+        """
+        Bewegungen gruppiert nach Zeitraum und Dimensionen.
+
+        Args:
+            group: Dimensionen (Schlüssel aus DIMENSIONS)
+            period: 'day', 'week' oder 'month'
+            filters: dict (wie MovementService.parse_filters, zusätzlich
+                     category und subcategory); date_from/date_to werden auf
+                     ganze Zeiträume erweitert
+            today: Stichtag (Standard: heute, UTC)
+
+        Returns:
+            list: dicts mit bucket, den Dimensionen, movements, issued und returned
+        """
+        filters = filters or {}
+        today = today or datetime.utcnow().date()
+        group = tuple(group)
+
+        date_to = filters['date_to'].date() if 'date_to' in filters else today
+        if 'date_from' in filters:
+            date_from = filters['date_from'].date()
+        else:
+            date_from = cls.bucket_start(date_to, period)
+            for _ in range(cls.PERIODS[period] - 1):
+                date_from = cls.bucket_start(date_from - timedelta(days=1), period)
+
+        current = cls.bucket_start(today, period)
+        cls._check_version()
+        scope = (period, group, tuple(sorted((k, v) for k, v in filters.items() if k not in ('date_from', 'date_to'))))
+
+        # Abgeschlossene Zeiträume aus dem Zwischenspeicher, der Rest mit einer Abfrage
+        results = {}
+        missing = []
+        for start in cls.buckets(period, date_from, date_to):
+            rows = cls._cache_get((scope, start)) if start < current else None
+            if rows is None:
+                missing.append(start)
+            else:
+                results[start] = rows
+
+        if missing:
+            computed = {start: [] for start in missing}
+            for row in cls._query(group, period, filters, missing[0], cls.next_bucket(missing[-1], period)):
+                start = date.fromisoformat(row[0])
+                if start in computed:
+                    computed[start].append(tuple(row[1:]))
+            for start, rows in computed.items():
+                if start < current:
+                    cls._cache_put((scope, start), rows)
+                results[start] = rows
+
+        names = group + cls.METRICS
+        return [
+            {'bucket': start.isoformat(), **dict(zip(names, row))}
+            for start in sorted(results)
+            for row in sorted(results[start], key=lambda row: tuple('' if v is None else str(v) for v in row[:len(group)]))
+        ]
+
+    # Dimensionen für den Bestand
+    STOCK_DIMENSIONS = ('category', 'subcategory')
+
+    @classmethod
+    def stock(cls, group=('category',), at=None):
+        """
+        Bestand gruppiert nach Kategorie und/oder Unterkategorie.
+
+        Args:
+            group: Dimensionen (STOCK_DIMENSIONS)
+            at: Zeitpunkt für den Stand laut Lagerbuch (None = aktueller Bestand)
+
+        Returns:
+            list: dicts mit den Dimensionen, items, qty und low_stock
+        """
+        columns = [getattr(Item, name).label(name) for name in group]
+        qty = Item.qty if at is None else LedgerService.stock_expression(at)
+        rows = (
+            db.session.query(
+                *columns,
+                func.count(Item.id),
+                cls._sum(qty),
+                cls._sum(case((qty < Item.min_qty, 1), else_=0))
+            )
+            .group_by(*columns)
+            .order_by(*columns)
+            .all()
+        )
+        names = tuple(group) + ('items', 'qty', 'low_stock')
+        return [dict(zip(names, row)) for row in rows]
+
+    # -------- Zwischenspeicher --------
+
+    @classmethod
+    def _check_version(cls):
+        """Verwirft den Zwischenspeicher, wenn sich analytics_version seit der letzten Auswertung geändert hat"""
+        version = db.session.query(AnalyticsVersion.version).scalar()
+        with cls._cache_lock:
+            if version != cls._cache_version:
+                cls._cache.clear()
+                cls._cache_version = version
+
+    @classmethod
+    def _cache_get(cls, key):
+        with cls._cache_lock:
+            rows = cls._cache.get(key)
+            if rows is None:
+                cls._cache_stats['misses'] += 1
+                return None
+            cls._cache.move_to_end(key)
+            cls._cache_stats['hits'] += 1
+            return rows
+
+    @classmethod
+    def _cache_put(cls, key, rows):
+        with cls._cache_lock:
+            cls._cache[key] = rows
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def clear_cache(cls):
+        """Leert den Zwischenspeicher (Änderungen an den Daten erkennt _check_version selbst)"""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @classmethod
+    def get_cache_stats(cls):
+        """Gibt Treffer, Fehlschläge und Größe des Zwischenspeichers zurück"""
+        with cls._cache_lock:
+            return dict(cls._cache_stats, size=len(cls._cache))
+
@@ -1,125 +1,450 @@
-
-from flask import session
+import secrets
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app, session
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.cart import CartLine
 from models.item import Item
+from services.item_service import ItemService
+from services.reservation_service import ReservationService
+
+
+class CartStore(ABC):
+    """
+    Schnittstelle für die Ablage der Warenkörbe.
+    Ein Warenkorb wird über seinen Schlüssel (cart_key) angesprochen und
+    enthält pro Artikel genau eine Position. Jede Änderung verlängert die
+    Reservierung des ganzen Warenkorbs um ttl; verfallene Positionen
+    werden nicht mehr geliefert und geben ihren Bestand wieder frei.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+    def expires_at(self):
+        """Ablaufzeitpunkt für eine jetzt geänderte Position"""
+        return datetime.utcnow() + self.ttl
+
+    @staticmethod
+    def _decide(requests, available, in_cart, check_stock):
+        """
+        Entscheidet pro Anfrage, ob die Menge reserviert werden kann.
+        Mehrere Anfragen zum selben Artikel werden zusammengezählt.
+
+        Args:
+            requests: Liste von (item_id, quantity)
+            available: dict item_id -> Bestand minus Reservierungen anderer Warenkörbe
+            in_cart: dict item_id -> Menge, die schon im eigenen Warenkorb liegt
+            check_stock: Bestand prüfen und reservieren? (False bei Rückgabe)
+
+        Returns:
+            tuple: (Liste von (success, available), dict item_id -> (quantity, reserved))
+        """
+        results = []
+        adds = {}
+        in_cart = dict(in_cart)
+        for item_id, quantity in requests:
+            free = available.get(item_id, 0)
+            current = in_cart.get(item_id, 0)
+            if check_stock and free < current + quantity:
+                results.append((False, free))
+                continue
+            in_cart[item_id] = current + quantity
+            added, reserved = adds.get(item_id, (0, 0))
+            adds[item_id] = (added + quantity, reserved + (quantity if check_stock else 0))
+            results.append((True, free))
+        return results, adds
+
+    @abstractmethod
+    def lines(self, cart_key):
+        """Gibt die Positionen als Liste von dicts (item_id, quantity) zurück"""
+
+    def load(self, cart_key):
+        """
+        Gibt die Positionen mit Artikel zurück (gelöschte Artikel fehlen).
+
+        Returns:
+            list: dicts mit item und quantity
+        """
+        lines = self.lines(cart_key)
+        if not lines:
+            return []
+        items = {item.id: item for item in Item.query.filter(Item.id.in_([line['item_id'] for line in lines])).all()}
+        return [
+            {'item': items[line['item_id']], 'quantity': line['quantity']}
+            for line in lines if line['item_id'] in items
+        ]
+
+    @abstractmethod
+    def reserve(self, cart_key, requests, user_id=None, check_stock=True):
+        """
+        Legt Mengen in den Warenkorb und reserviert sie (Prüfung und
+        Reservierung sind atomar) und verlängert die Reservierung des
+        ganzen Warenkorbs.
+
+        Args:
+            cart_key: Schlüssel des Warenkorbs
+            requests: Liste von (item_id, quantity)
+            user_id: Benutzer (nur zur Information)
+            check_stock: Bestand prüfen und reservieren? (False bei Rückgabe)
+
+        Returns:
+            list: pro Anfrage (success, available)
+        """
+
+    @abstractmethod
+    def remove(self, cart_key, item_id):
+        """Entfernt eine Position"""
+
+    @abstractmethod
+    def clear(self, cart_key):
+        """Entfernt alle Positionen eines Warenkorbs"""
+
+    def count(self, cart_key):
+        """Anzahl der (nicht verfallenen) Positionen"""
+        return len(self.lines(cart_key))
+
+    @abstractmethod
+    def purge_expired(self):
+        """Löscht verfallene Positionen und gibt deren Anzahl zurück"""
+
+
+class DatabaseCartStore(CartStore):
+    """
+    Warenkörbe in der Tabelle cart_lines, die zugleich das Reservierungsbuch
+    ist (siehe ReservationService). Zugriffe pro Position laufen über den
+    eindeutigen Index (cart_key, item_id), der Warenkorb wird mit einer
+    einzigen JOIN-Abfrage samt Artikeln geladen.
+    """
+
+    # INSERT ... ON CONFLICT je Datenbank
+    UPSERT = {
+        'sqlite': sqlite.insert,
+        'postgresql': postgresql.insert
+    }
+
+    def _active(self, cart_key):
+        return CartLine.query.filter(CartLine.cart_key == cart_key, CartLine.expires_at > datetime.utcnow())
+
+    def lines(self, cart_key):
+        rows = (
+            self._active(cart_key)
+            .with_entities(CartLine.item_id, CartLine.quantity)
+            .order_by(CartLine.id)
+            .all()
+        )
+        return [{'item_id': item_id, 'quantity': quantity} for item_id, quantity in rows]
+
+    def load(self, cart_key):
+        rows = (
+            db.session.query(Item, CartLine.quantity)
+            .join(CartLine, CartLine.item_id == Item.id)
+            .filter(CartLine.cart_key == cart_key, CartLine.expires_at > datetime.utcnow())
+            .order_by(CartLine.id)
+            .all()
+        )
+        return [{'item': item, 'quantity': quantity} for item, quantity in rows]
+
+    def _upsert(self, now):
+        """INSERT für neue Positionen; verfallene beginnen neu, aktive werden hochgezählt"""
+        table = CartLine.__table__
+        insert = self.UPSERT[db.engine.dialect.name](table)
+        active = table.c.expires_at > now
+        return insert.on_conflict_do_update(
+            index_elements=[table.c.cart_key, table.c.item_id],
+            set_={
+                'quantity': case((active, table.c.quantity + insert.excluded.quantity), else_=insert.excluded.quantity),
+                'reserved': case((active, table.c.reserved + insert.excluded.reserved), else_=insert.excluded.reserved),
+                'expires_at': insert.excluded.expires_at
+            }
+        )
+
+    def reserve(self, cart_key, requests, user_id=None, check_stock=True):
+        now = datetime.utcnow()
+        expires_at = self.expires_at()
+        table = CartLine.__table__
+        item_ids = sorted({item_id for item_id, _ in requests})
+
+        # Eigene Transaktion: Objekte der Session (z.B. gescannte Artikel) bleiben geladen
+        with db.engine.begin() as connection:
+            # Zuerst schreiben: SQLite serialisiert ab hier alle Schreiber,
+            # PostgreSQL sperrt zusätzlich die Artikelzeilen (in fester Reihenfolge)
+            connection.execute(
+                update(table)
+                .where(table.c.cart_key == cart_key, table.c.expires_at > now)
+                .values(expires_at=expires_at)
+            )
+            connection.execute(select(Item.id).where(Item.id.in_(item_ids)).order_by(Item.id).with_for_update())
+
+            available = dict(connection.execute(
+                select(Item.id, Item.qty - ReservationService.reserved(Item.id, now, exclude_cart_key=cart_key))
+                .where(Item.id.in_(item_ids))
+            ).all())
+            in_cart = dict(connection.execute(
+                select(table.c.item_id, table.c.quantity)
+                .where(table.c.cart_key == cart_key, table.c.expires_at > now)
+            ).all())
+
+            results, adds = self._decide(requests, available, in_cart, check_stock)
+            if adds:
+                connection.execute(self._upsert(now), [
+                    {'cart_key': cart_key, 'user_id': user_id, 'item_id': item_id, 'quantity': quantity,
+                     'reserved': reserved, 'created_at': now, 'expires_at': expires_at}
+                    for item_id, (quantity, reserved) in adds.items()
+                ])
+        return results
+
+    def remove(self, cart_key, item_id):
+        with db.engine.begin() as connection:
+            connection.execute(delete(CartLine).where(CartLine.cart_key == cart_key, CartLine.item_id == item_id))
+
+    def clear(self, cart_key):
+        with db.engine.begin() as connection:
+            connection.execute(delete(CartLine).where(CartLine.cart_key == cart_key))
+
+    def count(self, cart_key):
+        return self._active(cart_key).with_entities(func.count(CartLine.id)).scalar()
+
+    def purge_expired(self):
+        with db.engine.begin() as connection:
+            return connection.execute(delete(CartLine).where(CartLine.expires_at <= datetime.utcnow())).rowcount
+
+
+class MemoryCartStore(CartStore):
+    """
+    Warenkörbe im Arbeitsspeicher des Prozesses (für Tests und Einzelbetrieb).
+    Pro Warenkorb ein OrderedDict item_id -> [Menge, reserviert], die
+    Reihenfolge ist die des ersten Scans. Reservierungen gelten nur
+    zwischen den Warenkörben dieses Prozesses.
+    """
+
+    def __init__(self, ttl):
+        super().__init__(ttl)
+        self._carts = {}  # cart_key -> (OrderedDict, expires_at)
+        self._lock = threading.Lock()
+
+    def _get(self, cart_key):
+        entry = self._carts.get(cart_key)
+        if entry and entry[1] <= datetime.utcnow():
+            del self._carts[cart_key]
+            return None
+        return entry
+
+    def lines(self, cart_key):
+        with self._lock:
+            entry = self._get(cart_key)
+            if not entry:
+                return []
+            return [{'item_id': item_id, 'quantity': line[0]} for item_id, line in entry[0].items()]
+
+    def reserve(self, cart_key, requests, user_id=None, check_stock=True):
+        item_ids = {item_id for item_id, _ in requests}
+        stock = dict(db.session.query(Item.id, Item.qty).filter(Item.id.in_(item_ids)).all())
+        with self._lock:
+            now = datetime.utcnow()
+            available = dict(stock)
+            for key, (lines, expires_at) in self._carts.items():
+                if key == cart_key or expires_at <= now:
+                    continue
+                for item_id in item_ids & lines.keys():
+                    available[item_id] -= lines[item_id][1]
+
+            entry = self._get(cart_key)
+            lines = entry[0] if entry else OrderedDict()
+            results, adds = self._decide(requests, available, {k: v[0] for k, v in lines.items()}, check_stock)
+            for item_id, (quantity, reserved) in adds.items():
+                line = lines.setdefault(item_id, [0, 0])
+                line[0] += quantity
+                line[1] += reserved
+            self._carts[cart_key] = (lines, self.expires_at())
+        return results
+
+    def remove(self, cart_key, item_id):
+        with self._lock:
+            entry = self._get(cart_key)
+            if entry:
+                entry[0].pop(item_id, None)
+
+    def clear(self, cart_key):
+        with self._lock:
+            self._carts.pop(cart_key, None)
+
+    def purge_expired(self):
+        with self._lock:
+            now = datetime.utcnow()
+            expired = [key for key, (_, expires_at) in self._carts.items() if expires_at <= now]
+            removed = 0
+            for key in expired:
+                removed += len(self._carts.pop(key)[0])
+            return removed
 
 
 class CartService:
     """
     Service-Klasse für den Warenkorb.
-    Verwaltet alle Warenkorb-Operationen.
+    Verwaltet alle Warenkorb-Operationen. Die Positionen liegen serverseitig
+    im konfigurierten Backend (app.config['CART_BACKEND']), in der Session
+    steht nur der Schlüssel des Warenkorbs.
     """
-    
+
+    BACKENDS = {
+        'database': DatabaseCartStore,
+        'memory': MemoryCartStore
+    }
+
     def __init__(self):
-        """Initialisiert den Warenkorb aus der Session"""
-        if 'cart' not in session:
-            session['cart'] = []
-    
+        """Holt den Warenkorb-Schlüssel aus der Session (legt ihn bei Bedarf an)"""
+        if 'cart_key' not in session:
+            session['cart_key'] = secrets.token_hex(16)
+        self.cart_key = session['cart_key']
+        self.store = self.get_store()
+
+        # Alten Warenkorb aus dem Session-Cookie übernehmen
+        legacy = session.pop('cart', None)
+        if legacy:
+            self.store.reserve(self.cart_key, [(line['item_id'], line['quantity']) for line in legacy],
+                               user_id=session.get('user_id'), check_stock=False)
+
+    @classmethod
+    def get_store(cls):
+        """
+        Gibt das konfigurierte Backend zurück (benötigt App-Kontext).
+        Das Backend wird pro App einmal erstellt, damit der Speicher-Backend
+        seine Warenkörbe über Requests hinweg behält.
+        """
+        store = current_app.extensions.get('cart_store')
+        if store is None:
+            config = current_app.config
+            ttl = timedelta(minutes=config.get('CART_TTL_MINUTES', 30))
+            store = cls.BACKENDS[config.get('CART_BACKEND', 'database')](ttl)
+            current_app.extensions['cart_store'] = store
+        return store
+
+    @classmethod
+    def purge_expired(cls):
+        """
+        Löscht verfallene Warenkorb-Positionen (benötigt App-Kontext).
+
+        Returns:
+            int: Anzahl gelöschter Positionen
+        """
+        return cls.get_store().purge_expired()
+
     def get_items(self):
         """
-        Gibt alle Artikel im Warenkorb zurück.
-        
+        Gibt alle Artikel im Warenkorb zurück (eine Abfrage für alle Positionen).
+
         Returns:
             list: Liste mit Artikel-Objekten und Mengen
         """
-        cart_items = []
-        for cart_item in session.get('cart', []):
-            item = Item.query.get(cart_item['item_id'])
-            if item:
-                cart_items.append({
-                    'item': item,
-                    'quantity': cart_item['quantity']
-                })
-        return cart_items
-    
+        return self.store.load(self.cart_key)
+
     def add_item(self, barcode, quantity=1, check_stock=True):
         """
         Fügt einen Artikel zum Warenkorb hinzu.
-        
+
         Args:
             barcode: Barcode oder SKU des Artikels
             quantity: Menge (Standard: 1)
             check_stock: Bestand prüfen? (False bei Rückgabe)
-        
+
         Returns:
             tuple: (success: bool, message: str)
         """
         if not barcode:
             return False, 'Barcode ist leer'
-        
-        # Artikel suchen
-        item = Item.query.filter(
-            (Item.barcode == barcode) | (Item.sku == barcode)
-        ).first()
-        
-        if not item:
-            return False, f'Artikel mit Barcode/SKU "{barcode}" nicht gefunden'
-        
-        # Prüfen ob genug Bestand (nur bei Ausgabe, nicht bei Rückgabe)
-        if check_stock and item.qty < quantity:
-            return False, f'Nicht genug Bestand! Verfügbar: {item.qty}'
-        
-        # Zum Warenkorb hinzufügen
-        cart = session.get('cart', [])
-        
-        # Prüfen ob Artikel schon im Warenkorb
-        found = False
-        for cart_item in cart:
-            if cart_item['item_id'] == item.id:
-                cart_item['quantity'] += quantity
-                found = True
-                break
-        
-        if not found:
-            cart.append({
-                'item_id': item.id,
-                'item_name': item.name,
-                'quantity': quantity
-            })
-        
-        session['cart'] = cart
-        session.modified = True
-        
-        return True, f'{quantity}x {item.name} zum Warenkorb hinzugefügt'
-    
+
+        # Einzelner Scan: Code-Zuordnung aus dem Zwischenspeicher
+        item = ItemService.get_by_barcode(barcode)
+        result = self._add_scans([(barcode, quantity)], {barcode: item} if item else {}, check_stock)[0]
+        return result['success'], result['message']
+
+    def add_items(self, scans, check_stock=True):
+        """
+        Fügt mehrere gescannte Codes auf einmal hinzu (z.B. Scanner im Burst-Modus).
+        Alle Codes werden mit einer einzigen Abfrage aufgelöst.
+
+        Args:
+            scans: Liste von (barcode, quantity)
+            check_stock: Bestand prüfen? (False bei Rückgabe)
+
+        Returns:
+            list: pro Scan ein dict mit barcode, quantity, item, success und message
+        """
+        items = ItemService.get_by_barcodes(barcode for barcode, _ in scans if barcode)
+        return self._add_scans(scans, items, check_stock)
+
+    def _add_scans(self, scans, items, check_stock):
+        """Reserviert aufgelöste Scans im Warenkorb (ein Schreibzugriff auf das Backend)"""
+        results = []
+        requests = []
+
+        for barcode, quantity in scans:
+            item = items.get(barcode)
+            result = {'barcode': barcode, 'quantity': quantity, 'item': item, 'success': False, 'message': ''}
+            results.append(result)
+
+            if not barcode:
+                result['message'] = 'Barcode ist leer'
+            elif not item:
+                result['message'] = f'Artikel mit Barcode/SKU "{barcode}" nicht gefunden'
+            else:
+                requests.append((result, item.id, quantity))
+
+        if not requests:
+            return results
+
+        # Bestand prüfen und reservieren (nur bei Ausgabe), atomar im Backend
+        reserved = self.store.reserve(self.cart_key, [(item_id, quantity) for _, item_id, quantity in requests],
+                                      user_id=session.get('user_id'), check_stock=check_stock)
+        for (result, _, quantity), (success, available) in zip(requests, reserved):
+            result['success'] = success
+            if success:
+                result['message'] = f'{quantity}x {result["item"].name} zum Warenkorb hinzugefügt'
+            else:
+                result['message'] = f'Nicht genug Bestand! Verfügbar: {max(available, 0)}'
+        return results
+
     def remove_item(self, item_id):
         """
         Entfernt einen Artikel aus dem Warenkorb.
-        
+
         Args:
             item_id: ID des zu entfernenden Artikels
         """
-        if 'cart' in session:
-            session['cart'] = [c for c in session['cart'] if c['item_id'] != item_id]
-            session.modified = True
-    
+        self.store.remove(self.cart_key, item_id)
+
     def clear(self):
         """Leert den kompletten Warenkorb"""
-        session['cart'] = []
-        session.modified = True
-    
+        self.store.clear(self.cart_key)
+
     def get_count(self):
         """
         Gibt die Anzahl der Artikel im Warenkorb zurück.
-        
+
         Returns:
             int: Anzahl der verschiedenen Artikel
         """
-        return len(session.get('cart', []))
-    
+        return self.store.count(self.cart_key)
+
     def is_empty(self):
         """
         Prüft ob der Warenkorb leer ist.
-        
+
         Returns:
             bool: True wenn leer
         """
-        return len(session.get('cart', [])) == 0
-    
+        return self.get_count() == 0
+
     def get_raw(self):
         """
         Gibt die rohen Warenkorb-Daten zurück.
-        
+
         Returns:
-            list: Rohe Session-Daten
+            list: Positionen als dicts mit item_id und quantity
         """
-        return session.get('cart', [])
\ No newline at end of file
+        return self.store.lines(self.cart_key)
@@ -1,84 +1,388 @@
-
 import smtplib
+import threading
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 import os
+from flask import current_app
+import metrics
+
+
+class SMTPConnectionPool:
+    """
+    Pool mit angemeldeten SMTP-Verbindungen.
+    Verbindungen werden wiederverwendet, per NOOP am Leben gehalten und nach
+    einem Abbruch automatisch neu aufgebaut.
+    """
+
+    def __init__(self, server, port, user='', password='', use_tls=True,
+                 size=2, idle_timeout=120, keepalive_interval=30, timeout=30):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.timeout = timeout
+
+        self._idle = []  # Liste mit (verbindung, zuletzt_benutzt)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._keepalive_thread = None
+        self._closed = False
+
+        # Kennzahlen
+        self.connects = 0
+        self.reconnects = 0
+        self.sent = 0
+        self.failed = 0
+        self.send_seconds = 0.0
+
+    def _connect(self):
+        """Baut eine neue, angemeldete Verbindung auf."""
+        conn = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.password:
+            conn.login(self.user, self.password)
+        with self._lock:
+            self.connects += 1
+        self._start_keepalive()
+        return conn
+
+    @staticmethod
+    def _is_alive(conn):
+        """Prüft eine Verbindung mit NOOP."""
+        try:
+            return conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _close(conn):
+        """Schließt eine Verbindung ohne Fehler zu werfen."""
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def acquire(self):
+        """Gibt eine freie Verbindung zurück (wartet wenn der Pool voll ist)."""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    return self._connect()
+
+                conn, last_used = entry
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.idle_timeout:
+                    self._close(conn)
+                    continue
+                if idle_for > self.keepalive_interval and not self._is_alive(conn):
+                    self._close(conn)
+                    continue
+                return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """Gibt eine Verbindung an den Pool zurück."""
+        try:
+            if conn is None:
+                return
+            if broken or self._closed:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def send_batch(self, messages):
+        """
+        Versendet mehrere Nachrichten über eine Verbindung.
+        Bricht die Verbindung ab, wird einmal neu verbunden und die
+        Nachricht erneut gesendet.
+
+        Returns:
+            list: pro Nachricht ein tuple (success: bool, message: str)
+        """
+        results = []
+        conn = self.acquire()
+        broken = False
+        started = time.monotonic()
+        try:
+            for msg in messages:
+                sending = time.perf_counter()
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    try:
+                        conn.send_message(msg)
+                    except (smtplib.SMTPServerDisconnected, OSError):
+                        # Verbindung abgebrochen -> einmal neu verbinden
+                        self._close(conn)
+                        conn = None
+                        conn = self._connect()
+                        with self._lock:
+                            self.reconnects += 1
+                        conn.send_message(msg)
+                    results.append((True, f"E-Mail gesendet an {msg['To']}"))
+                    with self._lock:
+                        self.sent += 1
+                    metrics.observe('lager_smtp_send_seconds', time.perf_counter() - sending, result='ok')
+                except (smtplib.SMTPServerDisconnected, OSError) as e:
+                    if conn is not None:
+                        self._close(conn)
+                        conn = None
+                    results.append((False, f'E-Mail-Fehler: {str(e)}'))
+                    with self._lock:
+                        self.failed += 1
+                    metrics.observe('lager_smtp_send_seconds', time.perf_counter() - sending, result='error')
+                except smtplib.SMTPException as e:
+                    # Nachricht abgelehnt, Verbindung bleibt nutzbar
+                    results.append((False, f'E-Mail-Fehler: {str(e)}'))
+                    with self._lock:
+                        self.failed += 1
+                    metrics.observe('lager_smtp_send_seconds', time.perf_counter() - sending, result='error')
+        except Exception:
+            broken = True
+            raise
+        finally:
+            with self._lock:
+                self.send_seconds += time.monotonic() - started
+            self.release(conn, broken=broken)
+        return results
+
+    def keepalive(self):
+        """Hält freie Verbindungen per NOOP offen und schließt zu lange unbenutzte."""
+        now = time.monotonic()
+        with self._lock:
+            entries, self._idle = self._idle, []
+
+        keep = []
+        for conn, last_used in entries:
+            if now - last_used > self.idle_timeout or not self._is_alive(conn):
+                self._close(conn)
+            else:
+                keep.append((conn, last_used))
+
+        with self._lock:
+            self._idle = keep + self._idle
+
+    def _start_keepalive(self):
+        """Startet den Keepalive-Thread beim ersten Verbindungsaufbau."""
+        if self._keepalive_thread is not None:
+            return
+
+        def loop():
+            while not self._closed:
+                time.sleep(self.keepalive_interval)
+                self.keepalive()
+
+        self._keepalive_thread = threading.Thread(target=loop, name='smtp-keepalive', daemon=True)
+        self._keepalive_thread.start()
+
+    def close(self):
+        """Schließt alle freien Verbindungen."""
+        self._closed = True
+        with self._lock:
+            entries, self._idle = self._idle, []
+        for conn, _ in entries:
+            self._close(conn)
+
+    def get_stats(self):
+        """Gibt die Durchsatz-Kennzahlen zurück."""
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'reconnects': self.reconnects,
+                'sent': self.sent,
+                'failed': self.failed,
+                'idle_connections': len(self._idle),
+                'pool_size': self.size,
+                'messages_per_second': round(self.sent / self.send_seconds, 2) if self.send_seconds else 0.0
+            }
 
 
 class EmailService:
     """Service für E-Mail-Versand von Empfangsbestätigungen"""
-    
-    # TEST-KONFIGURATION (später anpassen)
-    SMTP_SERVER = 'smtp.gmail.com'
-    SMTP_PORT = 587
-    SMTP_USER = ''  # Deine Test-E-Mail
-    SMTP_PASSWORD = ''  # App-Passwort von Gmail
-    
+
+    # Konfiguration kommt aus app.config (SMTP_SERVER, SMTP_PORT, SMTP_USER,
+    # SMTP_PASSWORD, SMTP_USE_TLS, SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT,
+    # SMTP_KEEPALIVE_INTERVAL, SMTP_BATCH_SIZE)
+    _pool = None
+    _pool_key = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_config(cls, key, default=None):
+        """Liest einen SMTP-Wert aus der App-Konfiguration"""
+        return current_app.config.get(key, default)
+
+    @classmethod
+    def is_configured(cls):
+        """Prüft ob ein Absender konfiguriert ist (sonst Test-Modus)"""
+        return bool(cls.get_config('SMTP_SERVER') and cls.get_config('SMTP_USER'))
+
+    @classmethod
+    def get_pool(cls):
+        """
+        Gibt den Verbindungs-Pool zurück.
+        Ändert sich die Konfiguration, wird ein neuer Pool angelegt.
+        """
+        key = (
+            cls.get_config('SMTP_SERVER'),
+            cls.get_config('SMTP_PORT', 587),
+            cls.get_config('SMTP_USER', ''),
+            cls.get_config('SMTP_PASSWORD', ''),
+            cls.get_config('SMTP_USE_TLS', True),
+            cls.get_config('SMTP_POOL_SIZE', 2),
+            cls.get_config('SMTP_IDLE_TIMEOUT', 120),
+            cls.get_config('SMTP_KEEPALIVE_INTERVAL', 30)
+        )
+        with cls._pool_lock:
+            if cls._pool is None or cls._pool_key != key:
+                if cls._pool is not None:
+                    cls._pool.close()
+                server, port, user, password, use_tls, size, idle_timeout, keepalive = key
+                cls._pool = SMTPConnectionPool(
+                    server, port, user, password, use_tls,
+                    size=size, idle_timeout=idle_timeout, keepalive_interval=keepalive
+                )
+                cls._pool_key = key
+            return cls._pool
+
+    @classmethod
+    def close_pool(cls):
+        """Schließt alle Verbindungen des Pools (z.B. beim Beenden des Workers)"""
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.close()
+            cls._pool = None
+            cls._pool_key = None
+
+    @classmethod
+    def get_stats(cls):
+        """Gibt die Kennzahlen des Pools zurück (messages/s, Verbindungen, ...)"""
+        if cls._pool is None:
+            return {}
+        return cls._pool.get_stats()
+
+    @classmethod
+    def build_receipt_message(cls, recipient_email, recipient_name, pdf_path):
+        """
+        Erstellt die E-Mail mit der Empfangsbestätigung als Anhang.
+
+        Returns:
+            MIMEMultipart: die fertige Nachricht
+        """
+        msg = MIMEMultipart()
+        msg['From'] = cls.get_config('SMTP_USER')
+        msg['To'] = recipient_email
+        msg['Subject'] = 'Ihre Empfangsbestätigung - IT-Lagerverwaltung'
+
+        # E-Mail Text
+        body = f"""
+Guten Tag {recipient_name},
+
+anbei erhalten Sie Ihre Empfangsbestätigung für die erhaltenen IT-Geräte.
+
+Bitte bewahren Sie dieses Dokument für Ihre Unterlagen auf.
+
+Mit freundlichen Grüßen
+IT-Abteilung
+Landratsamt Lörrach
+            """
+        msg.attach(MIMEText(body, 'plain'))
+
+        # PDF anhängen
+        with open(pdf_path, 'rb') as attachment:
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(attachment.read())
+            encoders.encode_base64(part)
+            part.add_header(
+                'Content-Disposition',
+                f'attachment; filename=Empfangsbestaetigung.pdf'
+            )
+            msg.attach(part)
+
+        return msg
+
     @classmethod
     def send_receipt(cls, recipient_email, recipient_name, pdf_path):
         """
         Sendet die Empfangsbestätigung per E-Mail.
-        
+
         Args:
             recipient_email: E-Mail des Empfängers
             recipient_name: Name des Empfängers
             pdf_path: Pfad zur PDF-Datei
-        
+
         Returns:
             tuple: (success: bool, message: str)
         """
         # Prüfen ob Konfiguration vorhanden
-        if not cls.SMTP_USER or not cls.SMTP_PASSWORD:
+        if not cls.is_configured():
             return False, 'E-Mail nicht konfiguriert (Test-Modus)'
-        
+
         if not recipient_email:
             return False, 'Keine Empfänger-E-Mail angegeben'
-        
+
         if not os.path.exists(pdf_path):
             return False, 'PDF-Datei nicht gefunden'
-        
+
         try:
-            # E-Mail erstellen
-            msg = MIMEMultipart()
-            msg['From'] = cls.SMTP_USER
-            msg['To'] = recipient_email
-            msg['Subject'] = 'Ihre Empfangsbestätigung - IT-Lagerverwaltung'
-            
-            # E-Mail Text
-            body = f"""
-Guten Tag {recipient_name},
+            msg = cls.build_receipt_message(recipient_email, recipient_name, pdf_path)
+            return cls.get_pool().send_batch([msg])[0]
+        except Exception as e:
+            return False, f'E-Mail-Fehler: {str(e)}'
 
-anbei erhalten Sie Ihre Empfangsbestätigung für die erhaltenen IT-Geräte.
+    @classmethod
+    def send_receipts(cls, receipts):
+        """
+        Sendet mehrere Empfangsbestätigungen gebündelt.
+        Pro Paket (SMTP_BATCH_SIZE) wird nur eine Verbindung benutzt.
 
-Bitte bewahren Sie dieses Dokument für Ihre Unterlagen auf.
+        Args:
+            receipts: Liste mit dicts (recipient_email, recipient_name, pdf_path)
 
-Mit freundlichen Grüßen
-IT-Abteilung
-Landratsamt Lörrach
-            """
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # PDF anhängen
-            with open(pdf_path, 'rb') as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename=Empfangsbestaetigung.pdf'
-                )
-                msg.attach(part)
-            
-            # E-Mail senden
-            server = smtplib.SMTP(cls.SMTP_SERVER, cls.SMTP_PORT)
-            server.starttls()
-            server.login(cls.SMTP_USER, cls.SMTP_PASSWORD)
-            server.send_message(msg)
-            server.quit()
-            
-            return True, f'E-Mail gesendet an {recipient_email}'
-        
-        except Exception as e:
-            return False, f'E-Mail-Fehler: {str(e)}'
\ No newline at end of file
+        Returns:
+            list: pro Empfangsbestätigung ein tuple (success: bool, message: str)
+        """
+        if not cls.is_configured():
+            return [(False, 'E-Mail nicht konfiguriert (Test-Modus)')] * len(receipts)
+
+        results = [None] * len(receipts)
+        messages = []
+        for index, receipt in enumerate(receipts):
+            if not receipt.get('recipient_email'):
+                results[index] = (False, 'Keine Empfänger-E-Mail angegeben')
+            elif not os.path.exists(receipt['pdf_path']):
+                results[index] = (False, 'PDF-Datei nicht gefunden')
+            else:
+                messages.append((index, cls.build_receipt_message(**receipt)))
+
+        batch_size = max(cls.get_config('SMTP_BATCH_SIZE', 50), 1)
+        pool = cls.get_pool()
+        for start in range(0, len(messages), batch_size):
+            batch = messages[start:start + batch_size]
+            try:
+                sent = pool.send_batch([msg for _, msg in batch])
+            except Exception as e:
+                sent = [(False, f'E-Mail-Fehler: {str(e)}')] * len(batch)
+            for (index, _), result in zip(batch, sent):
+                results[index] = result
+
+        return results
@@ -0,0 +1,272 @@
+import csv
+import io
+import re
+from itertools import islice
+import zipfile
+import zlib
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from services.item_service import ItemService
+from services.movement_service import MovementService
+
+
+class _ZipSink:
+    """
+    Schreibziel für zipfile ohne seek(): sammelt die geschriebenen Bytes,
+    bis der Generator sie abholt (zipfile schreibt dann Data-Deskriptoren).
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ExportService:
+    """
+    Service für den Export von Artikeln und Bewegungen (CSV und XLSX).
+    Zeilen werden blockweise aus der Datenbank gelesen (yield_per) und als
+    Generator ausgegeben, das Ergebnis liegt nie komplett im Speicher.
+    """
+
+    # Zeilen pro Datenbank-Block
+    BATCH_SIZE = 1000
+
+    # Ausgabe sammeln, bis ein Block mindestens so groß ist (Bytes)
+    CHUNK_SIZE = 64 * 1024
+
+    ITEM_COLUMNS = (
+        ('ID', Item.id), ('Name', Item.name), ('SKU', Item.sku), ('Barcode', Item.barcode),
+        ('Inventarnummer', Item.inventory_number), ('Seriennummer', Item.serial_number),
+        ('Kategorie', Item.category), ('Unterkategorie', Item.subcategory),
+        ('Bestand', Item.qty), ('Mindestbestand', Item.min_qty), ('Angelegt', Item.created_at)
+    )
+
+    MOVEMENT_COLUMNS = (
+        ('ID', Movement.id), ('Datum', Movement.created_at), ('Artikel', Item.name), ('SKU', Item.sku),
+        ('Menge', Movement.change), ('Grund', Movement.reason), ('Ausgabe-Typ', Movement.ausgabe_typ),
+        ('Vorname', Movement.recipient_firstname), ('Nachname', Movement.recipient_lastname),
+        ('Abteilung', Movement.recipient_department), ('E-Mail', Movement.recipient_email),
+        ('Ausgegeben von (Vorname)', Movement.issuer_firstname), ('Ausgegeben von (Nachname)', Movement.issuer_lastname),
+        ('Inventarnummer', Movement.inventory_number), ('Seriennummer', Movement.serial_number),
+        ('Vorgang', Movement.checkout_id)
+    )
+
+    # Zeichen, die in XML 1.0 nicht vorkommen dürfen
+    _XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+    # -------- Abfragen --------
+
+    @classmethod
+    def items_query(cls, category_filter=None, search_query=None):
+        """Artikel mit den Filtern und der Sortierung der Artikelliste (nur die Export-Spalten)"""
+        return ItemService.get_all_query(category_filter, search_query).with_entities(
+            *[column for _, column in cls.ITEM_COLUMNS])
+
+    @classmethod
+    def movements_query(cls, filters=None):
+        """Bewegungen mit den Filtern der Historie, neueste zuerst (Index wie in der Historie)"""
+        query = db.session.query(*[column for _, column in cls.MOVEMENT_COLUMNS]).join(Item, Item.id == Movement.item_id)
+        query = MovementService.filter_query(query, filters or {})
+        return query.order_by(Movement.created_at.desc(), Movement.id.desc())
+
+    @classmethod
+    def iter_rows(cls, query):
+        """
+        Liest die Zeilen blockweise (yield_per; PostgreSQL mit serverseitigem Cursor).
+        Datumsspalten werden als Text ohne Mikrosekunden ausgegeben, alle
+        anderen Werte unverändert.
+        """
+        result = db.session.execute(query.statement.execution_options(yield_per=cls.BATCH_SIZE))
+        dates = [index for index, column in enumerate(query.statement.selected_columns)
+                 if isinstance(column.type, (db.DateTime, db.Date))]
+        if not dates:
+            yield from result
+            return
+        for row in result:
+            row = list(row)
+            for index in dates:
+                row[index] = cls._text(row[index])
+            yield row
+
+    # -------- Formate --------
+
+    @staticmethod
+    def _text(value):
+        """Zellwert als Text (Datum ohne Mikrosekunden)"""
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return value.isoformat(' ', 'seconds')
+        if isinstance(value, date):
+            return value.isoformat()
+        return str(value)
+
+    @classmethod
+    def iter_csv(cls, headers, rows):
+        """
+        Erzeugt eine CSV-Datei blockweise (Semikolon wie Excel auf Deutsch, UTF-8 mit BOM).
+
+        Args:
+            headers: Spaltenüberschriften
+            rows: Iterable mit Zeilen (None wird zu leerem Feld)
+
+        Yields:
+            bytes
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        buffer.write('\ufeff')
+        writer.writerow(headers)
+        rows = iter(rows)
+        while True:
+            # Zeilen in kleinen Gruppen schreiben, erst ab CHUNK_SIZE ausgeben
+            batch = list(islice(rows, 200))
+            if not batch:
+                break
+            writer.writerows(batch)
+            if buffer.tell() >= cls.CHUNK_SIZE:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    @classmethod
+    def _xlsx_cell(cls, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f'<c><v>{value}</v></c>'
+        text = escape(cls._XML_INVALID.sub('', cls._text(value)))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    @classmethod
+    def iter_xlsx(cls, headers, rows, sheet_name='Export'):
+        """
+        Erzeugt eine XLSX-Datei blockweise (ein Tabellenblatt, Texte inline).
+        Die Zip-Datei wird fortlaufend geschrieben, ohne zurückzuspringen.
+
+        Args:
+            headers: Spaltenüberschriften
+            rows: Iterable mit Zeilen (Tupel)
+            sheet_name: Name des Tabellenblatts
+
+        Yields:
+            bytes
+        """
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('[Content_Types].xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/worksheets/sheet1.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                '</Types>'
+            ))
+            archive.writestr('_rels/.rels', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Target="xl/workbook.xml" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+                '</Relationships>'
+            ))
+            archive.writestr('xl/workbook.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                f'<sheets><sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets>'
+                '</workbook>'
+            ))
+            archive.writestr('xl/_rels/workbook.xml.rels', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+                '</Relationships>'
+            ))
+            yield sink.drain()
+
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                    '<row>' + ''.join(cls._xlsx_cell(header) for header in headers) + '</row>'
+                ).encode('utf-8'))
+                part = []
+                size = 0
+                for row in rows:
+                    line = '<row>' + ''.join(cls._xlsx_cell(value) for value in row) + '</row>'
+                    part.append(line)
+                    size += len(line)
+                    if size >= cls.CHUNK_SIZE:
+                        sheet.write(''.join(part).encode('utf-8'))
+                        part.clear()
+                        size = 0
+                        yield sink.drain()
+                sheet.write((''.join(part) + '</sheetData></worksheet>').encode('utf-8'))
+        yield sink.drain()
+
+    @staticmethod
+    def gzip(chunks, level=6):
+        """
+        Komprimiert einen Datenstrom fortlaufend (Content-Encoding: gzip).
+
+        Yields:
+            bytes
+        """
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    # -------- Exporte --------
+
+    @classmethod
+    def export(cls, kind, fmt, args):
+        """
+        Erzeugt einen Export als Datenstrom.
+
+        Args:
+            kind: 'items' oder 'movements'
+            fmt: 'csv' oder 'xlsx'
+            args: request.args (Filter wie Artikelliste bzw. Historie)
+
+        Returns:
+            Generator mit bytes
+        """
+        if kind == 'items':
+            columns = cls.ITEM_COLUMNS
+            query = cls.items_query(args.get('category', '').strip(), args.get('q', '').strip())
+            sheet_name = 'Artikel'
+        else:
+            columns = cls.MOVEMENT_COLUMNS
+            query = cls.movements_query(MovementService.parse_filters(args))
+            sheet_name = 'Bewegungen'
+
+        headers = [header for header, _ in columns]
+        rows = cls.iter_rows(query)
+        if fmt == 'xlsx':
+            return cls.iter_xlsx(headers, rows, sheet_name)
+        return cls.iter_csv(headers, rows)
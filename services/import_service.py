@@ -0,0 +1,304 @@
+import csv
+import time
+from datetime import datetime
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from services.item_service import ItemService
+from services.analytics_service import AnalyticsService
+
+
+class ImportService:
+    """
+    Service für den Massenimport von Artikeln (CSV, z.B. Lieferscheine).
+    Die Datei wird zeilenweise gelesen und blockweise geprüft; jeder Block
+    wird mit einem einzigen INSERT ... ON CONFLICT (sku) angelegt bzw.
+    aktualisiert, die Zugänge werden als Bewegungen gebucht. Fehlerhafte
+    Zeilen werden gemeldet und übersprungen, der Rest wird importiert.
+    """
+
+    CHUNK_SIZE = 1000
+
+    # Höchstens so viele Fehler im Ergebnis aufführen (gezählt werden alle)
+    MAX_ERRORS = 1000
+
+    # Spaltenüberschriften (wie im Export, alternativ die Feldnamen)
+    COLUMNS = {
+        'name': 'name', 'sku': 'sku', 'barcode': 'barcode',
+        'inventarnummer': 'inventory_number', 'inventory_number': 'inventory_number',
+        'seriennummer': 'serial_number', 'serial_number': 'serial_number',
+        'kategorie': 'category', 'category': 'category',
+        'unterkategorie': 'subcategory', 'subcategory': 'subcategory',
+        'mindestbestand': 'min_qty', 'min_qty': 'min_qty',
+        # Zugang: wird zum Bestand addiert und als Bewegung gebucht
+        'menge': 'qty', 'zugang': 'qty', 'qty': 'qty'
+    }
+
+    # Felder, die bei bestehenden Artikeln überschrieben werden (wenn die Zelle gefüllt ist)
+    UPDATE_FIELDS = ('name', 'barcode', 'inventory_number', 'serial_number', 'category', 'subcategory', 'min_qty')
+
+    # Höchstlängen der Textfelder
+    LENGTHS = {field: Item.__table__.c[field].type.length
+               for field in ('name', 'sku', 'barcode', 'inventory_number', 'serial_number', 'category', 'subcategory')}
+
+    # Platzhalter für leere Zellen in NOT-NULL-Spalten: NOT NULL wird schon
+    # vor ON CONFLICT geprüft, die Spalte selbst wird dann nicht aktualisiert
+    KEEP = {'name': '', 'min_qty': 0}
+
+    UPSERT = {
+        'sqlite': sqlite.insert,
+        'postgresql': postgresql.insert
+    }
+
+    # -------- Lesen und Prüfen --------
+
+    @classmethod
+    def read_header(cls, header):
+        """
+        Ordnet die Spaltenüberschriften den Feldern zu.
+
+        Returns:
+            tuple: (fields: list mit Feldname oder None je Spalte, error: str oder None)
+        """
+        fields = [cls.COLUMNS.get(name.strip().lower()) for name in header]
+        if 'sku' not in fields:
+            return fields, 'Spalte SKU fehlt.'
+        return fields, None
+
+    @staticmethod
+    def _number(value, label):
+        if not value.isdigit():
+            raise ValueError(f'{label} muss eine ganze Zahl ab 0 sein: {value!r}')
+        return int(value)
+
+    @classmethod
+    def parse_row(cls, fields, values):
+        """
+        Wandelt eine CSV-Zeile in ein dict mit den Artikelfeldern um
+        (leere Zellen werden zu None und ändern bestehende Artikel nicht).
+
+        Raises:
+            ValueError: bei ungültigen Werten (Meldung für den Benutzer)
+        """
+        row = dict.fromkeys(cls.UPDATE_FIELDS)
+        for field, value in zip(fields, values):
+            if field:
+                row[field] = value.strip() or None
+        if not row.get('sku'):
+            raise ValueError('SKU fehlt.')
+        row['qty'] = cls._number(row['qty'], 'Menge') if row.get('qty') else 0
+        if row['min_qty'] is not None:
+            row['min_qty'] = cls._number(row['min_qty'], 'Mindestbestand')
+        for field, length in cls.LENGTHS.items():
+            if row.get(field) and len(row[field]) > length:
+                raise ValueError(f'{field} ist länger als {length} Zeichen.')
+        return row
+
+    @staticmethod
+    def open_csv(stream):
+        """
+        Liest eine CSV-Datei (Text-Stream) zeilenweise; Semikolon oder Komma
+        wird an der Kopfzeile erkannt.
+
+        Returns:
+            csv.reader
+        """
+        first = stream.readline()
+        delimiter = ';' if first.count(';') >= first.count(',') else ','
+        lines = iter([first])
+
+        def chain():
+            yield from lines
+            yield from stream
+
+        return csv.reader(chain(), delimiter=delimiter)
+
+    # -------- Schreiben --------
+
+    @classmethod
+    def _upsert(cls, fields):
+        """
+        INSERT für neue Artikel; bestehende (gleiche SKU) bekommen den Zugang
+        und nur die angegebenen Felder (reine Zugänge lösen so z.B. keine
+        Aktualisierung der Volltextsuche aus).
+        """
+        table = Item.__table__
+        statement = cls.UPSERT[db.engine.dialect.name](table)
+        set_ = {field: statement.excluded[field] for field in fields}
+        set_['qty'] = table.c.qty + statement.excluded.qty
+        return statement.on_conflict_do_update(index_elements=[table.c.sku], set_=set_).returning(table.c.id, table.c.sku)
+
+    @classmethod
+    def _check(cls, connection, rows):
+        """
+        Prüft einen Block gegen die Datenbank: neue Artikel brauchen einen
+        Namen, ein Barcode darf keinem anderen Artikel gehören.
+
+        Args:
+            rows: Liste mit (zeile, dict)
+
+        Returns:
+            tuple: (gültige Zeilen, Fehler als (zeile, meldung), set mit neuen SKUs)
+        """
+        skus = {row['sku'] for _, row in rows}
+        barcodes = {row['barcode'] for _, row in rows if row.get('barcode')}
+        existing = set()
+        barcode_owner = {}
+        for sku, barcode in connection.execute(
+            select(Item.sku, Item.barcode).where(or_(Item.sku.in_(skus), Item.barcode.in_(barcodes)))
+        ):
+            if sku in skus:
+                existing.add(sku)
+            if barcode:
+                barcode_owner[barcode] = sku
+
+        valid = []
+        errors = []
+        new = set()
+        for line, row in rows:
+            sku = row['sku']
+            if sku not in existing and sku not in new and not row.get('name'):
+                errors.append((line, f'Neuer Artikel {sku}: Name fehlt.'))
+                continue
+            barcode = row.get('barcode')
+            if barcode and barcode_owner.get(barcode, sku) != sku:
+                errors.append((line, f'Barcode {barcode} gehört schon zu {barcode_owner[barcode]}.'))
+                continue
+            if barcode:
+                barcode_owner[barcode] = sku
+            if sku not in existing:
+                new.add(sku)
+            valid.append((line, row))
+        return valid, errors, new
+
+    @classmethod
+    def _write(cls, connection, rows, new, reason, now):
+        """
+        Schreibt gültige Zeilen: ein Upsert je SKU (mehrfache Zeilen werden
+        zusammengefasst), eine Bewegung je Zeile mit Zugang.
+
+        Returns:
+            int: Anzahl gebuchter Bewegungen
+        """
+        merged = {}
+        for _, row in rows:
+            current = merged.get(row['sku'])
+            if current is None:
+                merged[row['sku']] = dict(row)
+                continue
+            current.update({field: value for field, value in row.items() if value is not None},
+                           qty=current['qty'] + row['qty'])
+
+        # Standardwerte nur für neue Artikel; Zeilen mit denselben gefüllten
+        # Feldern teilen sich eine Anweisung (executemany mit RETURNING)
+        defaults = {'category': 'Sonstige', 'subcategory': '', 'min_qty': 0}
+        groups = {}
+        for sku, row in merged.items():
+            if sku in new:
+                row.update({field: value for field, value in defaults.items() if row[field] is None})
+            fields = tuple(field for field in cls.UPDATE_FIELDS if row[field] is not None)
+            row.update({field: value for field, value in cls.KEEP.items() if row[field] is None})
+            groups.setdefault(fields, []).append(dict(row, created_at=now))
+
+        ids = {}
+        for fields, values in groups.items():
+            ids.update((sku, item_id) for item_id, sku in connection.execute(cls._upsert(fields), values))
+
+        movements = [
+            {'item_id': ids[row['sku']], 'change': row['qty'], 'reason': reason, 'created_at': now}
+            for _, row in rows if row['qty'] > 0
+        ]
+        if movements:
+            connection.execute(insert(Movement), movements)
+        return len(movements)
+
+    @classmethod
+    def _import_chunk(cls, rows, reason, stats):
+        """Prüft und schreibt einen Block in einer Transaktion; bei Konflikten Zeile für Zeile"""
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as connection:
+                valid, errors, new = cls._check(connection, rows)
+                if valid:
+                    stats['movements'] += cls._write(connection, valid, new, reason, now)
+        except IntegrityError:
+            if len(rows) == 1:
+                cls._error(stats, rows[0][0], 'SKU oder Barcode ist schon vergeben.')
+                return
+            # z.B. gleichzeitig angelegter Artikel: fehlerhafte Zeile einzeln ermitteln
+            for row in rows:
+                cls._import_chunk([row], reason, stats)
+            return
+
+        for line, message in errors:
+            cls._error(stats, line, message)
+        stats['created'] += len(new)
+        stats['updated'] += len({row['sku'] for _, row in valid} - new)
+        stats['imported'] += len(valid)
+
+    @classmethod
+    def _error(cls, stats, line, message):
+        stats['failed'] += 1
+        if len(stats['errors']) < cls.MAX_ERRORS:
+            stats['errors'].append((line, message))
+
+    @classmethod
+    def import_csv(cls, stream, reason='Wareneingang', chunk_size=None, progress=None):
+        """
+        Importiert Artikel und Zugänge aus einer CSV-Datei (benötigt App-Kontext).
+
+        Erwartet eine Kopfzeile mit mindestens SKU; weitere Spalten: Name,
+        Barcode, Inventarnummer, Seriennummer, Kategorie, Unterkategorie,
+        Mindestbestand und Menge (Zugang). Artikel werden über die SKU
+        gefunden; bei bestehenden Artikeln überschreiben nur gefüllte Zellen.
+
+        Args:
+            stream: Text-Stream (z.B. open(..., encoding='utf-8-sig', newline=''))
+            reason: Grund der gebuchten Zugänge
+            chunk_size: Zeilen pro Block (Standard: CHUNK_SIZE)
+            progress: Funktion, die nach jedem Block mit den Zwischenständen aufgerufen wird
+
+        Returns:
+            dict: rows, imported, created, updated, movements, failed,
+                  errors (Liste mit (zeile, meldung)), seconds, per_second
+        """
+        stats = {'rows': 0, 'imported': 0, 'created': 0, 'updated': 0, 'movements': 0, 'failed': 0, 'errors': []}
+        started = time.perf_counter()
+        reader = cls.open_csv(stream)
+
+        fields, error = cls.read_header(next(reader, []))
+        if error:
+            cls._error(stats, 1, error)
+            stats['seconds'] = stats['per_second'] = 0
+            return stats
+
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        rows = []
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            stats['rows'] += 1
+            try:
+                rows.append((reader.line_num, cls.parse_row(fields, values)))
+            except ValueError as error:
+                cls._error(stats, reader.line_num, str(error))
+            if len(rows) >= chunk_size:
+                cls._import_chunk(rows, reason, stats)
+                rows = []
+                if progress:
+                    progress(stats, time.perf_counter() - started)
+        if rows:
+            cls._import_chunk(rows, reason, stats)
+
+        # Core-INSERTs lösen keine ORM-Events aus: Zwischenspeicher selbst leeren
+        # (die Kennzahlen-Tabellen pflegen die Trigger)
+        ItemService.clear_code_cache()
+        AnalyticsService.clear_cache()
+
+        stats['errors'].sort()
+        stats['seconds'] = round(time.perf_counter() - started, 2)
+        stats['per_second'] = round(stats['rows'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+        return stats
@@ -1,6 +1,15 @@
 
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event
 from extensions import db
 from models.item import Item
+from models.ledger import StockSnapshot
+from models.movement import Movement
+from services.ledger_service import LedgerService
 from sqlalchemy.exc import IntegrityError
 
 
@@ -10,12 +19,105 @@ class ItemService:
     Enthält alle Business-Logik für Artikel.
     """
     
+    # Gewichte für die Trefferliste (Reihenfolge wie ITEM_SEARCH_COLUMNS:
+    # name, sku, barcode, inventory_number, serial_number, category, subcategory)
+    SEARCH_WEIGHTS = (10.0, 8.0, 8.0, 4.0, 4.0, 1.0, 2.0)
+    SEARCH_LIMIT = 10
+    
+    # Zwischenspeicher Barcode/SKU -> Artikel-ID für den Scanner (LRU)
+    CODE_CACHE_SIZE = 4096
+    _code_cache = OrderedDict()
+    _code_lock = threading.Lock()
+    _code_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    # Volltextsuche vorhanden? Einmal pro Engine geprüft (Engine -> bool),
+    # geleert beim Anlegen/Löschen der Tabellen und nach Migrationen
+    _search_index = weakref.WeakKeyDictionary()
+    
+    @classmethod
+    def has_search_index(cls):
+        """Prüft ob die Volltextsuche (items_fts) vorhanden ist."""
+        engine = db.engine
+        found = cls._search_index.get(engine)
+        if found is None:
+            found = engine.dialect.name == 'sqlite' and db.session.execute(
+                db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+            ).first() is not None
+            cls._search_index[engine] = found
+        return found
+    
+    @classmethod
+    def clear_search_index_cache(cls):
+        """Verwirft das gespeicherte Ergebnis von has_search_index (z.B. nach einer Migration)."""
+        cls._search_index.clear()
+    
     @staticmethod
-    def get_all(category_filter=None, search_query=None):
+    def build_match(search_query):
+        """
+        Wandelt eine Eingabe in eine FTS5-Abfrage mit Präfixsuche um.
+        Beispiel: 'MON-00' -> '"mon"* "00"*' (alle Wörter müssen vorkommen).
+        
+        Returns:
+            str oder '' wenn die Eingabe keine Wörter enthält
+        """
+        return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', search_query.lower()))
+    
+    @classmethod
+    def search(cls, search_query, limit=None):
+        """
+        Sucht Artikel für die Schnellsuche (Type-Ahead), beste Treffer zuerst.
+        
+        Über die Volltextsuche werden Name, SKU, Barcode, Inventar- und
+        Seriennummer sowie Kategorie und Unterkategorie durchsucht, jeweils
+        mit Wortanfang. Ohne Suchindex wird wie bisher mit ILIKE gesucht.
+        
+        Args:
+            search_query: Eingabe des Benutzers
+            limit: maximale Anzahl Treffer (Standard: SEARCH_LIMIT)
+        
+        Returns:
+            list: Artikel
+        """
+        limit = limit or cls.SEARCH_LIMIT
+        if not cls.has_search_index():
+            return cls.get_all_query(search_query=search_query).limit(limit).all()
+        
+        match = cls.build_match(search_query)
+        if not match:
+            return []
+        
+        weights = ', '.join(str(weight) for weight in cls.SEARCH_WEIGHTS)
+        statement = db.text(f"""
+            SELECT items.* FROM items
+            JOIN (
+                SELECT rowid, bm25(items_fts, {weights}) AS score
+                FROM items_fts WHERE items_fts MATCH :match
+                ORDER BY score LIMIT :limit
+            ) AS hits ON hits.rowid = items.id
+            ORDER BY hits.score, items.name
+        """).bindparams(match=match, limit=limit)
+        return db.session.execute(db.select(Item).from_statement(statement)).scalars().all()
+    
+    @classmethod
+    def get_all(cls, category_filter=None, search_query=None):
         """Gibt alle Artikel zurück, optional gefiltert."""
+        return cls.get_all_query(category_filter, search_query).all()
+    
+    @classmethod
+    def get_all_query(cls, category_filter=None, search_query=None):
+        """Baut die Abfrage für get_all (sortiert über Index Kategorie/Unterkategorie/Name)."""
         query = Item.query
         
-        if search_query:
+        if search_query and cls.has_search_index():
+            # Volltextsuche statt ILIKE-Scan über die ganze Tabelle
+            match = cls.build_match(search_query)
+            if not match:
+                # Eingabe ohne Wörter (z.B. "-" oder "***") findet nichts, wie in search()
+                return query.filter(db.false())
+            matching_ids = db.select(db.literal_column('rowid')).select_from(db.text('items_fts')).where(
+                db.text('items_fts MATCH :match').bindparams(match=match))
+            query = query.filter(Item.id.in_(matching_ids))
+        elif search_query:
             query = query.filter(
                 (Item.name.ilike(f'%{search_query}%')) |
                 (Item.sku.ilike(f'%{search_query}%')) |
@@ -25,19 +127,116 @@ class ItemService:
         if category_filter:
             query = query.filter(Item.category == category_filter)
         
-        return query.order_by(Item.category.asc(), Item.subcategory.asc(), Item.name.asc()).all()
+        return query.order_by(Item.category.asc(), Item.subcategory.asc(), Item.name.asc())
+    
+    @staticmethod
+    def recently_added_query(limit=5):
+        """Baut die Abfrage für die zuletzt angelegten Artikel."""
+        return Item.query.order_by(Item.created_at.desc(), Item.id.desc()).limit(limit)
     
     @staticmethod
     def get_by_id(item_id):
         """Findet einen Artikel anhand seiner ID."""
         return Item.query.get(item_id)
     
-    @staticmethod
-    def get_by_barcode(barcode):
-        """Findet einen Artikel anhand Barcode oder SKU."""
-        return Item.query.filter(
+    @classmethod
+    def get_by_barcode(cls, barcode):
+        """
+        Findet einen Artikel anhand Barcode oder SKU.
+        
+        Die Zuordnung Code -> Artikel-ID wird zwischengespeichert, bei einem
+        Treffer wird der Artikel nur noch über den Primärschlüssel geladen
+        (für die Bestandsprüfung). Passt der Code nicht mehr zum Artikel
+        (z.B. in einem anderen Prozess geändert), wird neu gesucht.
+        
+        Returns:
+            Item oder None
+        """
+        with cls._code_lock:
+            item_id = cls._code_cache.get(barcode)
+            if item_id is not None:
+                cls._code_cache.move_to_end(barcode)
+        
+        if item_id is not None:
+            item = db.session.get(Item, item_id)
+            if item and barcode in (item.barcode, item.sku):
+                with cls._code_lock:
+                    cls._code_stats['hits'] += 1
+                return item
+        
+        item = Item.query.filter(
             (Item.barcode == barcode) | (Item.sku == barcode)
         ).first()
+        
+        with cls._code_lock:
+            cls._code_stats['misses'] += 1
+            if item:
+                cls._code_cache[barcode] = item.id
+                cls._code_cache.move_to_end(barcode)
+                while len(cls._code_cache) > cls.CODE_CACHE_SIZE:
+                    cls._code_cache.popitem(last=False)
+            else:
+                cls._code_cache.pop(barcode, None)
+        return item
+    
+    @classmethod
+    def get_by_barcodes(cls, barcodes):
+        """
+        Findet mehrere Artikel anhand Barcode oder SKU mit einer einzigen Abfrage.
+        Die gefundenen Zuordnungen kommen in den Zwischenspeicher.
+        
+        Returns:
+            dict: Code -> Item (nicht gefundene Codes fehlen)
+        """
+        codes = set(barcodes)
+        if not codes:
+            return {}
+        items = Item.query.filter(Item.barcode.in_(codes) | Item.sku.in_(codes)).all()
+        
+        found = {}
+        for item in items:
+            for code in (item.barcode, item.sku):
+                if code in codes:
+                    found[code] = item
+        
+        with cls._code_lock:
+            for code, item in found.items():
+                cls._code_cache[code] = item.id
+                cls._code_cache.move_to_end(code)
+            while len(cls._code_cache) > cls.CODE_CACHE_SIZE:
+                cls._code_cache.popitem(last=False)
+        return found
+    
+    @classmethod
+    def invalidate_codes(cls, item):
+        """Entfernt alle zwischengespeicherten Codes eines Artikels (und seine neuen Codes)."""
+        with cls._code_lock:
+            stale = [code for code, item_id in cls._code_cache.items()
+                     if item_id == item.id or code in (item.barcode, item.sku)]
+            for code in stale:
+                del cls._code_cache[code]
+            cls._code_stats['invalidations'] += 1
+    
+    @classmethod
+    def clear_code_cache(cls):
+        """Leert den Zwischenspeicher (z.B. nach Massenänderungen per SQL)."""
+        with cls._code_lock:
+            cls._code_cache.clear()
+    
+    @classmethod
+    def get_code_cache_stats(cls):
+        """
+        Gibt die Zähler des Code-Zwischenspeichers zurück.
+        
+        Returns:
+            dict: hits, misses, invalidations, size, hit_rate
+        """
+        with cls._code_lock:
+            stats = dict(cls._code_stats)
+            stats['size'] = len(cls._code_cache)
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / total, 3) if total else 0.0
+        return stats
     
     @staticmethod
     def create(name, sku, barcode=None, qty=0, min_qty=0, category='Sonstige', subcategory='', inventory_number=None, serial_number=None):
@@ -46,6 +245,7 @@ class ItemService:
             return False, 'Name und Artikelnummer (SKU) sind Pflicht.'
         
         try:
+            now = datetime.utcnow()
             item = Item(
                 name=name,
                 sku=sku,
@@ -55,9 +255,12 @@ class ItemService:
                 category=category,
                 subcategory=subcategory,
                 inventory_number=inventory_number or None,
-                serial_number=serial_number or None
+                serial_number=serial_number or None,
+                created_at=now
             )
             db.session.add(item)
+            # Anfangsbestand ins Lagerbuch
+            LedgerService.open_item(item, qty, now)
             db.session.commit()
             return True, 'Artikel angelegt.'
         except IntegrityError:
@@ -65,8 +268,12 @@ class ItemService:
             return False, 'SKU oder Barcode ist schon vergeben.'
     
     @staticmethod
-    def update(item_id, name, sku, barcode=None, qty=0, min_qty=0, category='Sonstige', subcategory='', inventory_number=None, serial_number=None):
-        """Aktualisiert einen bestehenden Artikel."""
+    def update(item_id, name, sku, barcode=None, qty=0, min_qty=0, category='Sonstige', subcategory='', inventory_number=None, serial_number=None, qty_original=None):
+        """
+        Aktualisiert einen bestehenden Artikel. Ein geänderter Bestand wird als
+        Korrektur gebucht, bezogen auf qty_original (Bestand beim Öffnen des
+        Formulars) – unverändert gelassen bucht er nichts.
+        """
         item = Item.query.get(item_id)
         if not item:
             return False, 'Artikel nicht gefunden.'
@@ -78,7 +285,7 @@ class ItemService:
             item.name = name
             item.sku = sku
             item.barcode = barcode or None
-            item.qty = qty
+            LedgerService.correct(item, qty, original=qty_original)
             item.min_qty = min_qty
             item.category = category
             item.subcategory = subcategory
@@ -97,7 +304,12 @@ class ItemService:
         if not item:
             return False, 'Artikel nicht gefunden.'
         
+        # Bewegungen werden nur angehängt: Artikel mit Historie bleiben erhalten
+        if db.session.query(Movement.id).filter(Movement.item_id == item.id).first():
+            return False, 'Artikel mit Bewegungen können nicht gelöscht werden.'
+        
         try:
+            StockSnapshot.query.filter_by(item_id=item.id).delete()
             db.session.delete(item)
             db.session.commit()
             return True, 'Artikel gelöscht.'
@@ -106,9 +318,19 @@ class ItemService:
             return False, 'Fehler beim Löschen.'
     
     @staticmethod
-    def get_low_stock():
-        """Gibt alle Artikel mit niedrigem Bestand zurück."""
-        return Item.query.filter(Item.qty < Item.min_qty).all()
+    def low_stock_query(limit=None):
+        """
+        Baut die Abfrage für Artikel unter Mindestbestand, größte Unterdeckung
+        zuerst (Index ix_items_shortfall, mit limit nur die ersten n Zeilen).
+        """
+        shortfall = Item.qty - Item.min_qty
+        query = Item.query.filter(shortfall < 0).order_by(shortfall, Item.id)
+        return query.limit(limit) if limit else query
+    
+    @classmethod
+    def get_low_stock(cls, limit=None):
+        """Gibt die Artikel mit niedrigem Bestand zurück (optional nur die ersten n)."""
+        return cls.low_stock_query(limit).all()
     
     @staticmethod
     def count_all():
@@ -120,4 +342,27 @@ class ItemService:
     def count_low_stock():
         """Gibt die Anzahl der Artikel unter Mindestbestand zurück"""
         from sqlalchemy import func
-        return db.session.query(func.count(Item.id)).filter(Item.qty < Item.min_qty).scalar()
\ No newline at end of file
+        return db.session.query(func.count(Item.id)).filter(Item.qty - Item.min_qty < 0).scalar()
+
+
+# Suchindex neu prüfen, wenn die Tabellen angelegt oder gelöscht werden
+@event.listens_for(Item.__table__, 'after_create')
+@event.listens_for(Item.__table__, 'after_drop')
+def _reset_search_index(target, connection, **kw):
+    ItemService.clear_search_index_cache()
+
+
+# Zwischenspeicher bei Änderungen an Artikeln über das ORM leeren
+# (ItemService.create/update/delete, aber auch alle anderen Stellen)
+@event.listens_for(Item, 'after_insert')
+@event.listens_for(Item, 'after_delete')
+def _invalidate_item_codes(mapper, connection, target):
+    ItemService.invalidate_codes(target)
+
+
+@event.listens_for(Item, 'after_update')
+def _invalidate_changed_codes(mapper, connection, target):
+    # Bestandsänderungen betreffen die Zuordnung nicht
+    state = db.inspect(target)
+    if state.attrs.barcode.history.has_changes() or state.attrs.sku.history.has_changes():
+        ItemService.invalidate_codes(target)
@@ -0,0 +1,405 @@
+import json
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, or_, and_
+from extensions import db
+from models.job import Job
+from models.movement import Movement
+from models.checkout import Checkout
+from services.pdf_service import PDFService
+from services.email_service import EmailService
+from services.storage_service import StorageService
+
+
+class JobService:
+    """
+    Service für die Hintergrund-Warteschlange.
+    Nimmt PDF- und E-Mail-Aufträge entgegen und arbeitet sie im Worker ab,
+    damit die Anfrage am Ausgabe-Platz nicht auf SMTP oder reportlab wartet.
+    """
+
+    # Wiederholungen mit exponentiellem Backoff (Sekunden)
+    BACKOFF_BASE = 5
+    BACKOFF_MAX = 600
+
+    # Nach dieser Zeit gilt ein 'running'-Auftrag als verwaist (Worker abgestürzt)
+    LOCK_TIMEOUT = 300
+
+    # Wartezeit des Workers wenn die Warteschlange leer ist
+    POLL_INTERVAL = 1.0
+
+    HANDLERS = {}
+
+    # Auftragsarten, die der Worker gebündelt abarbeitet: kind -> (Funktion, Config-Schlüssel der Paketgröße)
+    BATCH_HANDLERS = {}
+
+    @classmethod
+    def handler(cls, kind):
+        """Registriert eine Funktion als Handler für eine Auftragsart."""
+        def decorator(func):
+            cls.HANDLERS[kind] = func
+            return func
+        return decorator
+
+    @classmethod
+    def batch_handler(cls, kind, size):
+        """
+        Registriert eine Funktion, die mehrere Aufträge einer Art auf einmal
+        ausführt (z.B. E-Mails über eine SMTP-Verbindung). Sie bekommt die
+        Liste der Aufträge und liefert pro Auftrag (success, message).
+
+        Args:
+            kind: Auftragsart (braucht zusätzlich einen normalen Handler)
+            size: Config-Schlüssel mit der Paketgröße (z.B. 'SMTP_BATCH_SIZE')
+        """
+        def decorator(func):
+            cls.BATCH_HANDLERS[kind] = (func, size)
+            return func
+        return decorator
+
+    @classmethod
+    def enqueue(cls, kind, payload=None, movement_id=None, checkout_id=None, commit=True):
+        """
+        Legt einen neuen Auftrag in der Warteschlange an.
+
+        Args:
+            kind: Auftragsart (z.B. 'receipt', 'mail')
+            payload: dict mit Auftragsdaten
+            movement_id: zugehörige Bewegung (optional)
+            checkout_id: zugehöriger Checkout (optional)
+            commit: Transaktion direkt abschließen?
+
+        Returns:
+            Job: der angelegte Auftrag
+        """
+        if kind not in cls.HANDLERS:
+            raise ValueError(f'Unbekannte Auftragsart: {kind}')
+
+        job = Job(
+            kind=kind,
+            payload=json.dumps(payload or {}),
+            movement_id=movement_id,
+            checkout_id=checkout_id,
+            status=Job.PENDING,
+            run_at=datetime.utcnow()
+        )
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        return job
+
+    @classmethod
+    def get_backoff(cls, attempts):
+        """Gibt die Wartezeit in Sekunden vor dem nächsten Versuch zurück."""
+        return min(cls.BACKOFF_BASE * 2 ** max(attempts - 1, 0), cls.BACKOFF_MAX)
+
+    @classmethod
+    def _claimable(cls, now):
+        """Bedingung für fällige Aufträge (auch verwaiste 'running'-Aufträge)"""
+        stale = now - timedelta(seconds=cls.LOCK_TIMEOUT)
+        return or_(
+            and_(Job.status == Job.PENDING, Job.run_at <= now),
+            and_(Job.status == Job.RUNNING, Job.locked_at < stale)
+        )
+
+    @classmethod
+    def claim(cls, worker_name):
+        """
+        Reserviert den nächsten fälligen Auftrag für diesen Worker.
+
+        Unter PostgreSQL sperrt SELECT ... FOR UPDATE SKIP LOCKED die Zeile,
+        Worker an anderen Standorten überspringen sie ohne zu warten. Sonst
+        (SQLite sperrt ohnehin die ganze Datenbank) ist die Reservierung ein
+        bedingtes UPDATE; wenn ein anderer Worker schneller war, wird der
+        nächste Kandidat versucht.
+
+        Returns:
+            Job oder None wenn nichts fällig ist
+        """
+        now = datetime.utcnow()
+        claimable = cls._claimable(now)
+
+        if db.engine.dialect.name == 'postgresql':
+            job = (db.session.query(Job).filter(claimable).order_by(Job.run_at, Job.id)
+                   .limit(1).with_for_update(skip_locked=True).first())
+            if job is None:
+                db.session.rollback()
+                return None
+            job.status = Job.RUNNING
+            job.locked_by = worker_name
+            job.locked_at = now
+            db.session.commit()
+            return job
+
+        candidates = db.session.query(Job.id).filter(claimable).order_by(Job.run_at, Job.id).limit(5).all()
+        for (job_id,) in candidates:
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, claimable)
+                .values(status=Job.RUNNING, locked_by=worker_name, locked_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if claimed.rowcount == 1:
+                return db.session.get(Job, job_id)
+        return None
+
+    @classmethod
+    def claim_batch(cls, worker_name, kind, limit):
+        """
+        Reserviert bis zu limit weitere fällige Aufträge einer Art (für
+        gebündelte Auftragsarten, siehe batch_handler).
+
+        Returns:
+            list: die reservierten Aufträge (evtl. leer)
+        """
+        if limit < 1:
+            return []
+        now = datetime.utcnow()
+        claimable = and_(Job.kind == kind, cls._claimable(now))
+
+        if db.engine.dialect.name == 'postgresql':
+            jobs = (db.session.query(Job).filter(claimable).order_by(Job.run_at, Job.id)
+                    .limit(limit).with_for_update(skip_locked=True).all())
+            for job in jobs:
+                job.status = Job.RUNNING
+                job.locked_by = worker_name
+                job.locked_at = now
+            db.session.commit()
+            return jobs
+
+        # Ein bedingtes UPDATE für alle Kandidaten; was ein anderer Worker
+        # schneller reserviert hat, trägt dessen Namen bzw. Zeitpunkt
+        job_ids = [job_id for (job_id,) in db.session.query(Job.id).filter(claimable)
+                   .order_by(Job.run_at, Job.id).limit(limit).all()]
+        if not job_ids:
+            return []
+        db.session.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), claimable)
+            .values(status=Job.RUNNING, locked_by=worker_name, locked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return (db.session.query(Job)
+                .filter(Job.id.in_(job_ids), Job.locked_by == worker_name, Job.locked_at == now)
+                .order_by(Job.run_at, Job.id).all())
+
+    @classmethod
+    def _reschedule(cls, job, error):
+        """Plant einen fehlgeschlagenen Auftrag mit Backoff neu ein oder markiert ihn als 'failed'."""
+        job.last_error = error
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = Job.PENDING
+            job.run_at = datetime.utcnow() + timedelta(seconds=cls.get_backoff(job.attempts))
+
+    @classmethod
+    def run(cls, job):
+        """
+        Führt einen reservierten Auftrag aus.
+        Bei einem Fehler wird er mit Backoff erneut eingeplant oder als
+        'failed' markiert, wenn keine Versuche mehr übrig sind.
+
+        Returns:
+            bool: True wenn erfolgreich
+        """
+        job.attempts += 1
+        try:
+            result = cls.HANDLERS[job.kind](job)
+            job.status = Job.DONE
+            job.result = result
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            success = True
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(Job, job.id)
+            job.attempts += 1
+            cls._reschedule(job, str(e))
+            success = False
+
+        job.locked_by = None
+        job.locked_at = None
+        db.session.commit()
+        return success
+
+    @classmethod
+    def run_batch(cls, jobs):
+        """
+        Führt mehrere reservierte Aufträge einer gebündelten Art gemeinsam
+        aus. Jeder Auftrag wird nach seinem eigenen Ergebnis abgeschlossen
+        oder mit Backoff erneut eingeplant.
+
+        Returns:
+            int: Anzahl erfolgreicher Aufträge
+        """
+        func, _ = cls.BATCH_HANDLERS[jobs[0].kind]
+        job_ids = [job.id for job in jobs]
+        try:
+            results = func(jobs)
+        except Exception as e:
+            results = [(False, str(e))] * len(jobs)
+        db.session.rollback()
+
+        succeeded = 0
+        for job_id, (success, message) in zip(job_ids, results):
+            job = db.session.get(Job, job_id)
+            job.attempts += 1
+            if success:
+                job.status = Job.DONE
+                job.result = message
+                job.last_error = None
+                job.finished_at = datetime.utcnow()
+                succeeded += 1
+            else:
+                cls._reschedule(job, message)
+            job.locked_by = None
+            job.locked_at = None
+        db.session.commit()
+        return succeeded
+
+    @classmethod
+    def work(cls, worker_name=None, burst=False, stop_event=None):
+        """
+        Arbeitsschleife eines Workers (benötigt App-Kontext).
+
+        Args:
+            worker_name: Name für die Sperre (Standard: Host + Thread)
+            burst: True = beenden sobald nichts mehr fällig ist
+            stop_event: threading.Event zum sauberen Beenden
+
+        Returns:
+            int: Anzahl abgearbeiteter Aufträge
+        """
+        worker_name = worker_name or f'{socket.gethostname()}:{threading.current_thread().name}'
+        processed = 0
+        while not (stop_event and stop_event.is_set()):
+            job = cls.claim(worker_name)
+            if job is None:
+                if burst:
+                    break
+                time.sleep(cls.POLL_INTERVAL)
+                continue
+            if job.kind in cls.BATCH_HANDLERS:
+                # Weitere fällige Aufträge derselben Art gleich mitnehmen
+                size = current_app.config.get(cls.BATCH_HANDLERS[job.kind][1], 50)
+                jobs = [job] + cls.claim_batch(worker_name, job.kind, size - 1)
+                cls.run_batch(jobs)
+                processed += len(jobs)
+                continue
+            cls.run(job)
+            processed += 1
+        return processed
+
+    @classmethod
+    def start_workers(cls, app, threads=1, stop_event=None):
+        """
+        Startet einen Worker-Pool als Hintergrund-Threads.
+
+        Returns:
+            list: die gestarteten Threads
+        """
+        def target():
+            with app.app_context():
+                cls.work(stop_event=stop_event)
+                db.session.remove()
+
+        workers = []
+        for i in range(threads):
+            t = threading.Thread(target=target, name=f'job-worker-{i + 1}', daemon=True)
+            t.start()
+            workers.append(t)
+        return workers
+
+
+# -------- Handler --------
+@JobService.handler('receipt')
+def _render_receipt(job):
+    """Erstellt das PDF zur Bewegung und plant danach den E-Mail-Versand ein."""
+    data = job.get_payload()
+    movement = db.session.get(Movement, data['movement_id'])
+    if not movement:
+        return 'Bewegung nicht gefunden'
+
+    movement.pdf_file = PDFService.create_receipt(movement, movement.item)
+
+    if movement.recipient_email:
+        JobService.enqueue('mail', {
+            'movement_id': movement.id,
+            'recipient_email': movement.recipient_email,
+            'recipient_name': movement.get_recipient_name()
+        }, movement_id=movement.id, commit=False)
+    return movement.pdf_file
+
+
+@JobService.handler('checkout_receipt')
+def _render_checkout_receipt(job):
+    """Erstellt ein PDF mit allen Positionen des Checkouts und plant den E-Mail-Versand ein."""
+    data = job.get_payload()
+    checkout = db.session.get(Checkout, data['checkout_id'])
+    if not checkout:
+        return 'Checkout nicht gefunden'
+
+    movements = (
+        Movement.query
+        .options(db.joinedload(Movement.item))
+        .filter(Movement.checkout_id == checkout.id)
+        .order_by(Movement.id)
+        .all()
+    )
+    checkout.pdf_file = PDFService.create_checkout_receipt(checkout, movements)
+    for movement in movements:
+        movement.pdf_file = checkout.pdf_file
+
+    first = movements[0]
+    if first.recipient_email:
+        JobService.enqueue('mail', {
+            'checkout_id': checkout.id,
+            'recipient_email': first.recipient_email,
+            'recipient_name': first.get_recipient_name()
+        }, checkout_id=checkout.id, commit=False)
+    return checkout.pdf_file
+
+
+@JobService.batch_handler('mail', size='SMTP_BATCH_SIZE')
+def _send_receipt_mails(jobs):
+    """Versendet die Empfangsbestätigungen mehrerer Aufträge gebündelt (EmailService.send_receipts)."""
+    if not EmailService.is_configured():
+        return [(True, 'E-Mail nicht konfiguriert (Test-Modus)')] * len(jobs)
+
+    results = [None] * len(jobs)
+    receipts = []
+    for index, job in enumerate(jobs):
+        data = job.get_payload()
+        if data.get('checkout_id'):
+            receipt = db.session.get(Checkout, data['checkout_id'])
+        else:
+            receipt = db.session.get(Movement, data['movement_id'])
+        if not receipt or not receipt.pdf_file:
+            results[index] = (False, 'PDF zur Buchung fehlt')
+            continue
+        receipts.append((index, {
+            'recipient_email': data['recipient_email'],
+            'recipient_name': data['recipient_name'],
+            'pdf_path': StorageService.resolve(receipt.pdf_file) or receipt.pdf_file
+        }))
+
+    sent = EmailService.send_receipts([receipt for _, receipt in receipts])
+    for (index, _), result in zip(receipts, sent):
+        results[index] = result
+    return results
+
+
+@JobService.handler('mail')
+def _send_receipt_mail(job):
+    """Versendet die Empfangsbestätigung; Fehler führen zu einem neuen Versuch."""
+    success, message = _send_receipt_mails([job])[0]
+    if not success:
+        raise RuntimeError(message)
+    return message
@@ -0,0 +1,171 @@
+from datetime import datetime, time
+from sqlalchemy import exists, func, insert, literal, select, update
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from models.ledger import StockSnapshot
+
+
+class LedgerService:
+    """
+    Service für das Lagerbuch.
+    Die Bewegungen sind die Quelle der Wahrheit und werden nur angehängt,
+    items.qty ist der schnell lesbare aktuelle Stand (für Liste, Scanner und
+    die atomaren Buchungen). Schnappschüsse fassen die Bewegungen bis zu
+    einem Zeitpunkt zusammen: der Bestand zu jedem Zeitpunkt ist der letzte
+    Schnappschuss davor (Suche im Primärschlüssel) plus die Bewegungen
+    seitdem (Bereich im Index ix_movements_item_created) - ohne die ganze
+    Historie zu summieren.
+    """
+
+    # Beginn des Lagerbuchs: Anfangsbestände aus der Zeit vor dem Lagerbuch
+    # (Migration) stehen als Schnappschuss an diesem Zeitpunkt
+    BEGIN = datetime(1970, 1, 1)
+
+    # Grund der Gegenbuchung, wenn der Bestand beim Bearbeiten geändert wird
+    CORRECTION_REASON = 'Bestandskorrektur'
+
+    # -------- Bestand laut Lagerbuch --------
+
+    @staticmethod
+    def _last_snapshot(column, at):
+        """Spalte des letzten Schnappschusses vor at je Artikel (korrelierte Unterabfrage)"""
+        query = select(column).where(StockSnapshot.item_id == Item.id)
+        if at is not None:
+            query = query.where(StockSnapshot.as_of <= at)
+        return query.order_by(StockSnapshot.as_of.desc()).limit(1).correlate(Item).scalar_subquery()
+
+    @classmethod
+    def stock_expression(cls, at=None):
+        """
+        Bestand laut Lagerbuch als Spaltenausdruck für Abfragen über items.
+
+        Args:
+            at: Zeitpunkt (es zählen Bewegungen vor at) oder None für den aktuellen Stand
+
+        Returns:
+            SQL-Ausdruck (letzter Schnappschuss + Bewegungen seitdem)
+        """
+        since = func.coalesce(cls._last_snapshot(StockSnapshot.as_of, at), cls.BEGIN)
+        delta = (
+            select(func.coalesce(func.sum(Movement.change), 0))
+            .where(Movement.item_id == Item.id, Movement.created_at >= since)
+        )
+        if at is not None:
+            delta = delta.where(Movement.created_at < at)
+        return func.coalesce(cls._last_snapshot(StockSnapshot.qty, at), 0) + delta.correlate(Item).scalar_subquery()
+
+    @classmethod
+    def stock_at(cls, at, item_ids=None):
+        """
+        Bestand zu einem Zeitpunkt (z.B. "was hatten wir am 1. März?").
+
+        Args:
+            at: datetime (Bewegungen vor at zählen; für das Ende eines Tages
+                den Beginn des nächsten Tages übergeben)
+            item_ids: nur diese Artikel (Standard: alle)
+
+        Returns:
+            dict: item_id -> Bestand
+        """
+        query = db.session.query(Item.id, cls.stock_expression(at))
+        if item_ids is not None:
+            query = query.filter(Item.id.in_(item_ids))
+        return dict(query.all())
+
+    # -------- Schreiben --------
+
+    @staticmethod
+    def open_item(item, qty, now):
+        """
+        Anfangsbestand eines neu angelegten Artikels als Schnappschuss
+        (keine Bewegung: der Artikel bleibt löschbar, solange nichts gebucht ist).
+
+        Args:
+            item: Artikel (wird geflusht, um die ID zu bekommen)
+            qty: Anfangsbestand
+            now: Zeitpunkt der Anlage (item.created_at)
+        """
+        if not qty:
+            return
+        db.session.flush()
+        db.session.add(StockSnapshot(item_id=item.id, as_of=now, qty=qty))
+
+    @classmethod
+    def correct(cls, item, qty, original=None):
+        """
+        Setzt den Bestand eines Artikels per Gegenbuchung (z.B. nach einer
+        Inventur). Die Differenz bezieht sich auf den Bestand, den der
+        Benutzer im Formular gesehen hat, nicht auf den frisch geladenen:
+        Bucht zwischendurch jemand anderes, wird dessen Buchung weder
+        rückgängig gemacht noch eine Korrektur erfunden. Der Bestand wird
+        atomar um die Differenz geändert.
+
+        Args:
+            item: Artikel
+            qty: neuer Bestand
+            original: Bestand beim Öffnen des Formulars (Standard: item.qty)
+
+        Returns:
+            Movement oder None wenn sich nichts ändert
+        """
+        delta = qty - (item.qty if original is None else original)
+        if not delta:
+            return None
+        item.qty = Item.qty + delta
+        movement = Movement(item=item, change=delta, reason=cls.CORRECTION_REASON)
+        db.session.add(movement)
+        return movement
+
+    @classmethod
+    def take_snapshot(cls, as_of=None):
+        """
+        Schreibt Schnappschüsse für alle Artikel mit Bewegungen seit ihrem
+        letzten Schnappschuss (benötigt App-Kontext, z.B. täglich per Cron).
+        Der neue Stand ergibt sich aus dem letzten Schnappschuss plus den
+        Bewegungen dazwischen, nicht aus der ganzen Historie.
+
+        Args:
+            as_of: Zeitpunkt (Standard: heute 00:00 UTC); nur Vergangenheit,
+                   spätere Bewegungen mit älterem Zeitstempel gibt es nicht
+
+        Returns:
+            int: Anzahl neuer Schnappschüsse
+
+        Raises:
+            ValueError: wenn as_of in der Zukunft liegt
+        """
+        now = datetime.utcnow()
+        as_of = as_of or datetime.combine(now.date(), time.min)
+        if as_of > now:
+            raise ValueError('Schnappschüsse nur für vergangene Zeitpunkte.')
+
+        since = func.coalesce(cls._last_snapshot(StockSnapshot.as_of, as_of), cls.BEGIN)
+        changed = exists().where(Movement.item_id == Item.id, Movement.created_at >= since,
+                                 Movement.created_at < as_of).correlate(Item)
+        rows = select(Item.id, literal(as_of, StockSnapshot.as_of.type), cls.stock_expression(as_of)).where(changed)
+        statement = insert(StockSnapshot).from_select(['item_id', 'as_of', 'qty'], rows)
+        with db.engine.begin() as connection:
+            # rowcount eines INSERT liefert nicht jeder Treiber von sich aus (psycopg)
+            result = connection.execute(statement.execution_options(preserve_rowcount=True))
+        return result.rowcount
+
+    # -------- Prüfen --------
+
+    @classmethod
+    def verify(cls, fix=False):
+        """
+        Vergleicht items.qty mit dem Bestand laut Lagerbuch (benötigt App-Kontext).
+
+        Args:
+            fix: items.qty auf den Stand des Lagerbuchs setzen
+
+        Returns:
+            list: Abweichungen als (item_id, sku, items.qty, lagerbuch)
+        """
+        ledger = cls.stock_expression()
+        drift = db.session.query(Item.id, Item.sku, Item.qty, ledger).filter(Item.qty != ledger).order_by(Item.id).all()
+        if drift and fix:
+            with db.engine.begin() as connection:
+                connection.execute(update(Item).where(Item.id.in_([row[0] for row in drift])).values(qty=ledger))
+        return [tuple(row) for row in drift]
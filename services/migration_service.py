@@ -0,0 +1,167 @@
+import importlib
+import pkgutil
+from datetime import datetime
+from sqlalchemy import inspect
+from extensions import db
+import migrations
+
+
+class MigrationService:
+    """
+    Service für Datenbank-Migrationen.
+    Jede Migration ist ein Modul im Paket migrations mit VERSION,
+    DESCRIPTION und upgrade(connection). Die erreichte Version steht in der
+    Tabelle schema_version, jede Migration läuft in einer eigenen Transaktion.
+    """
+
+    VERSION_TABLE = 'schema_version'
+
+    @staticmethod
+    def get_migrations():
+        """
+        Lädt alle Migrationen aus dem Paket migrations.
+
+        Returns:
+            list: Module, sortiert nach VERSION
+        """
+        modules = [
+            importlib.import_module(f'{migrations.__name__}.{info.name}')
+            for info in pkgutil.iter_modules(migrations.__path__)
+        ]
+        return sorted(modules, key=lambda module: module.VERSION)
+
+    @classmethod
+    def _ensure_version_table(cls, connection):
+        """Legt die Versions-Tabelle an, falls sie fehlt"""
+        connection.exec_driver_sql(
+            f'CREATE TABLE IF NOT EXISTS {cls.VERSION_TABLE} ('
+            'version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)'
+        )
+
+    @classmethod
+    def applied_versions(cls, connection):
+        """Gibt die bereits ausgeführten Versionen zurück"""
+        if not inspect(connection).has_table(cls.VERSION_TABLE):
+            return set()
+        return {row[0] for row in connection.exec_driver_sql(f'SELECT version FROM {cls.VERSION_TABLE}')}
+
+    @classmethod
+    def status(cls):
+        """
+        Zeigt welche Migrationen ausgeführt sind (benötigt App-Kontext).
+
+        Returns:
+            list: (version, description, applied: bool)
+        """
+        with db.engine.connect() as connection:
+            applied = cls.applied_versions(connection)
+        return [(m.VERSION, m.DESCRIPTION, m.VERSION in applied) for m in cls.get_migrations()]
+
+    @classmethod
+    def upgrade(cls):
+        """
+        Führt alle noch nicht ausgeführten Migrationen aus (benötigt App-Kontext).
+
+        Returns:
+            list: Versionen, die jetzt ausgeführt wurden
+        """
+        done = []
+        with db.engine.connect() as connection:
+            with connection.begin():
+                cls._ensure_version_table(connection)
+            applied = cls.applied_versions(connection)
+
+        for migration in cls.get_migrations():
+            if migration.VERSION in applied:
+                continue
+            with db.engine.begin() as connection:
+                migration.upgrade(connection)
+                connection.execute(
+                    db.text(f'INSERT INTO {cls.VERSION_TABLE} (version, description, applied_at) '
+                            'VALUES (:version, :description, :applied_at)'),
+                    {'version': migration.VERSION, 'description': migration.DESCRIPTION,
+                     'applied_at': datetime.utcnow()}
+                )
+            done.append(migration.VERSION)
+
+        if done:
+            # Neue Tabellen (z.B. items_fts) sind erst jetzt vorhanden
+            from services.item_service import ItemService
+            ItemService.clear_search_index_cache()
+        return done
+
+    @staticmethod
+    def plan_checks():
+        """
+        Häufige Abfragen und der Index, den sie benutzen sollen.
+
+        Returns:
+            list: (name, query, index_name)
+        """
+        from models.item import Item
+        from services.item_service import ItemService
+        from services.movement_service import MovementService
+        from services.reservation_service import ReservationService
+        from services.ledger_service import LedgerService
+
+        cursor = '2026-01-01T00:00:00_1'
+        page = MovementService.PAGE_SIZE
+        return [
+            ('Artikelliste', ItemService.get_all_query(), 'ix_items_category_sub_name'),
+            ('Artikelliste nach Kategorie', ItemService.get_all_query('Monitor'), 'ix_items_category_sub_name'),
+            ('Dashboard zuletzt angelegt', ItemService.recently_added_query(), 'ix_items_created_id'),
+            ('Dashboard niedrige Bestände', ItemService.low_stock_query(5), 'ix_items_shortfall'),
+            ('Historie', MovementService.list_query({}, cursor, page), 'ix_movements_created_id'),
+            ('Historie nach Artikel', MovementService.list_query({'item_id': 1}, cursor, page), 'ix_movements_item_created'),
+            ('Historie nach Empfänger', MovementService.list_query({'recipient': 'Muster'}, cursor, page), 'ix_movements_recipient_created'),
+            ('Historie nach Abteilung', MovementService.list_query({'department': 'IT'}, cursor, page), 'ix_movements_department_created'),
+            ('Historie nach Typ', MovementService.list_query({'ausgabe_typ': 'buero'}, cursor, page), 'ix_movements_typ_created'),
+            ('Verfügbarer Bestand', ReservationService.available_query([1, 2, 3]), 'ix_cart_lines_item_expires'),
+            ('Bestand zu einem Zeitpunkt', db.session.query(Item.id, LedgerService.stock_expression(datetime(2026, 3, 2))),
+             'ix_movements_item_created'),
+        ]
+
+    @classmethod
+    def check_query_plans(cls):
+        """
+        Prüft per EXPLAIN QUERY PLAN, ob die häufigen Abfragen ihren Index
+        benutzen und ohne zusätzliche Sortierung auskommen (nur SQLite,
+        benötigt App-Kontext).
+
+        Returns:
+            list: dict mit name, index, ok und plan pro Abfrage
+        """
+        results = []
+        if db.engine.dialect.name != 'sqlite':
+            return results
+
+        with db.engine.connect() as connection:
+            for name, query, index_name in cls.plan_checks():
+                compiled = query.statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+                # Werte nur für den Plan: Datumswerte als Text wie in SQLite gespeichert
+                params = tuple(
+                    value.isoformat(' ') if isinstance(value, datetime) else value
+                    for value in (compiled.params[key] for key in compiled.positiontup)
+                )
+                plan = [row[3] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled.string}', params)]
+                uses_index = any(f'INDEX {index_name} ' in f'{step} ' for step in plan)
+                sorts = any('TEMP B-TREE' in step for step in plan)
+                results.append({'name': name, 'index': index_name, 'ok': uses_index and not sorts, 'plan': plan})
+        return results
+
+    # -------- Hilfsfunktionen für Migrationen --------
+
+    @staticmethod
+    def add_column(connection, table, name, ddl):
+        """
+        Fügt eine Spalte hinzu, falls sie noch fehlt.
+
+        Args:
+            connection: Verbindung der laufenden Migration
+            table: Tabellenname
+            name: Spaltenname
+            ddl: Typ und Zusätze, z.B. 'INTEGER REFERENCES checkouts (id)'
+        """
+        columns = {column['name'] for column in inspect(connection).get_columns(table)}
+        if name not in columns:
+            connection.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}')
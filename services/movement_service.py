@@ -0,0 +1,243 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from models.checkout import Checkout
+from models.cart import CartLine
+from services.signature_service import SignatureService
+from services.reservation_service import ReservationService
+
+
+class MovementService:
+    """
+    Service-Klasse für Lagerbewegungen.
+    Bucht einen kompletten Warenkorb in einer einzigen Transaktion und
+    liefert die Historie seitenweise (Keyset auf created_at, id).
+    """
+
+    PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 500
+
+    # Spalten, die die Historie anzeigt (alles andere wird nicht geladen)
+    LIST_COLUMNS = (
+        Movement.id, Movement.item_id, Movement.checkout_id, Movement.change, Movement.reason,
+        Movement.ausgabe_typ, Movement.created_at, Movement.pdf_file,
+        Movement.recipient_firstname, Movement.recipient_lastname,
+        Movement.issuer_firstname, Movement.issuer_lastname
+    )
+
+    @staticmethod
+    def commit_cart(cart, direction, cart_key=None, **movement_data):
+        """
+        Bucht alle Warenkorb-Positionen als Bewegungen.
+
+        Alle Artikel werden mit einer einzigen IN-Abfrage geladen (unter
+        PostgreSQL mit FOR UPDATE gesperrt), der Bestand wird per atomarem
+        UPDATE (qty = qty + delta) geändert. Würde eine
+        Position den Bestand negativ machen, wird die ganze Buchung
+        zurückgerollt. Bei einer Ausgabe bleibt dabei der von anderen
+        Warenkörben reservierte Bestand unangetastet; die Reservierungen des
+        eigenen Warenkorbs werden in derselben Transaktion aufgelöst. Alle
+        Bewegungen gehören zu einem gemeinsamen Checkout (movement.checkout),
+        für den genau ein PDF erstellt wird, und teilen sich eine
+        gespeicherte Unterschrift.
+
+        Args:
+            cart: Rohe Warenkorb-Daten (Liste mit item_id und quantity)
+            direction: -1 = Ausgabe, +1 = Rückgabe
+            cart_key: Warenkorb, dessen Reservierungen gebucht werden
+            **movement_data: Gemeinsame Felder für alle Movement-Zeilen
+
+        Returns:
+            tuple: (success: bool, message: str, results: list)
+                   results enthält pro Position ein dict mit
+                   item, quantity, movement, success und message
+        """
+        if not cart:
+            return False, 'Warenkorb ist leer', []
+
+        item_ids = [cart_item['item_id'] for cart_item in cart]
+        # Zeilensperre (PostgreSQL) immer in derselben Reihenfolge wie beim
+        # Reservieren, damit sich zwei Buchungen nicht gegenseitig blockieren;
+        # SQLite ignoriert FOR UPDATE
+        items = {item.id: item for item in
+                 Item.query.filter(Item.id.in_(item_ids)).order_by(Item.id).with_for_update().all()}
+
+        results = []
+        movements = []
+        failed = False
+        checkout = Checkout(ausgabe_typ=movement_data.get('ausgabe_typ'))
+        signature_url = movement_data.pop('signature', None)
+        now = datetime.utcnow()
+
+        try:
+            signature = SignatureService.store(signature_url)
+
+            for cart_item in cart:
+                item = items.get(cart_item['item_id'])
+                quantity = cart_item['quantity']
+                result = {
+                    'item': item,
+                    'item_id': cart_item['item_id'],
+                    'quantity': quantity,
+                    'movement': None,
+                    'success': False,
+                    'message': ''
+                }
+                results.append(result)
+
+                # Gelöschte Artikel werden wie bisher übersprungen
+                if not item:
+                    result['message'] = 'Artikel nicht gefunden'
+                    continue
+
+                delta = direction * quantity
+                # Ausgabe nur aus dem Bestand, den kein anderer Warenkorb reserviert hat
+                reserved = ReservationService.reserved(Item.id, now, exclude_cart_key=cart_key) if delta < 0 else 0
+                updated = db.session.execute(
+                    update(Item)
+                    .where(Item.id == item.id, Item.qty - reserved + delta >= 0)
+                    .values(qty=Item.qty + delta)
+                    .execution_options(synchronize_session=False)
+                )
+
+                if updated.rowcount != 1:
+                    failed = True
+                    result['message'] = f'Nicht genug Bestand für {item.name}'
+                    continue
+
+                movement = Movement(item_id=item.id, change=delta, checkout=checkout,
+                                    signature_blob=signature, **movement_data)
+                movements.append(movement)
+                result['movement'] = movement
+                result['success'] = True
+                result['message'] = f'{quantity}x {item.name} gebucht'
+
+            if failed:
+                db.session.rollback()
+                for result in results:
+                    if result['success']:
+                        result['movement'] = None
+                        result['success'] = False
+                        result['message'] = ''
+                return False, 'Buchung abgebrochen: nicht genug Bestand.', results
+
+            # Alle Bewegungen in einem Rutsch einfügen, Reservierungen sind damit gebucht
+            db.session.add(checkout)
+            db.session.add_all(movements)
+            if cart_key:
+                db.session.execute(delete(CartLine).where(CartLine.cart_key == cart_key))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return True, f'{len(movements)} Bewegung(en) gebucht.', results
+
+    @staticmethod
+    def parse_filters(args):
+        """
+        Liest die Filter der Historie aus den Request-Parametern.
+
+        Args:
+            args: request.args (item_id, recipient, department, ausgabe_typ, date_from, date_to)
+
+        Returns:
+            dict: nur gesetzte und gültige Filter
+        """
+        filters = {}
+        item_id = args.get('item_id', '').strip()
+        if item_id.isdigit():
+            filters['item_id'] = int(item_id)
+        for key in ('recipient', 'department', 'ausgabe_typ'):
+            value = args.get(key, '').strip()
+            if value:
+                filters[key] = value
+        for key in ('date_from', 'date_to'):
+            try:
+                filters[key] = datetime.strptime(args.get(key, ''), '%Y-%m-%d')
+            except ValueError:
+                pass
+        return filters
+
+    @staticmethod
+    def filter_query(query, filters):
+        """
+        Wendet die Filter der Historie auf eine Movement-Abfrage an.
+        Zu jedem Filter gibt es einen Index (Filterspalte, created_at, id).
+        """
+        if 'item_id' in filters:
+            query = query.filter(Movement.item_id == filters['item_id'])
+        if 'recipient' in filters:
+            query = query.filter(db.func.lower(Movement.recipient_lastname) == db.func.lower(filters['recipient']))
+        if 'department' in filters:
+            query = query.filter(db.func.lower(Movement.recipient_department) == db.func.lower(filters['department']))
+        if 'ausgabe_typ' in filters:
+            query = query.filter(Movement.ausgabe_typ == filters['ausgabe_typ'])
+        if 'date_from' in filters:
+            query = query.filter(Movement.created_at >= filters['date_from'])
+        if 'date_to' in filters:
+            query = query.filter(Movement.created_at < filters['date_to'] + timedelta(days=1))
+        return query
+
+    @staticmethod
+    def encode_cursor(movement):
+        """Cursor für die nächste Seite (created_at und id der letzten Zeile)"""
+        return f'{movement.created_at.isoformat()}_{movement.id}'
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Zerlegt einen Cursor.
+
+        Returns:
+            tuple: (created_at, id) oder None bei ungültigem Cursor
+        """
+        try:
+            created_at, movement_id = cursor.rsplit('_', 1)
+            return datetime.fromisoformat(created_at), int(movement_id)
+        except (AttributeError, ValueError):
+            return None
+
+    @classmethod
+    def list_query(cls, filters, cursor, limit):
+        """
+        Baut die Abfrage für eine Seite der Historie (eine Zeile mehr als
+        limit, um zu erkennen ob es eine weitere Seite gibt).
+
+        Statt OFFSET wird ab der letzten Zeile der vorigen Seite gelesen
+        ((created_at, id) < Cursor), so bleibt jede Seite gleich schnell.
+        Artikel werden per JOIN mitgeladen, große Spalten gar nicht.
+        """
+        query = cls.filter_query(
+            Movement.query.options(
+                db.load_only(*cls.LIST_COLUMNS),
+                db.joinedload(Movement.item).load_only(Item.name, Item.sku)
+            ),
+            filters or {}
+        )
+
+        position = cls.decode_cursor(cursor) if cursor else None
+        if position:
+            query = query.filter(db.tuple_(Movement.created_at, Movement.id) < position)
+
+        return query.order_by(Movement.created_at.desc(), Movement.id.desc()).limit(limit + 1)
+
+    @classmethod
+    def list_movements(cls, filters=None, cursor=None, limit=None):
+        """
+        Liefert eine Seite der Historie, neueste zuerst.
+
+        Args:
+            filters: dict aus parse_filters()
+            cursor: Cursor der vorigen Seite (oder None für die erste Seite)
+            limit: Zeilen pro Seite (Standard: PAGE_SIZE)
+
+        Returns:
+            tuple: (movements: list, next_cursor: str oder None)
+        """
+        limit = min(limit or cls.PAGE_SIZE, cls.MAX_PAGE_SIZE)
+        movements = cls.list_query(filters, cursor, limit).all()
+        next_cursor = cls.encode_cursor(movements[limit - 1]) if len(movements) > limit else None
+        return movements[:limit], next_cursor
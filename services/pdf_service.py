@@ -1,46 +1,68 @@
 
-import os
 import base64
-from datetime import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from flask import current_app, has_app_context
+from PIL import Image
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from io import BytesIO
+import metrics
+from services.storage_service import StorageService
+
+# ASCII85 bläht Bilddaten nur auf und ist ohne C-Beschleuniger sehr langsam
+rl_config.useA85 = 0
 
 
 class PDFService:
     """Service für PDF-Generierung von Empfangsbestätigungen"""
     
-    PDF_FOLDER = 'static/pdfs'
+    # Cache für dekodierte Unterschriften (Schlüssel: SHA-256 der Data-URL)
+    SIGNATURE_CACHE_SIZE = 256
+    SIGNATURE_MAX_SIZE = (480, 160)  # Pixel, reicht für 6 x 2 cm bei ca. 200 dpi
+    _signature_cache = OrderedDict()
+    _signature_lock = threading.Lock()
+    
+    # Zeitzone der Belege, falls RECEIPT_TIMEZONE nicht gesetzt ist
+    DEFAULT_TIMEZONE = 'Europe/Berlin'
     
     @classmethod
     def create_receipt(cls, movement, item):
         """
-        Erstellt eine PDF-Empfangsbestätigung.
-        Gibt den Dateipfad zurück.
+        Erstellt eine PDF-Empfangsbestätigung und legt sie im Speicher ab.
+        Gibt den Speicher-Schlüssel zurück.
         """
-        # Ordner erstellen falls nicht vorhanden
-        os.makedirs(cls.PDF_FOLDER, exist_ok=True)
+        buffer = BytesIO()
+        cls.render_receipt(movement, item, buffer, timestamp=cls.document_time(movement.created_at), invariant=True)
+        return StorageService.get_backend().save(buffer.getvalue())
+    
+    @classmethod
+    @metrics.timed('lager_pdf_render_seconds', kind='movement')
+    def render_receipt(cls, movement, item, target, timestamp=None, invariant=False):
+        """
+        Zeichnet die Empfangsbestätigung einer Bewegung.
         
-        # Dateiname generieren
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"empfangsbestaetigung_{movement.id}_{timestamp}.pdf"
-        filepath = os.path.join(cls.PDF_FOLDER, filename)
+        Args:
+            movement: Movement-Objekt
+            item: zugehöriger Artikel
+            target: Dateipfad oder Datei-Objekt (z.B. BytesIO)
+            timestamp: Datum im Dokument (Standard: jetzt)
+            invariant: True = gleiche Eingaben ergeben byte-gleiche PDFs
+        """
+        timestamp = timestamp or cls.document_time(None)
         
         # PDF erstellen
-        c = canvas.Canvas(filepath, pagesize=A4)
+        c = canvas.Canvas(target, pagesize=A4, invariant=int(invariant))
         width, height = A4
         
         # Header
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(2*cm, height - 2*cm, "Empfangsbestätigung")
-        
-        c.setFont("Helvetica", 10)
-        c.drawString(2*cm, height - 2.8*cm, f"IT-Lagerverwaltung | Datum: {datetime.now().strftime('%d.%m.%Y %H:%M')}")
-        
-        # Linie
-        c.line(2*cm, height - 3.2*cm, width - 2*cm, height - 3.2*cm)
+        cls._draw_header(c, width, height, timestamp=timestamp)
         
         # Artikel-Info
         y = height - 4.5*cm
@@ -110,24 +132,233 @@ class PDFService:
         c.line(2*cm, y, 8*cm, y)
         
         # Signatur-Bild einfügen falls vorhanden
-        if movement.signature and movement.signature.startswith('data:image'):
-            try:
-                # Base64 zu Bild konvertieren
-                sig_data = movement.signature.split(',')[1]
-                sig_bytes = base64.b64decode(sig_data)
-                sig_image = ImageReader(BytesIO(sig_bytes))
-                
-                # Signatur zeichnen
-                c.drawImage(sig_image, 2*cm, y - 2.5*cm, width=6*cm, height=2*cm, preserveAspectRatio=True)
-            except Exception as e:
-                print(f"Signatur-Fehler: {e}")
+        cls._draw_signature(c, movement.signature, y)
         
         # Footer
-        c.setFont("Helvetica", 8)
-        c.drawString(2*cm, 1.5*cm, f"Dokument erstellt am {datetime.now().strftime('%d.%m.%Y um %H:%M Uhr')}")
-        c.drawString(2*cm, 1*cm, "IT-Lagerverwaltung - Landratsamt Lörrach")
+        cls._draw_footer(c, timestamp=timestamp)
         
         # PDF speichern
         c.save()
+    
+    @classmethod
+    def create_checkout_receipt(cls, checkout, movements=None):
+        """
+        Erstellt eine PDF-Empfangsbestätigung für einen ganzen Checkout.
+        Alle Positionen stehen in einer Tabelle, die bei Bedarf auf
+        Folgeseiten umbricht. Gibt den Speicher-Schlüssel zurück.
+        
+        Args:
+            checkout: Checkout-Objekt
+            movements: Bewegungen mit geladenem Artikel (Standard: checkout.movements)
+        """
+        movements = movements if movements is not None else checkout.movements
+        buffer = BytesIO()
+        cls.render_checkout_receipt(checkout, movements, buffer,
+                                    timestamp=cls.document_time(checkout.created_at), invariant=True)
+        return StorageService.get_backend().save(buffer.getvalue())
+    
+    @classmethod
+    @metrics.timed('lager_pdf_render_seconds', kind='checkout')
+    def render_checkout_receipt(cls, checkout, movements, target, timestamp=None, invariant=False):
+        """
+        Zeichnet die Empfangsbestätigung eines Checkouts (alle Positionen).
+        
+        Args:
+            checkout: Checkout-Objekt
+            movements: Bewegungen mit geladenem Artikel
+            target: Dateipfad oder Datei-Objekt (z.B. BytesIO)
+            timestamp: Datum im Dokument (Standard: jetzt)
+            invariant: True = gleiche Eingaben ergeben byte-gleiche PDFs
+        """
+        if not movements:
+            raise ValueError(f'Checkout {checkout.id} hat keine Bewegungen')
+        first = movements[0]
+        timestamp = timestamp or cls.document_time(None)
+        
+        c = canvas.Canvas(target, pagesize=A4, invariant=int(invariant))
+        width, height = A4
+        page = 1
+        bottom = 3*cm
+        
+        cls._draw_header(c, width, height, timestamp=timestamp)
+        
+        # Empfänger
+        y = height - 4.5*cm
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(2*cm, y, "Empfänger")
+        
+        c.setFont("Helvetica", 11)
+        y -= 0.7*cm
+        c.drawString(2*cm, y, f"Name: {first.get_recipient_name()}")
+        y -= 0.5*cm
+        c.drawString(2*cm, y, f"Abteilung: {first.recipient_department or '—'}")
+        y -= 0.5*cm
+        c.drawString(2*cm, y, f"E-Mail: {first.recipient_email or '—'}")
+        y -= 0.5*cm
+        c.drawString(2*cm, y, f"Ausgegeben von: {first.get_issuer_name()}")
+        
+        # Artikel-Tabelle
+        columns = [(2*cm, "Artikel"), (9*cm, "SKU"), (12*cm, "Menge"), (14*cm, "Inventar-/Seriennr.")]
+        
+        def draw_table_header(y):
+            c.setFont("Helvetica-Bold", 10)
+            for x, title in columns:
+                c.drawString(x, y, title)
+            c.line(2*cm, y - 0.2*cm, width - 2*cm, y - 0.2*cm)
+            c.setFont("Helvetica", 10)
+            return y - 0.7*cm
+        
+        y -= 1.2*cm
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(2*cm, y, f"Artikel ({len(movements)} Positionen)")
+        y = draw_table_header(y - 0.8*cm)
+        
+        for movement in movements:
+            if y < bottom:
+                cls._draw_footer(c, page, timestamp)
+                c.showPage()
+                page += 1
+                cls._draw_header(c, width, height, continued=True, timestamp=timestamp)
+                y = draw_table_header(height - 4.5*cm)
+            
+            numbers = ' / '.join(n for n in (movement.inventory_number, movement.serial_number) if n) or '—'
+            c.drawString(columns[0][0], y, (movement.item.name if movement.item else '—')[:40])
+            c.drawString(columns[1][0], y, (movement.item.sku if movement.item else '') or '—')
+            c.drawString(columns[2][0], y, str(abs(movement.change)))
+            c.drawString(columns[3][0], y, numbers[:30])
+            y -= 0.5*cm
+        
+        # Zusatzinfos + Unterschrift brauchen ca. 7 cm
+        if y - 7*cm < bottom:
+            cls._draw_footer(c, page, timestamp)
+            c.showPage()
+            page += 1
+            cls._draw_header(c, width, height, continued=True, timestamp=timestamp)
+            y = height - 4*cm
+        
+        if first.has_keyboard or first.has_damage:
+            y -= 1.2*cm
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(2*cm, y, "Zusatzinformationen")
+            
+            c.setFont("Helvetica", 11)
+            y -= 0.7*cm
+            c.drawString(2*cm, y, f"Tastatur vorhanden: {'Ja' if first.has_keyboard else 'Nein'}")
+            y -= 0.5*cm
+            c.drawString(2*cm, y, f"Mängel: {'Ja' if first.has_damage else 'Nein'}")
+            
+            if first.damage_description:
+                y -= 0.5*cm
+                c.drawString(2*cm, y, f"Beschreibung: {first.damage_description}")
+        
+        # Signatur
+        y -= 1.5*cm
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(2*cm, y, "Unterschrift Empfänger")
+        
+        y -= 0.5*cm
+        c.line(2*cm, y, 8*cm, y)
+        cls._draw_signature(c, first.signature, y)
+        
+        cls._draw_footer(c, page, timestamp)
+        c.save()
+    
+    @staticmethod
+    def document_time(created_at):
+        """
+        Wandelt den UTC-Zeitstempel der Buchung in die Zeitzone der Belege um
+        (app.config['RECEIPT_TIMEZONE'], nicht die des Rechners). So ergibt
+        der gleiche Datensatz auf jedem Rechner das gleiche PDF und damit
+        denselben Speicher-Schlüssel. Ohne App-Kontext (z.B. Benchmarks) gilt
+        die Standard-Zeitzone.
+        """
+        config = current_app.config if has_app_context() else {}
+        zone = ZoneInfo(config.get('RECEIPT_TIMEZONE', PDFService.DEFAULT_TIMEZONE))
+        if not created_at:
+            return datetime.now(zone).replace(tzinfo=None)
+        return created_at.replace(tzinfo=timezone.utc).astimezone(zone).replace(tzinfo=None)
+    
+    @classmethod
+    def get_signature_image(cls, signature):
+        """
+        Gibt die Unterschrift als fertig aufbereitetes Bild zurück.
         
-        return filepath
\ No newline at end of file
+        Das dekodierte Bild wird auf weißen Hintergrund gelegt, in Graustufen
+        umgewandelt, auf Druckgröße verkleinert und unter dem Hash der
+        Data-URL zwischengespeichert (LRU).
+        
+        Returns:
+            ImageReader oder None wenn keine Unterschrift vorhanden
+        """
+        if not signature or not signature.startswith('data:image'):
+            return None
+        
+        key = hashlib.sha256(signature.encode()).hexdigest()
+        with cls._signature_lock:
+            if key in cls._signature_cache:
+                cls._signature_cache.move_to_end(key)
+                return cls._signature_cache[key]
+        
+        # Base64 zu Bild konvertieren
+        sig_bytes = base64.b64decode(signature.split(',')[1])
+        image = Image.open(BytesIO(sig_bytes)).convert('RGBA')
+        flat = Image.new('RGB', image.size, (255, 255, 255))
+        flat.paste(image, mask=image.split()[3])
+        flat = flat.convert('L')
+        flat.thumbnail(cls.SIGNATURE_MAX_SIZE)
+        
+        sig_image = ImageReader(flat)
+        sig_image.getRGBData()  # Pixeldaten einmalig vorab umwandeln
+        
+        with cls._signature_lock:
+            cls._signature_cache[key] = sig_image
+            while len(cls._signature_cache) > cls.SIGNATURE_CACHE_SIZE:
+                cls._signature_cache.popitem(last=False)
+        return sig_image
+    
+    @staticmethod
+    def _draw_static_layer(c, width, height):
+        """
+        Zeichnet die festen Teile jeder Seite (Titel, Trennlinie, Fußzeile).
+        Bewusst direkt und nicht als Form-XObject: reportlab kann ein Form
+        nicht zwischen Dokumenten teilen, und pro Dokument neu aufgebaut war
+        es langsamer als die fünf Zeichenbefehle selbst.
+        """
+        c.setFont("Helvetica-Bold", 20)
+        c.drawString(2*cm, height - 2*cm, "Empfangsbestätigung")
+        c.line(2*cm, height - 3.2*cm, width - 2*cm, height - 3.2*cm)
+        c.setFont("Helvetica", 8)
+        c.drawString(2*cm, 1*cm, "IT-Lagerverwaltung - Landratsamt Lörrach")
+    
+    @classmethod
+    def _draw_header(cls, c, width, height, continued=False, timestamp=None):
+        """Zeichnet die feste Ebene sowie Datum und ggf. Fortsetzungs-Hinweis"""
+        cls._draw_static_layer(c, width, height)
+        
+        if continued:
+            c.setFont("Helvetica-Bold", 20)
+            c.drawString(2*cm + c.stringWidth("Empfangsbestätigung", "Helvetica-Bold", 20), height - 2*cm, " (Fortsetzung)")
+        
+        c.setFont("Helvetica", 10)
+        timestamp = timestamp or PDFService.document_time(None)
+        c.drawString(2*cm, height - 2.8*cm, f"IT-Lagerverwaltung | Datum: {timestamp.strftime('%d.%m.%Y %H:%M')}")
+    
+    @staticmethod
+    def _draw_footer(c, page=None, timestamp=None):
+        """Zeichnet die veränderlichen Teile der Fußzeile (optional mit Seitenzahl)"""
+        timestamp = timestamp or PDFService.document_time(None)
+        c.setFont("Helvetica", 8)
+        c.drawString(2*cm, 1.5*cm, f"Dokument erstellt am {timestamp.strftime('%d.%m.%Y um %H:%M Uhr')}")
+        if page is not None:
+            c.drawRightString(A4[0] - 2*cm, 1*cm, f"Seite {page}")
+    
+    @classmethod
+    def _draw_signature(cls, c, signature, y):
+        """Zeichnet das Unterschrift-Bild (data:image/...;base64) unter die Linie"""
+        try:
+            sig_image = cls.get_signature_image(signature)
+            if sig_image:
+                # Signatur zeichnen
+                c.drawImage(sig_image, 2*cm, y - 2.5*cm, width=6*cm, height=2*cm, preserveAspectRatio=True)
+        except Exception as e:
+            print(f"Signatur-Fehler: {e}")
@@ -0,0 +1,309 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from io import BytesIO
+from sqlalchemy import update
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from models.checkout import Checkout
+from models.signature import Signature
+from services.pdf_service import PDFService
+from services.storage_service import ReceiptStorage, StorageService
+
+
+# Spalten, die für das PDF gebraucht werden
+MOVEMENT_FIELDS = [
+    'id', 'change', 'created_at', 'recipient_firstname', 'recipient_lastname',
+    'recipient_department', 'recipient_email', 'issuer_firstname', 'issuer_lastname',
+    'inventory_number', 'serial_number', 'has_keyboard', 'has_damage',
+    'damage_description', 'signature'
+]
+
+
+def _snapshot(movement):
+    """Wandelt eine Bewegung in ein dict um, das an einen anderen Prozess geschickt werden kann"""
+    data = {field: getattr(movement, field) for field in MOVEMENT_FIELDS}
+    data['item'] = {'name': movement.item.name, 'sku': movement.item.sku} if movement.item else None
+    return data
+
+
+def _restore(data):
+    """Baut aus dem dict wieder ein (nicht gespeichertes) Movement mit Artikel"""
+    data = dict(data)
+    item = data.pop('item')
+    movement = Movement(**data)
+    movement.item = Item(**item) if item else None
+    return movement
+
+
+# Speicher-Backend im Worker-Prozess (wird beim Start gesetzt)
+_storage = None
+
+
+def _init_worker(storage):
+    """Initialisiert einen Worker-Prozess mit dem Speicher-Backend"""
+    global _storage
+    _storage = storage
+
+
+def _rebuild_task(task):
+    """
+    Läuft im Worker-Prozess: PDF im Speicher erstellen und nur ablegen,
+    wenn sich der Inhalt (SHA-256) gegenüber dem gespeicherten geändert hat.
+
+    Returns:
+        tuple: (auftrag_id, neuer_schlüssel, status, fehler)
+               mit status 'written', 'unchanged' oder 'error'
+    """
+    try:
+        movements = [_restore(data) for data in task['movements']]
+        timestamp = PDFService.document_time(task['created_at'])
+        buffer = BytesIO()
+        if task['checkout_id']:
+            checkout = Checkout(id=task['checkout_id'])
+            PDFService.render_checkout_receipt(checkout, movements, buffer, timestamp=timestamp, invariant=True)
+        else:
+            movement = movements[0]
+            PDFService.render_receipt(movement, movement.item, buffer, timestamp=timestamp, invariant=True)
+
+        content = buffer.getvalue()
+        key = ReceiptStorage.make_key(content)
+        if key == task['key'] and _storage.exists(key):
+            return task['id'], key, 'unchanged', None
+        return task['id'], _storage.save(content), 'written', None
+    except Exception as e:
+        return task['id'], None, 'error', str(e)
+
+
+class ReceiptService:
+    """
+    Service für vorhandene Empfangsbestätigungen.
+    Erstellt alle gespeicherten PDFs neu, z.B. nach einer Layout-Änderung.
+    """
+
+    @staticmethod
+    def iter_tasks(chunk_size=200):
+        """
+        Liefert Render-Aufträge in id-sortierten Blöcken (Keyset, kein OFFSET).
+        Zuerst Checkouts (ein PDF für alle Positionen), dann einzelne
+        Bewegungen ohne Checkout.
+
+        Yields:
+            list: Aufträge eines Blocks
+        """
+        last_id = 0
+        while True:
+            checkouts = (
+                Checkout.query
+                .filter(Checkout.pdf_file.isnot(None), Checkout.id > last_id)
+                .order_by(Checkout.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not checkouts:
+                break
+            last_id = checkouts[-1].id
+
+            movements = (
+                Movement.query
+                .options(db.joinedload(Movement.item),
+                         db.selectinload(Movement.signature_blob).undefer(Signature.data))
+                .filter(Movement.checkout_id.in_([c.id for c in checkouts]))
+                .order_by(Movement.id)
+                .all()
+            )
+            by_checkout = {}
+            for movement in movements:
+                by_checkout.setdefault(movement.checkout_id, []).append(movement)
+
+            yield [
+                {
+                    'id': ('checkout', checkout.id),
+                    'key': checkout.pdf_file,
+                    'checkout_id': checkout.id,
+                    'created_at': checkout.created_at,
+                    'movements': [_snapshot(m) for m in by_checkout.get(checkout.id, [])]
+                }
+                for checkout in checkouts if by_checkout.get(checkout.id)
+            ]
+            db.session.expunge_all()
+
+        last_id = 0
+        while True:
+            movements = (
+                Movement.query
+                .options(db.joinedload(Movement.item),
+                         db.selectinload(Movement.signature_blob).undefer(Signature.data))
+                .filter(Movement.pdf_file.isnot(None), Movement.checkout_id.is_(None), Movement.id > last_id)
+                .order_by(Movement.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not movements:
+                break
+            last_id = movements[-1].id
+
+            yield [
+                {
+                    'id': ('movement', movement.id),
+                    'key': movement.pdf_file,
+                    'checkout_id': None,
+                    'created_at': movement.created_at,
+                    'movements': [_snapshot(movement)]
+                }
+                for movement in movements
+            ]
+            db.session.expunge_all()
+
+    @staticmethod
+    def count():
+        """Anzahl der PDFs, die neu erstellt würden"""
+        checkouts = Checkout.query.filter(Checkout.pdf_file.isnot(None)).count()
+        movements = Movement.query.filter(Movement.pdf_file.isnot(None), Movement.checkout_id.is_(None)).count()
+        return checkouts + movements
+
+    @staticmethod
+    def _update_keys(changes):
+        """Schreibt neue Speicher-Schlüssel in die Datenbank"""
+        checkouts = [{'id': row_id, 'pdf_file': key} for (kind, row_id), key in changes.items() if kind == 'checkout']
+        movements = [{'id': row_id, 'pdf_file': key} for (kind, row_id), key in changes.items() if kind == 'movement']
+        if checkouts:
+            db.session.execute(update(Checkout), checkouts)
+            # Positionen eines Checkouts zeigen auf dasselbe PDF
+            for row in checkouts:
+                Movement.query.filter(Movement.checkout_id == row['id']).update(
+                    {'pdf_file': row['pdf_file']}, synchronize_session=False)
+        if movements:
+            db.session.execute(update(Movement), movements)
+        db.session.commit()
+
+    @classmethod
+    def rebuild(cls, workers=None, chunk_size=200, progress=None):
+        """
+        Erstellt alle gespeicherten Empfangsbestätigungen neu (benötigt App-Kontext).
+
+        Die Datenbank wird blockweise gelesen, gerendert wird parallel in
+        einem ProcessPoolExecutor. Unveränderte PDFs (gleicher SHA-256)
+        werden nicht neu geschrieben; geänderte bekommen einen neuen
+        Schlüssel, der in der Datenbank eingetragen wird. Alte Dateien
+        entfernt danach 'flask receipts gc'.
+
+        Args:
+            workers: Anzahl Prozesse (Standard: alle Kerne)
+            chunk_size: Datensätze pro Datenbank-Block
+            progress: Funktion, die nach jedem Block mit den Zwischenständen aufgerufen wird
+
+        Returns:
+            dict: total, done, written, unchanged, errors, seconds, per_second
+        """
+        stats = {'total': cls.count(), 'done': 0, 'written': 0, 'unchanged': 0, 'errors': []}
+        started = time.perf_counter()
+        changes = {}
+
+        def collect(futures):
+            for future in futures:
+                task_id, key, status, error = future.result()
+                stats['done'] += 1
+                if status == 'error':
+                    stats['errors'].append((task_id, error))
+                    continue
+                stats[status] += 1
+                if status == 'written':
+                    changes[task_id] = key
+
+        storage = StorageService.get_backend()
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(storage,)) as executor:
+            pending = set()
+            for tasks in cls.iter_tasks(chunk_size):
+                pending.update(executor.submit(_rebuild_task, task) for task in tasks)
+
+                # Höchstens ca. zwei Blöcke gleichzeitig im Speicher halten
+                while len(pending) > chunk_size:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+
+                if progress:
+                    progress(stats, time.perf_counter() - started)
+
+            finished, _ = wait(pending)
+            collect(finished)
+
+        # Neue Schlüssel erst nach dem Lesen eintragen (Keyset-Blöcke bleiben stabil)
+        cls._update_keys(changes)
+
+        stats['seconds'] = round(time.perf_counter() - started, 2)
+        stats['per_second'] = round(stats['done'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+        return stats
+
+    @staticmethod
+    def migrate(delete_old=False, chunk_size=500):
+        """
+        Übernimmt alte PDFs (Dateipfade, z.B. static/pdfs/...) in den
+        inhaltsadressierten Speicher und trägt die Schlüssel ein.
+
+        Args:
+            delete_old: alte Dateien nach dem Übernehmen löschen
+            chunk_size: Datensätze pro Block
+
+        Returns:
+            dict: migrated, missing (Liste fehlender Pfade)
+        """
+        storage = StorageService.get_backend()
+        stats = {'migrated': 0, 'missing': []}
+        migrated_paths = set()
+
+        for model in (Checkout, Movement):
+            last_id = 0
+            while True:
+                rows = (
+                    db.session.query(model.id, model.pdf_file)
+                    .filter(model.pdf_file.isnot(None), model.id > last_id)
+                    .order_by(model.id)
+                    .limit(chunk_size)
+                    .all()
+                )
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                changes = []
+                for row_id, value in rows:
+                    if ReceiptStorage.is_key(value):
+                        continue
+                    if not os.path.exists(value):
+                        stats['missing'].append(value)
+                        continue
+                    with open(value, 'rb') as f:
+                        changes.append({'id': row_id, 'pdf_file': storage.save(f.read())})
+                    migrated_paths.add(value)
+
+                if changes:
+                    db.session.execute(update(model), changes)
+                    db.session.commit()
+                    stats['migrated'] += len(changes)
+
+        if delete_old:
+            for path in migrated_paths:
+                os.remove(path)
+        return stats
+
+    @staticmethod
+    def collect_garbage():
+        """
+        Löscht gespeicherte PDFs, auf die kein Checkout und keine Bewegung mehr verweist.
+
+        Returns:
+            int: Anzahl gelöschter Dateien
+        """
+        storage = StorageService.get_backend()
+        referenced = {key for (key,) in db.session.query(Checkout.pdf_file).filter(Checkout.pdf_file.isnot(None))}
+        referenced.update(key for (key,) in db.session.query(Movement.pdf_file).filter(Movement.pdf_file.isnot(None)).distinct())
+
+        deleted = 0
+        for key in list(storage.iter_keys()):
+            if key not in referenced:
+                storage.delete(key)
+                deleted += 1
+        return deleted
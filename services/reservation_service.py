@@ -0,0 +1,108 @@
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from extensions import db
+from models.cart import CartLine
+from models.item import Item
+
+
+class ReservationService:
+    """
+    Service für Bestandsreservierungen.
+    Reserviert ist, was in einem Warenkorb (Tabelle cart_lines) liegt und
+    noch nicht verfallen ist. Verfügbar ist qty minus alle aktiven
+    Reservierungen, berechnet über den Index (item_id, expires_at, ...).
+    """
+
+    SWEEP_INTERVAL = 60
+
+    @staticmethod
+    def reserved(item_id, now=None, exclude_cart_key=None):
+        """
+        Summe der aktiven Reservierungen eines Artikels (korrelierte Unterabfrage).
+
+        Args:
+            item_id: Spalte oder Wert der Artikel-ID (z.B. Item.id)
+            now: Stichzeitpunkt (Standard: jetzt)
+            exclude_cart_key: Warenkorb, dessen Reservierungen nicht zählen
+
+        Returns:
+            Skalarer SQL-Ausdruck
+        """
+        conditions = [CartLine.item_id == item_id, CartLine.expires_at > (now or datetime.utcnow())]
+        if exclude_cart_key:
+            conditions.append(CartLine.cart_key != exclude_cart_key)
+        return (
+            select(func.coalesce(func.sum(CartLine.reserved), 0))
+            .where(*conditions)
+            .correlate(Item)
+            .scalar_subquery()
+        )
+
+    @classmethod
+    def available_query(cls, item_ids, exclude_cart_key=None):
+        """Abfrage (id, verfügbar) für die angegebenen Artikel"""
+        return (
+            db.session.query(Item.id, (Item.qty - cls.reserved(Item.id, exclude_cart_key=exclude_cart_key)).label('available'))
+            .filter(Item.id.in_(list(item_ids)))
+        )
+
+    @classmethod
+    def available(cls, item_ids, exclude_cart_key=None):
+        """
+        Verfügbarer Bestand (qty minus aktive Reservierungen).
+
+        Args:
+            item_ids: Artikel-IDs
+            exclude_cart_key: eigener Warenkorb (zählt nicht als Reservierung)
+
+        Returns:
+            dict: item_id -> verfügbare Menge
+        """
+        item_ids = set(item_ids)
+        if not item_ids:
+            return {}
+        return dict(cls.available_query(item_ids, exclude_cart_key).all())
+
+    @staticmethod
+    def sweep():
+        """
+        Gibt verfallene Reservierungen frei (benötigt App-Kontext).
+
+        Returns:
+            int: Anzahl gelöschter Positionen
+        """
+        from services.cart_service import CartService
+        return CartService.purge_expired()
+
+    @classmethod
+    def start_sweeper(cls, app, interval=None, stop_event=None):
+        """
+        Startet einen Hintergrund-Thread, der regelmäßig verfallene
+        Reservierungen löscht.
+
+        Args:
+            app: Flask-App
+            interval: Sekunden zwischen zwei Läufen (Standard: CART_SWEEP_INTERVAL)
+            stop_event: threading.Event zum sauberen Beenden
+
+        Returns:
+            threading.Thread
+        """
+        interval = interval or app.config.get('CART_SWEEP_INTERVAL', cls.SWEEP_INTERVAL)
+        stop_event = stop_event or threading.Event()
+
+        def target():
+            while not stop_event.wait(interval):
+                with app.app_context():
+                    try:
+                        cls.sweep()
+                    except Exception as e:
+                        current_app.logger.warning('Reservierungen aufräumen fehlgeschlagen: %s', e)
+                    finally:
+                        db.session.remove()
+
+        t = threading.Thread(target=target, name='reservation-sweeper', daemon=True)
+        t.start()
+        return t
@@ -0,0 +1,134 @@
+from io import BytesIO
+from PIL import Image
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.movement import Movement
+from models.signature import Signature
+from services.migration_service import MigrationService
+
+
+class SignatureService:
+    """
+    Service für Unterschriften.
+    Speichert Unterschriften kompakt (1-Bit-PNG) und dedupliziert in der
+    Tabelle signatures statt als Data-URL in jeder Bewegung.
+    """
+
+    # Grauwert, ab dem ein Pixel als Papier (weiß) gilt
+    THRESHOLD = 200
+
+    # INSERT ... ON CONFLICT je Datenbank
+    UPSERT = {
+        'sqlite': sqlite.insert,
+        'postgresql': postgresql.insert
+    }
+
+    @classmethod
+    def compact(cls, data):
+        """
+        Wandelt ein Unterschrift-Bild in ein 1-Bit-PNG um (schwarz/weiß).
+        Transparenz wird auf weißen Hintergrund gelegt. Lässt sich das Bild
+        nicht lesen, werden die Daten unverändert zurückgegeben.
+
+        Returns:
+            tuple: (mime_type, bytes)
+        """
+        try:
+            image = Image.open(BytesIO(data)).convert('RGBA')
+        except Exception:
+            return None, data
+
+        flat = Image.new('RGB', image.size, (255, 255, 255))
+        flat.paste(image, mask=image.split()[3])
+        table = [0] * cls.THRESHOLD + [255] * (256 - cls.THRESHOLD)
+        bitmap = flat.convert('L').point(table).convert('1', dither=Image.Dither.NONE)
+
+        buffer = BytesIO()
+        bitmap.save(buffer, 'PNG')
+        compacted = buffer.getvalue()
+        if len(compacted) >= len(data):
+            return None, data
+        return 'image/png', compacted
+
+    @classmethod
+    def store(cls, data_url):
+        """
+        Legt eine Unterschrift aus einer Data-URL ab (oder findet die vorhandene).
+        Eingefügt wird per INSERT ... ON CONFLICT DO NOTHING in der laufenden
+        Transaktion (nicht committet): speichern zwei Checkouts gleichzeitig
+        dieselbe Unterschrift (z.B. zwei leere Felder), gewinnt der erste und
+        der zweite liest dessen Zeile, statt beim Commit zu scheitern.
+
+        Args:
+            data_url: Unterschrift vom Canvas (data:image/png;base64,...)
+
+        Returns:
+            Signature oder None wenn keine Unterschrift übergeben wurde
+        """
+        if not data_url or not data_url.startswith('data:image'):
+            return None
+
+        mime_type, data = Signature.parse_data_url(data_url)
+        compact_type, data = cls.compact(data)
+        signature = Signature.from_bytes(data, compact_type or mime_type)
+
+        table = Signature.__table__
+        db.session.execute(
+            cls.UPSERT[db.engine.dialect.name](table)
+            .values(sha256=signature.sha256, mime_type=signature.mime_type, size=signature.size, data=signature.data)
+            .on_conflict_do_nothing(index_elements=[table.c.sha256])
+        )
+        return Signature.query.filter_by(sha256=signature.sha256).one()
+
+    @classmethod
+    def migrate(cls, chunk_size=200, vacuum=False):
+        """
+        Überträgt alte Unterschriften (Data-URL in movements.signature) in die
+        Tabelle signatures und leert die alte Spalte.
+
+        Args:
+            chunk_size: Bewegungen pro Block (ein Commit pro Block)
+            vacuum: Datenbank danach verkleinern (VACUUM, nur SQLite)
+
+        Returns:
+            dict: migrated, signatures (neu angelegt), skipped
+        """
+        MigrationService.upgrade()  # Spalte signature_id in alten Datenbanken
+        stats = {'migrated': 0, 'signatures': 0, 'skipped': 0}
+        before = Signature.query.count()
+        last_id = 0
+        while True:
+            rows = (
+                db.session.query(Movement.id, Movement.signature_legacy)
+                .filter(Movement.signature_legacy.isnot(None), Movement.id > last_id)
+                .order_by(Movement.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            known = {}  # Data-URL -> signature_id (Positionen eines Checkouts sind gleich)
+            for movement_id, data_url in rows:
+                if data_url not in known:
+                    signature = cls.store(data_url)
+                    known[data_url] = signature.id if signature else None
+                if known[data_url] is None:
+                    stats['skipped'] += 1  # keine Bilddaten, alte Spalte bleibt stehen
+                    continue
+                changes.append({'id': movement_id, 'signature_id': known[data_url], 'signature_legacy': None})
+
+            if changes:
+                db.session.execute(update(Movement), changes)
+            db.session.commit()
+            db.session.expunge_all()
+            stats['migrated'] += len(changes)
+        stats['signatures'] = Signature.query.count() - before
+
+        if vacuum and db.engine.dialect.name == 'sqlite':
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql('VACUUM')
+        return stats
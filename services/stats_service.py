@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, func, insert, select
+from extensions import db
+from models.item import Item
+from models.movement import Movement
+from models.stats import CategoryStats, DailyStats
+
+
+class StatsService:
+    """
+    Service für die Kennzahlen des Dashboards.
+    Unter SQLite kommen sie aus den Tabellen category_stats und daily_stats,
+    die Trigger bei jeder Änderung mitführen (eine Handvoll Zeilen statt
+    Zählen über alle Artikel); andere Datenbanken rechnen per GROUP BY.
+    """
+
+    @staticmethod
+    def is_materialized():
+        """Prüft ob die Kennzahlen-Tabellen per Trigger gepflegt werden (benötigt App-Kontext)"""
+        return db.engine.dialect.name == 'sqlite'
+
+    @staticmethod
+    def _category_select():
+        """Kennzahlen pro Kategorie, neu berechnet aus items"""
+        category = func.coalesce(Item.category, '')
+        return (
+            select(
+                category,
+                func.count(Item.id),
+                func.coalesce(func.sum(case((Item.qty < Item.min_qty, 1), else_=0)), 0),
+                func.coalesce(func.sum(Item.qty), 0)
+            )
+            .group_by(category)
+        )
+
+    @staticmethod
+    def _daily_select():
+        """Bewegungen pro Tag, neu berechnet aus movements"""
+        day = func.date(Movement.created_at)
+        return select(day, func.count(Movement.id)).where(Movement.created_at.isnot(None)).group_by(day)
+
+    @classmethod
+    def get_categories(cls):
+        """
+        Gibt die Kennzahlen pro Kategorie zurück.
+
+        Returns:
+            list: dicts mit category, items, low_stock und qty (nach Kategorie sortiert)
+        """
+        if cls.is_materialized():
+            rows = (
+                db.session.query(CategoryStats.category, CategoryStats.items, CategoryStats.low_stock, CategoryStats.qty)
+                .filter(CategoryStats.items > 0)
+                .order_by(CategoryStats.category)
+                .all()
+            )
+        else:
+            rows = sorted(db.session.execute(cls._category_select()).all())
+        return [
+            {'category': category, 'items': items, 'low_stock': low_stock, 'qty': qty}
+            for category, items, low_stock, qty in rows
+        ]
+
+    @classmethod
+    def count_movements(cls, day):
+        """
+        Gibt die Anzahl der Bewegungen an einem Tag (UTC) zurück.
+
+        Args:
+            day: datetime.date
+        """
+        if cls.is_materialized():
+            stats = db.session.get(DailyStats, day)
+            return stats.movements if stats else 0
+        start = datetime.combine(day, datetime.min.time())
+        return (
+            db.session.query(func.count(Movement.id))
+            .filter(Movement.created_at >= start, Movement.created_at < start + timedelta(days=1))
+            .scalar()
+        )
+
+    @classmethod
+    def get_dashboard(cls):
+        """
+        Gibt die Kennzahlen für das Dashboard zurück.
+
+        Returns:
+            dict: total_items, low_stock_count, total_qty, movements_today, categories
+        """
+        categories = cls.get_categories()
+        return {
+            'total_items': sum(c['items'] for c in categories),
+            'low_stock_count': sum(c['low_stock'] for c in categories),
+            'total_qty': sum(c['qty'] for c in categories),
+            'movements_today': cls.count_movements(datetime.utcnow().date()),
+            'categories': categories
+        }
+
+    @classmethod
+    def rebuild(cls, connection):
+        """
+        Berechnet die Kennzahlen-Tabellen komplett neu.
+
+        Args:
+            connection: Verbindung mit offener Transaktion
+        """
+        connection.execute(delete(CategoryStats))
+        connection.execute(
+            insert(CategoryStats).from_select(['category', 'items', 'low_stock', 'qty'], cls._category_select())
+        )
+        connection.execute(delete(DailyStats))
+        connection.execute(insert(DailyStats).from_select(['day', 'movements'], cls._daily_select()))
+
+    @classmethod
+    def reconcile(cls):
+        """
+        Vergleicht die gespeicherten Kennzahlen mit einer Neuberechnung und
+        schreibt sie neu (nur SQLite, benötigt App-Kontext).
+
+        Returns:
+            list: Abweichungen als (tabelle, schlüssel, gespeichert, berechnet)
+        """
+        if not cls.is_materialized():
+            return []
+
+        differences = []
+        zero = (0, 0, 0)
+        stored = {row[0]: tuple(row[1:]) for row in db.session.query(
+            CategoryStats.category, CategoryStats.items, CategoryStats.low_stock, CategoryStats.qty)}
+        actual = {row[0]: tuple(row[1:]) for row in db.session.execute(cls._category_select())}
+        for category in sorted(stored.keys() | actual.keys()):
+            if stored.get(category, zero) != actual.get(category, zero):
+                differences.append(('category_stats', category, stored.get(category, zero), actual.get(category, zero)))
+
+        stored = {str(day): movements for day, movements in db.session.query(DailyStats.day, DailyStats.movements)}
+        actual = {str(day): movements for day, movements in db.session.execute(cls._daily_select())}
+        for day in sorted(stored.keys() | actual.keys()):
+            if stored.get(day, 0) != actual.get(day, 0):
+                differences.append(('daily_stats', day, stored.get(day, 0), actual.get(day, 0)))
+
+        with db.engine.begin() as connection:
+            cls.rebuild(connection)
+        return differences
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from flask import current_app
+
+
+class ReceiptStorage(ABC):
+    """
+    Schnittstelle für die Ablage von Empfangsbestätigungen.
+    Dateien werden über den SHA-256 ihres Inhalts adressiert (Schlüssel),
+    gleicher Inhalt wird also nur einmal gespeichert.
+    """
+
+    KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+    @classmethod
+    def is_key(cls, value):
+        """Prüft ob ein Wert ein Speicher-Schlüssel ist (sonst: alter Dateipfad)"""
+        return bool(value and cls.KEY_PATTERN.match(value))
+
+    @staticmethod
+    def make_key(content):
+        """Berechnet den Schlüssel für einen Inhalt"""
+        return hashlib.sha256(content).hexdigest()
+
+    @abstractmethod
+    def save(self, content):
+        """Speichert den Inhalt und gibt den Schlüssel zurück"""
+
+    @abstractmethod
+    def exists(self, key):
+        """Prüft ob zum Schlüssel eine Datei vorhanden ist"""
+
+    @abstractmethod
+    def path(self, key):
+        """Gibt den lokalen Dateipfad zum Schlüssel zurück"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Löscht die Datei zum Schlüssel"""
+
+    @abstractmethod
+    def iter_keys(self):
+        """Liefert alle gespeicherten Schlüssel"""
+
+
+class LocalReceiptStorage(ReceiptStorage):
+    """
+    Ablage im lokalen Dateisystem, verteilt auf Unterordner nach den ersten
+    Zeichen des Hashes (ab/cd/abcd....pdf), damit kein Ordner zu groß wird.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], f'{key}.pdf')
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, content):
+        key = self.make_key(content)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key  # gleicher Inhalt ist schon gespeichert
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Eigene Temporärdatei pro Aufruf (auch bei mehreren Threads im selben Prozess)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=f'{key}.', suffix='.tmp',
+                                         delete=False) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.remove(f.name)
+            raise
+        return key
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self):
+        for folder, _, files in os.walk(self.root):
+            for filename in files:
+                key = filename[:-4] if filename.endswith('.pdf') else ''
+                if self.is_key(key):
+                    yield key
+
+
+class StorageService:
+    """
+    Service für die Ablage von Empfangsbestätigungen.
+    Wählt das Backend anhand von app.config['RECEIPT_STORAGE_BACKEND'].
+    """
+
+    BACKENDS = {
+        'local': lambda config: LocalReceiptStorage(config['RECEIPT_STORAGE_ROOT'])
+    }
+
+    @classmethod
+    def get_backend(cls):
+        """Gibt das konfigurierte Speicher-Backend zurück (benötigt App-Kontext)"""
+        config = current_app.config
+        return cls.BACKENDS[config.get('RECEIPT_STORAGE_BACKEND', 'local')](config)
+
+    @classmethod
+    def resolve(cls, value):
+        """
+        Gibt den Dateipfad zu einem gespeicherten Wert zurück.
+        Unterstützt Schlüssel und alte Dateipfade (vor der Migration).
+
+        Returns:
+            str oder None wenn die Datei fehlt
+        """
+        if not value:
+            return None
+        path = cls.get_backend().path(value) if ReceiptStorage.is_key(value) else value
+        return path if os.path.exists(path) else None